@@ -3,18 +3,14 @@ from mcp.server.fastmcp import FastMCP
 from mcp.server.fastmcp.prompts import base
 from dotenv import load_dotenv
 import os
-from neo4j import GraphDatabase, AsyncGraphDatabase
-import subprocess
+from module.driver_registry import get_driver, get_async_driver
+from module.adb_client import get_adb_client, AdbError
 import time
 import logging
 
 # 환경 변수 로드
 load_dotenv()
 
-uri = os.getenv("NEO4J_URI")
-user= os.getenv("NEO4J_USER")
-password=os.getenv("NEO4J_PASSWORD")
-
 # 로그 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -33,35 +29,32 @@ mcp = FastMCP("Neo4j 기반 UI Agent", instructions="""You are an intelligent ag
 @mcp.tool()
 def find_contained_elements(screen: str):
     """Retrieve UIElements which Screen contains"""
-    driver = GraphDatabase.driver(uri, auth=(user, password))
+    driver = get_driver()
     query = """
     MATCH (s:Screen {name: $screen_name})-[:CONTAINS]->(u:UIElement)-[:TRIGGERS]->(a:Tap|Hold)
     RETURN u.name AS ui_name, u.x AS x, u.y AS y, a.name AS action_name
     """
     _log_to_file(f"Tool 'find_contained_elements' called with screen: {screen}")
-    try:
-        with driver.session() as session:
-            results = session.run(query, screen_name=screen)
-            ui_list = []
-            for record in results:
-                ui_name = record["ui_name"]
-                x = record["x"]
-                y = record["y"]
-                action_name = record["action_name"]
-                
-                _log_to_file(f"Fetched: name={ui_name}, x={x}, y={y}, action={action_name}")
-                
-                ui_list.append({
-                    "ui_name": ui_name,
-                    "x": x,
-                    "y": y,
-                    "action_name": action_name
-                })
-
-            _log_to_file(f"Tool 'find_contained_elements' returning: {ui_list}")
-            return ui_list
-    finally:
-        driver.close()
+    with driver.session() as session:
+        results = session.run(query, screen_name=screen)
+        ui_list = []
+        for record in results:
+            ui_name = record["ui_name"]
+            x = record["x"]
+            y = record["y"]
+            action_name = record["action_name"]
+            
+            _log_to_file(f"Fetched: name={ui_name}, x={x}, y={y}, action={action_name}")
+            
+            ui_list.append({
+                "ui_name": ui_name,
+                "x": x,
+                "y": y,
+                "action_name": action_name
+            })
+
+        _log_to_file(f"Tool 'find_contained_elements' returning: {ui_list}")
+        return ui_list
 
 # =========================================================
 # 로그 기록 함수
@@ -92,15 +85,13 @@ def click_ui(info):
         _log_to_file(f"[ERROR] {error_message}")
         return error_message
 
-    cmd = f"adb shell input tap {x} {y}"
-
     try:
-        result = subprocess.run(cmd, shell=True, check=True, capture_output=True, text=True)
+        get_adb_client().tap(x, y)
         success_message = f"Tapping {name} at ({x}, {y})."
         _log_to_file(success_message)
         return success_message
-    except subprocess.CalledProcessError as e:
-        error_details = e.stderr.strip()
+    except (AdbError, OSError) as e:
+        error_details = str(e).strip()
         error_message = f"Failed to tap {name} at ({x}, {y}). ADB Error: {error_details}"
         print(f"[Error] {error_message}")
         _log_to_file(f"[ERROR] {error_message}")
@@ -127,7 +118,7 @@ async def screen_description(screen: str) -> str: # 반환 타입을 str로 명
              Returns "No specific description found for this screen." if no description is present
              or "An error occurred while fetching the screen description." if an error occurs during the query.
     """
-    driver = AsyncGraphDatabase.driver(uri, auth=(user, password))
+    driver = get_async_driver()
     query = """
     MATCH (s:Screen {name: $screen_name})
     WHERE s.description IS NOT NULL
@@ -145,8 +136,6 @@ async def screen_description(screen: str) -> str: # 반환 타입을 str로 명
     except Exception as e:
         print(f"Error querying screen description from Neo4j: {e}")
         return "An error occurred while fetching the screen description."
-    finally:
-        await driver.close()
 
 # =========================================================
 # FastMCP Prompt 정의: action_data_checker
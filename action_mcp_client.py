@@ -3,7 +3,7 @@ from mcp.client.stdio import stdio_client
 from langchain_mcp_adapters.tools import load_mcp_tools
 from langchain_mcp_adapters.prompts import load_mcp_prompt
 from langgraph.prebuilt import create_react_agent
-from langchain_openai import ChatOpenAI
+from module.llm_gateway import get_chat_model
 import json
 import re
 from dotenv import load_dotenv
@@ -14,8 +14,8 @@ import asyncio
 load_dotenv()
 openAPI = os.getenv("OPENAI_API_KEY")
 
-# LLM 모델 초기화
-model = ChatOpenAI(model="gpt-4o")
+# LLM 모델 (LLM gateway의 공유 연결 풀 사용)
+model = get_chat_model("gpt-4o")
 
 # MCP 서버 실행 파라미터 정의
 server_params = StdioServerParameters(
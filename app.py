@@ -1,7 +1,13 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response
 from module.neo4j_handler import *
+from module.graph_engine import bump_graph_version, read_graph_version
+from module.alias_index import AliasVectorIndex
+import csv
+import io
 import json
 import os
+import threading
+import time
 
 # Flask 앱 생성
 app = Flask(__name__)
@@ -17,49 +23,124 @@ n4 = Neo4jHandler(
 json_file = "resource/ui_alias.json"
 data = {}
 
+class NodeCatalog:
+    """
+    서버 측 노드 목록 캐시 (/get_nodes)
+    - 한 번의 쿼리로 Tap/Hold/Screen/UIElement 이름 목록을 채움
+    - 생성/삭제 라우트에서 제자리 갱신하고, 변경될 때마다 version 증가
+    - ETag로 version을 내려주어 변경이 없으면 브라우저가 304로 기존 응답 재사용
+    - 다른 프로세스가 그래프를 수정한 경우(graph_version 변경) 다음 조회 때 다시 로드
+    - 조회에 실패하면 이전 목록(없으면 빈 목록, ETag 없음)을 그대로 두고 다음 조회 때 다시 시도
+    """
+    KEYS = {"Tap": "tap", "Hold": "hold", "Screen": "screen", "UIElement": "uielement"}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = None
+        self._graph_version = None
+        self._token = f"{time.time_ns():x}"
+        self.version = 0
+
+    # Neo4j에서 전체 목록을 한 번의 쿼리로 로드 (실패하면 기존 상태 유지)
+    def _load(self):
+        result, error = n4.run_template("node_catalog")
+        if error:
+            print(f"[WARN] Failed to load the node catalog: {error}")
+            return
+        names = {label: {} for label in self.KEYS}
+        for label, name in result:
+            if label in names:
+                names[label][name] = None
+        self._names = names
+        self._graph_version = read_graph_version()
+        self.version += 1
+
+    def _ensure_loaded(self):
+        if self._names is None or self._graph_version != read_graph_version():
+            self._load()
+
+    # 현재 목록의 ETag (한 번도 로드하지 못했으면 None)
+    @property
+    def etag(self):
+        with self._lock:
+            self._ensure_loaded()
+            if self._names is None:
+                return None
+            return f"{self._token}-{self.version}"
+
+    # {"tap": [...], "hold": [...], "screen": [...], "uielement": [...]}
+    def snapshot(self):
+        with self._lock:
+            self._ensure_loaded()
+            names = self._names or {}
+            return {key: list(names.get(label, {})) for label, key in self.KEYS.items()}
+
+    # 노드 추가 반영 (그래프 버전 갱신 후 호출)
+    def add(self, label, name):
+        with self._lock:
+            if self._names is not None and label in self._names and name not in self._names[label]:
+                self._names[label][name] = None
+                self.version += 1
+            self._graph_version = read_graph_version()
+
+    # 노드 삭제 반영 (그래프 버전 갱신 후 호출)
+    def remove(self, label, name):
+        with self._lock:
+            if self._names is not None and name in self._names.get(label, {}):
+                del self._names[label][name]
+                self.version += 1
+            self._graph_version = read_graph_version()
+
+    # 다음 조회 때 다시 로드
+    def invalidate(self):
+        with self._lock:
+            self._names = None
+
+catalog = NodeCatalog()
+
 # 노드 존재 여부 확인
 def check_if_exist(node, name):
-    checking_cypher = f"""
-    MATCH (n:{node} {{name: "{name}"}})
-    RETURN n
-    """
-    n4.setCypher(checking_cypher)
-    result, error = n4.execute_cypher()
+    result, error = n4.run_template("node_exists", {"name": name}, label=node)
     return result is not None and len(result) > 0
 
 # Neo4j 노드 생성 / 업데이트
 def update_neo4j(node, name, properties=None):
-    props = [f'name: "{name}"']
+    props = {"name": name}
     if properties:
-        for key, value in properties.items():
-            if isinstance(value, str):
-                props.append(f'{key}: "{value}"')
-            else:
-                props.append(f'{key}: {value}')
-    props_string = ", ".join(props)
-    updating_cypher = f"""CREATE (n:{node} {{{props_string}}})"""
-    n4.setCypher(updating_cypher)
-    result, error = n4.execute_cypher()
+        props.update(properties)
+    result, error = n4.run_template("create_node", {"props": props}, label=node)
+    if not error:
+        bump_graph_version()
+        catalog.add(node, name)
     return not error
 
-# Neo4j에서 Tap, Hold, Screen, UIElement 목록 가져오기
+# Tap, Hold, Screen, UIElement 목록 가져오기 (노드 카탈로그 캐시 사용)
 def get_list():
-    cyphers = {
-        "tap": "MATCH (n:Tap) RETURN n.name",
-        "hold": "MATCH (n:Hold) RETURN n.name",
-        "screen": "MATCH (n:Screen) RETURN n.name",
-        "uielement": "MATCH (n:UIElement) RETURN n.name"
-    }
-    lists = {}
-    for key, cypher in cyphers.items():
-        n4.setCypher(cypher)
-        result, error = n4.execute_cypher()
-        if error:
-            lists[key] = []
-        else:
-            lists[key] = [item[0] for item in result]
+    lists = catalog.snapshot()
     return lists["tap"], lists["hold"], lists["screen"], lists["uielement"]
 
+alias_index = None
+alias_index_lock = threading.Lock()
+
+# alias 벡터 인덱스 부분 갱신 (임베딩 호출이 편집 응답을 막지 않도록 백그라운드 실행)
+# - added: {canonical: {"type": ..., "aliases": [...]}}, removed: [canonical, ...]
+def update_alias_index(added=None, removed=None):
+    def run():
+        global alias_index
+        try:
+            with alias_index_lock:
+                if alias_index is None:
+                    alias_index = AliasVectorIndex()
+                    alias_index.load()
+                for name in removed or []:
+                    alias_index.remove(name, save=False)
+                for name, entry in (added or {}).items():
+                    alias_index.add(name, entry.get("type", "Unknown"), entry.get("aliases", []), save=False)
+                alias_index.save()
+        except Exception as e:
+            print(f"[WARN] Failed to update alias index: {e}")
+    threading.Thread(target=run, daemon=True).start()
+
 # UI alias 삭제
 def delete_ui_alias(name, type):
     global data
@@ -73,6 +154,7 @@ def delete_ui_alias(name, type):
         del data[name]
         with open(json_file, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=4)
+        update_alias_index(removed=[name])
         return True
     return False
 
@@ -81,30 +163,23 @@ def delete_node(node_name, node_type):
     if check_if_exist(node_type, node_name) == False:
         return False, f"[실패] {node_type}('{node_name}') 노드는 존재하지 않습니다."
 
-    deleting_cypher = f"""
-    MATCH (n:{node_type} {{name: "{node_name}"}})
-    DETACH DELETE n
-    """
-
-    n4.setCypher(deleting_cypher)
-    result, error = n4.execute_cypher()
+    result, error = n4.run_template("delete_node", {"name": node_name}, label=node_type)
 
     if error:
         return False, f"[에러 발생] {error}"
 
+    bump_graph_version()
+    catalog.remove(node_type, node_name)
     message = f"노드 '{node_name}' 및 연결된 모든 관계가 성공적으로 삭제되었습니다."
     return True, message
 
 # Neo4j 관계 삭제
 def delete_relationship(reltype, n1name, n1type, n2name, n2type):
-    deleting_relationship_cypher = f"""
-    MATCH (a:{n1type} {{name: "{n1name}"}})-[r:{reltype}]->(b:{n2type} {{name: "{n2name}"}})
-    DELETE r
-    RETURN COUNT(r)
-    """
-
-    n4.setCypher(deleting_relationship_cypher)
-    result, error = n4.execute_cypher()
+    result, error = n4.run_template(
+        "delete_relationship",
+        {"source_name": n1name, "target_name": n2name},
+        source=n1type, rel=reltype, target=n2type
+    )
 
     if error:
         return False, f"[에러 발생] {error}"
@@ -112,6 +187,7 @@ def delete_relationship(reltype, n1name, n1type, n2name, n2type):
     if result and isinstance(result, list) and len(result) > 0:
         deleted_count = result[0][0] if result[0] else 0
         if deleted_count > 0:
+            bump_graph_version()
             return True, f"[성공] 관계 '{n1name}' -[:{reltype}]-> '{n2name}'가 삭제되었습니다."
         else:
             return False, f"[실패] '{n1name}' -[:{reltype}]-> '{n2name}' 관계가 존재하지 않습니다."
@@ -120,54 +196,251 @@ def delete_relationship(reltype, n1name, n1type, n2name, n2type):
 
 # 노드 속성 조회
 def get_node_properties(node_name, node_type):
-    property_cypher = f"""
-    MATCH (n:{node_type} {{name:"{node_name}"}})
-    RETURN properties(n)
-    """
-    n4.setCypher(property_cypher)
-    res, err = n4.execute_cypher()
+    res, err = n4.run_template("node_properties", {"name": node_name}, label=node_type)
     if err or not res:
         return None
     return res[0][0]
 
 # 노드 속성 업데이트
 # - new_props: 업데이트할 속성
-# - remove_props: 제거할 속성
+# - remove_props: 제거할 속성 (SET n += $props에서 null 값은 속성 제거)
 def update_node_properties(node_name, node_type, new_props, remove_props):
-    set_clauses = []
-    remove_clauses = []
-    
+    props = {}
+
     if new_props:
-        for k, v in new_props.items():
-            if isinstance(v, (int, float, bool)):
-                set_clauses.append(f"n.{k} = {v}")
-            else:
-                set_clauses.append(f"n.{k} = {json.dumps(v, ensure_ascii=False)}")
-    
+        props.update(new_props)
+
     if remove_props:
         for prop_key in remove_props:
-            remove_clauses.append(f"n.{prop_key}")
-            
-    cypher_parts = [f'MATCH (n:{node_type} {{name: "{node_name}"}})']
-    
-    if set_clauses:
-        cypher_parts.append(f'SET {", ".join(set_clauses)}')
+            props[prop_key] = None
 
-    if remove_clauses:
-        cypher_parts.append(f'REMOVE {", ".join(remove_clauses)}')
-    
-    if not set_clauses and not remove_clauses:
+    if not props:
         return False, "변경할 속성이 없습니다."
 
-    update_property_cypher = "\n".join(cypher_parts)
-    n4.setCypher(update_property_cypher)
-    res, err = n4.execute_cypher()
+    res, err = n4.run_template(
+        "update_node_properties",
+        {"name": node_name, "props": props},
+        label=node_type
+    )
     
     if err:
         return False, f"노드 속성 업데이트 중 오류: {err}"
     else:
+        bump_graph_version()
+        if "name" in props:
+            catalog.invalidate() # 이름이 바뀐 경우 목록 다시 로드
         return True, f"노드 '{node_name}'의 속성이 성공적으로 업데이트되었습니다."
 
+# 노드 타입 조합으로 관계 타입 결정 (유효하지 않으면 None)
+def get_relation_type(source_type, target_type):
+    for source, rel, target in RELATIONSHIP_RULES:
+        if source == source_type and target == target_type:
+            return rel
+    return None
+
+# =========================================================
+# 일괄 가져오기 / 내보내기
+# JSON 형식:
+# {
+#   "nodes": [{"type": "UIElement", "name": "...", "properties": {"x": 1, "y": 2}, "aliases": ["..."]}],
+#   "relationships": [{"source_type": "Screen", "source_name": "...", "target_type": "UIElement", "target_name": "..."}],
+#   "aliases": {"<canonical>": {"type": "...", "aliases": ["..."]}}   (선택, ui_alias.json 형식)
+# }
+# CSV 형식 (헤더 포함, 한 행에 노드 또는 관계 하나):
+#   record,type,name,x,y,properties,aliases,target_type,target_name
+#   - record: node | relationship
+#   - 관계 행은 type/name이 시작 노드, target_type/target_name이 대상 노드
+#   - properties는 JSON 문자열, aliases는 '|'로 구분
+# =========================================================
+BULK_CSV_FIELDS = ["record", "type", "name", "x", "y", "properties", "aliases", "target_type", "target_name"]
+
+# CSV 텍스트를 일괄 가져오기 JSON 형식으로 변환
+def parse_bulk_csv(text):
+    payload = {"nodes": [], "relationships": []}
+    for row in csv.DictReader(io.StringIO(text)):
+        record = (row.get("record") or "").strip().lower()
+        if record == "node":
+            properties = json.loads(row.get("properties") or "{}")
+            for coord in ("x", "y"):
+                if (row.get(coord) or "").strip():
+                    properties[coord] = int(row[coord])
+            payload["nodes"].append({
+                "type": row["type"].strip(),
+                "name": row["name"].strip(),
+                "properties": properties,
+                "aliases": [a.strip() for a in (row.get("aliases") or "").split("|") if a.strip()],
+            })
+        elif record == "relationship":
+            payload["relationships"].append({
+                "source_type": row["type"].strip(),
+                "source_name": row["name"].strip(),
+                "target_type": row["target_type"].strip(),
+                "target_name": row["target_name"].strip(),
+            })
+        elif record:
+            raise ValueError(f"알 수 없는 record 값: {record}")
+    return payload
+
+# 일괄 가져오기 데이터 형식 검사 (반환: 오류 메시지, 올바르면 None)
+def validate_bulk_payload(payload):
+    if not isinstance(payload, dict):
+        return "최상위 값은 객체(JSON object)여야 합니다."
+    for key in ("nodes", "relationships"):
+        items = payload.get(key, [])
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return f"'{key}'는 객체 목록이어야 합니다."
+    for node in payload.get("nodes", []):
+        if not isinstance(node.get("properties") or {}, dict):
+            return f"노드 properties는 객체여야 합니다: {node}"
+        if not isinstance(node.get("aliases") or [], list):
+            return f"노드 aliases는 목록이어야 합니다: {node}"
+    if not isinstance(payload.get("aliases") or {}, dict):
+        return "'aliases'는 객체여야 합니다."
+    return None
+
+# 노드/관계/alias를 하나의 트랜잭션으로 일괄 적용 (UNWIND + MERGE)
+def bulk_import(payload):
+    nodes = payload.get("nodes", [])
+    relationships = payload.get("relationships", [])
+    errors = []
+
+    # 노드 검증 및 label별 그룹화
+    node_rows = {}
+    batch_names = set()
+    for node in nodes:
+        node_type, name = node.get("type"), node.get("name")
+        properties = dict(node.get("properties") or {})
+        properties.pop("name", None)
+        if node_type not in NODE_LABELS or not name:
+            errors.append(f"잘못된 노드: {node}")
+            continue
+        if node_type == "UIElement" and not all(isinstance(properties.get(c), int) for c in ("x", "y")):
+            errors.append(f"UIElement '{name}'에 정수 x, y 좌표가 필요합니다.")
+            continue
+        node_rows.setdefault(node_type, []).append({"name": name, "props": properties})
+        batch_names.add((node_type, name))
+
+    # 관계 검증 및 (source, rel, target)별 그룹화, Tap/Hold 대상 노드는 자동 생성
+    relationship_rows = {}
+    for rel in relationships:
+        source_type, target_type = rel.get("source_type"), rel.get("target_type")
+        relation_type = get_relation_type(source_type, target_type)
+        if not rel.get("source_name") or not rel.get("target_name"):
+            errors.append(f"잘못된 관계: {rel}")
+            continue
+        if relation_type is None:
+            errors.append(f"'{source_type}'와(과) '{target_type}' 사이에는 유효한 관계 타입이 없습니다.")
+            continue
+        if target_type in ["Tap", "Hold"] and (target_type, rel["target_name"]) not in batch_names:
+            node_rows.setdefault(target_type, []).append({"name": rel["target_name"], "props": {}})
+            batch_names.add((target_type, rel["target_name"]))
+        relationship_rows.setdefault((source_type, relation_type, target_type), []).append({
+            "source_name": rel["source_name"],
+            "target_name": rel["target_name"],
+        })
+
+    # 배치에 없는 관계 끝점은 DB에 존재해야 함 (label별 한 번씩 조회)
+    missing_lookup = {}
+    for (source_type, _, target_type), rows in relationship_rows.items():
+        for row in rows:
+            for node_type, name in ((source_type, row["source_name"]), (target_type, row["target_name"])):
+                if (node_type, name) not in batch_names:
+                    missing_lookup.setdefault(node_type, set()).add(name)
+    for node_type, names in missing_lookup.items():
+        result, error = n4.run_template("existing_names", {"names": list(names)}, label=node_type)
+        if error:
+            return False, f"[에러 발생] {error}"
+        for name in names - {item[0] for item in result}:
+            errors.append(f"노드 '{name}' ({node_type})가 존재하지 않습니다.")
+
+    if errors:
+        return False, "[실패] " + " / ".join(errors)
+
+    statements = [
+        ("bulk_merge_nodes", {"rows": rows}, {"label": label})
+        for label, rows in node_rows.items()
+    ] + [
+        ("bulk_merge_relationships", {"rows": rows}, {"source": s, "rel": r, "target": t})
+        for (s, r, t), rows in relationship_rows.items()
+    ]
+    totals, error = n4.run_transaction(statements)
+    if error:
+        return False, f"[에러 발생] {error}"
+    bump_graph_version()
+    for label, rows in node_rows.items():
+        for row in rows:
+            catalog.add(label, row["name"])
+
+    # alias 파일은 마지막에 한 번만 갱신
+    aliases = dict(payload.get("aliases") or {})
+    for node in nodes:
+        if node.get("aliases"):
+            aliases[node["name"]] = {"type": node["type"], "aliases": node["aliases"]}
+    if aliases:
+        global data
+        if os.path.exists(json_file):
+            with open(json_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        data.update(aliases)
+        with open(json_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        update_alias_index(added=aliases)
+
+    return True, (
+        f"노드 {totals.get('nodes_created', 0)}개, 관계 {totals.get('relationships_created', 0)}개 생성, "
+        f"속성 {totals.get('properties_set', 0)}개 설정, alias {len(aliases)}개 갱신"
+    )
+
+# 전체 노드/관계/alias 내보내기
+def bulk_export():
+    node_records, error = n4.run_template("export_nodes")
+    if error:
+        return None, error
+    rel_records, error = n4.run_template("export_relationships")
+    if error:
+        return None, error
+
+    aliases = {}
+    if os.path.exists(json_file):
+        with open(json_file, "r", encoding="utf-8") as f:
+            aliases = json.load(f)
+
+    nodes = []
+    for node_type, props in node_records:
+        props = dict(props)
+        name = props.pop("name", None)
+        nodes.append({
+            "type": node_type,
+            "name": name,
+            "properties": props,
+            "aliases": aliases.get(name, {}).get("aliases", []),
+        })
+    relationships = [
+        {"source_type": st, "source_name": sn, "type": rt, "target_type": tt, "target_name": tn}
+        for st, sn, rt, tt, tn in rel_records
+    ]
+    return {"nodes": nodes, "relationships": relationships, "aliases": aliases}, None
+
+# 내보내기 결과를 CSV 텍스트로 변환
+def export_to_csv(payload):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=BULK_CSV_FIELDS)
+    writer.writeheader()
+    for node in payload["nodes"]:
+        properties = dict(node["properties"])
+        x, y = properties.pop("x", ""), properties.pop("y", "")
+        writer.writerow({
+            "record": "node", "type": node["type"], "name": node["name"], "x": x, "y": y,
+            "properties": json.dumps(properties, ensure_ascii=False) if properties else "",
+            "aliases": "|".join(node["aliases"]),
+        })
+    for rel in payload["relationships"]:
+        writer.writerow({
+            "record": "relationship", "type": rel["source_type"], "name": rel["source_name"],
+            "target_type": rel["target_type"], "target_name": rel["target_name"],
+        })
+    return buffer.getvalue()
+
 # =========================================================
 # Flask 라우트 정의
 # =========================================================
@@ -211,6 +484,7 @@ def create_node_web():
         data[node_name] = {"type": node_type, "aliases": [alias.strip() for alias in aliases if alias.strip()]}
         with open(json_file, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
+        update_alias_index(added={node_name: data[node_name]})
             
         return jsonify({"success": True, "message": f"'{node_name}' ({node_type}) 노드가 성공적으로 생성되었습니다."})
     else:
@@ -235,26 +509,20 @@ def create_relation_web():
         return jsonify({"success": False, "message": f"오류: 대상 노드 '{target_name}' ({target_type})가 존재하지 않습니다."})
 
     # 관계 타입 자동 결정
-    relation_type = None
-    if source_type == "Screen" and target_type == "UIElement":
-        relation_type = "CONTAINS"
-    elif source_type == "UIElement" and (target_type == "UIElement" or target_type in ["Tap", "Hold"]):
-        relation_type = "TRIGGERS"
-    elif source_type in ["Tap", "Hold"] and target_type == "Screen":
-        relation_type = "LEADS_TO"
-    else:
+    relation_type = get_relation_type(source_type, target_type)
+    if relation_type is None:
         return jsonify({"success": False, "message": f"오류: '{source_type}'와(과) '{target_type}' 사이에는 유효한 관계 타입이 없습니다."})
 
-    creating_relation_cypher = f"""
-    MATCH (s:{source_type} {{name: "{source_name}"}}), (t:{target_type} {{name: "{target_name}"}})
-    CREATE (s)-[:{relation_type}]->(t)
-    """
-    n4.setCypher(creating_relation_cypher)
-    result, error = n4.execute_cypher()
+    result, error = n4.run_template(
+        "create_relationship",
+        {"source_name": source_name, "target_name": target_name},
+        source=source_type, rel=relation_type, target=target_type
+    )
 
     if error:
         return jsonify({"success": False, "message": f"Neo4j 관계 생성 중 오류: {error}"})
     else:
+        bump_graph_version()
         return jsonify({"success": True, "message": f"'{source_name}' -[:{relation_type}]-> '{target_name}' 관계가 정상적으로 생성됨"})
 
 # 노드 삭제
@@ -284,15 +552,65 @@ def delete_relationship_web():
     return jsonify({"success": success, "message": message})
 
 # 노드 목록 조회
+# - ETag가 같으면 본문 없이 304 반환
 @app.route('/get_nodes', methods=['GET'])
 def get_nodes_api():
-    tap_list, hold_list, screen_list, uielement_list = get_list()
-    return jsonify({
-        "tap": tap_list,
-        "hold": hold_list,
-        "screen": screen_list,
-        "uielement": uielement_list
-    })
+    etag = catalog.etag
+    if etag is not None and request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        tap_list, hold_list, screen_list, uielement_list = get_list()
+        response = jsonify({
+            "tap": tap_list,
+            "hold": hold_list,
+            "screen": screen_list,
+            "uielement": uielement_list
+        })
+    if etag is not None:
+        response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+# 일괄 가져오기
+# - JSON 본문, 또는 'file' 필드로 업로드한 .json/.csv 파일
+@app.route('/bulk_import', methods=['POST'])
+def bulk_import_web():
+    try:
+        if 'file' in request.files:
+            upload = request.files['file']
+            text = upload.read().decode('utf-8-sig')
+            if upload.filename.lower().endswith('.csv'):
+                payload = parse_bulk_csv(text)
+            else:
+                payload = json.loads(text)
+        elif request.mimetype == 'text/csv':
+            payload = parse_bulk_csv(request.get_data(as_text=True))
+        else:
+            payload = request.get_json(force=True)
+    except (ValueError, KeyError, TypeError) as e:
+        return jsonify({"success": False, "message": f"가져오기 데이터를 읽을 수 없습니다: {e}"}), 400
+
+    invalid = validate_bulk_payload(payload)
+    if invalid:
+        return jsonify({"success": False, "message": f"가져오기 데이터 형식이 잘못되었습니다: {invalid}"}), 400
+
+    success, message = bulk_import(payload)
+    return jsonify({"success": success, "message": message})
+
+# 일괄 내보내기 (?format=json | csv)
+@app.route('/bulk_export', methods=['GET'])
+def bulk_export_web():
+    payload, error = bulk_export()
+    if error:
+        return jsonify({"success": False, "message": f"[에러 발생] {error}"})
+
+    if request.args.get('format', 'json').lower() == 'csv':
+        return Response(
+            export_to_csv(payload),
+            mimetype='text/csv',
+            headers={"Content-Disposition": "attachment; filename=graph_export.csv"}
+        )
+    return jsonify(payload)
 
 # 노드 속성 조회
 @app.route('/get_node_properties', methods=['POST'])
@@ -329,4 +647,6 @@ if __name__ == '__main__':
     if os.path.exists(json_file):
         with open(json_file, "r", encoding="utf-8") as f:
             data = json.load(f)
+    n4.ensure_schema() # name 인덱스/제약 확인
+    n4.warm_up() # 템플릿 쿼리 플랜 미리 컴파일
     app.run(debug=True)
\ No newline at end of file
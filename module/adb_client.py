@@ -0,0 +1,391 @@
+from dotenv import load_dotenv
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+"""
+AdbClient 모듈
+- adb 프로세스를 매번 실행하지 않고 로컬 adb 서버(기본 127.0.0.1:5037)와 직접 소켓 통신
+- 디바이스(serial)마다 하나의 shell: 스트림을 열어 두고 탭/스와이프 등 짧은 명령을 연속으로 전송
+  (명령 끝에 완료 마커를 출력하게 하여 명령 단위로 결과와 종료 코드를 구분)
+- 바이너리 출력이 필요한 명령(screencap 등)은 exec: 스트림으로 실행 (PTY 변환 없음)
+  exec: 스트림은 명령이 끝나면 닫히므로 호출마다 새로 열지만, 로컬 소켓 연결이라 프로세스 실행보다 훨씬 빠름
+- adb 서버에 연결할 수 없으면 subprocess로 adb CLI를 실행 (shell=True 없이)
+- verify_mcp(MCP stdio 서버)에서도 사용하므로 경고는 stdout이 아닌 stderr로 출력
+
+환경 변수:
+- ANDROID_SERIAL: 대상 디바이스 serial (없으면 연결된 아무 디바이스)
+- ADB_SERVER_HOST / ADB_SERVER_PORT: adb 서버 주소 (기본 127.0.0.1 / 5037)
+
+벤치마크 (현재 subprocess.run 방식과 탭 지연 시간 비교):
+    python -m module.adb_client --count 20
+"""
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+ADB_HOST = os.getenv("ADB_SERVER_HOST", "127.0.0.1")
+ADB_PORT = int(os.getenv("ADB_SERVER_PORT", "5037"))
+CONNECT_TIMEOUT = 2.0
+COMMAND_TIMEOUT = 30.0
+
+
+class AdbError(Exception):
+    pass
+
+
+# 명령을 보내기 전에 shell 스트림이 이미 끊어져 있음 (명령이 실행되지 않았으므로 다시 연결하여 재시도 가능)
+class StaleSessionError(AdbError):
+    pass
+
+
+# 길이(4자리 hex) + 요청 문자열
+def _encode_request(payload: str) -> bytes:
+    data = payload.encode("utf-8")
+    return f"{len(data):04x}".encode("ascii") + data
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise AdbError("adb server closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+# OKAY / FAIL 응답 확인
+def _read_status(sock):
+    status = _recv_exact(sock, 4)
+    if status == b"OKAY":
+        return
+    if status == b"FAIL":
+        length = int(_recv_exact(sock, 4), 16)
+        raise AdbError(_recv_exact(sock, length).decode("utf-8", "replace"))
+    raise AdbError(f"unexpected adb response: {status!r}")
+
+
+class ShellSession:
+    """
+    디바이스 하나에 대한 지속 shell: 스트림
+    - run()은 명령 뒤에 완료 마커를 출력하게 하여 출력과 종료 코드를 구분
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = b""
+        self.counter = 0
+        self.lock = threading.Lock()
+        # 입력 echo와 프롬프트가 출력에 섞이지 않도록 설정
+        self.run("stty -echo 2>/dev/null; PS1=''; PS2=''")
+
+    # 스트림이 아직 열려 있는지 확인 (데이터를 읽지 않고 peek)
+    def alive(self):
+        try:
+            self.sock.settimeout(0)
+            return self.sock.recv(1, socket.MSG_PEEK) != b""
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        finally:
+            self.sock.settimeout(None)
+
+    def run(self, command, timeout=COMMAND_TIMEOUT):
+        with self.lock:
+            if not self.alive():
+                raise StaleSessionError("adb shell stream closed")
+            self.counter += 1
+            marker = f"__ADB_DONE_{self.counter}__"
+            # echo된 명령 줄에는 '$?'가 그대로 남으므로 숫자가 붙은 줄만 완료로 판단
+            pattern = re.compile(re.escape(marker).encode() + rb"(\d+)")
+            self.sock.sendall(f"{command}; echo {marker}$?\n".encode("utf-8"))
+
+            deadline = time.monotonic() + timeout
+            while True:
+                match = pattern.search(self.buffer)
+                if match:
+                    output = self.buffer[:match.start()]
+                    self.buffer = self.buffer[match.end():].lstrip(b"\r\n")
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"adb shell command timed out: {command}")
+                self.sock.settimeout(remaining)
+                chunk = self.sock.recv(65536)
+                if not chunk:
+                    raise AdbError("adb shell stream closed")
+                self.buffer += chunk
+
+        lines = [
+            line for line in output.decode("utf-8", "replace").replace("\r", "").split("\n")
+            if marker not in line
+        ]
+        return "\n".join(lines).strip(), int(match.group(1))
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class ExecWriter:
+    """
+    쓰기용 exec: 스트림 (소켓 또는 adb exec-out 프로세스의 stdin)
+    - write()는 받은 바이트를 한 번에 전송 (호출 간 간격은 호출하는 쪽에서 조절)
+    """
+
+    def __init__(self, sock=None, process=None):
+        self.sock = sock
+        self.process = process
+
+    def write(self, data):
+        if self.sock is not None:
+            self.sock.sendall(data)
+        else:
+            self.process.stdin.write(data)
+            self.process.stdin.flush()
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        else:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=COMMAND_TIMEOUT)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AdbClient:
+    """
+    AdbClient 클래스
+    - serial: 대상 디바이스 serial (None이면 연결된 아무 디바이스)
+    - host / port: adb 서버 주소
+    """
+
+    def __init__(self, serial=None, host=ADB_HOST, port=ADB_PORT):
+        self.serial = serial
+        self.host = host
+        self.port = port
+        self._session = None
+        self._lock = threading.Lock()
+        self.use_subprocess = False # adb 서버에 연결할 수 없을 때 CLI로 대체
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=CONNECT_TIMEOUT)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    # 서버 요청 하나를 보내고 응답 상태 확인
+    def _request(self, sock, payload):
+        sock.sendall(_encode_request(payload))
+        _read_status(sock)
+
+    # 디바이스를 선택한 뒤 서비스(shell:, exec: 등) 스트림 열기
+    def _open(self, service):
+        sock = self._connect()
+        try:
+            self._request(sock, f"host:transport:{self.serial}" if self.serial else "host:transport-any")
+            self._request(sock, service)
+        except Exception:
+            sock.close()
+            raise
+        sock.settimeout(None)
+        return sock
+
+    # 연결된 디바이스 serial 목록
+    def devices(self):
+        sock = self._connect()
+        try:
+            self._request(sock, "host:devices")
+            length = int(_recv_exact(sock, 4), 16)
+            data = _recv_exact(sock, length).decode("utf-8")
+        finally:
+            sock.close()
+        return [line.split("\t")[0] for line in data.splitlines() if line.endswith("\tdevice")]
+
+    # 지속 shell 세션 (없으면 새로 연결)
+    def _get_session(self):
+        with self._lock:
+            if self._session is None:
+                self._session = ShellSession(self._open("shell:"))
+            return self._session
+
+    def _serial_args(self):
+        return ["-s", self.serial] if self.serial else []
+
+    # 지속 shell 스트림으로 명령 실행 (반환: 출력 문자열)
+    # - 명령을 보내기 전의 연결 / 스트림 준비 실패만 한 번 다시 연결하여 재시도
+    # - 명령을 보낸 뒤의 실패(타임아웃 등)는 재시도하지 않음 (탭 / 스와이프가 두 번 실행될 수 있음)
+    def shell(self, command, timeout=COMMAND_TIMEOUT):
+        if not self.use_subprocess:
+            for attempt in range(2):
+                try:
+                    session = self._get_session()
+                except ConnectionRefusedError:
+                    print("[WARN] adb server is not reachable, falling back to adb CLI.", file=sys.stderr)
+                    self.use_subprocess = True
+                    break
+                except (OSError, AdbError) as e:
+                    self._reset_session()
+                    if attempt == 1:
+                        raise AdbError(f"adb shell '{command}' failed: {e}") from e
+                    continue
+
+                try:
+                    output, exit_code = session.run(command, timeout)
+                except StaleSessionError as e:
+                    self._reset_session()
+                    if attempt == 1:
+                        raise AdbError(f"adb shell '{command}' failed: {e}") from e
+                    continue
+                except (OSError, AdbError) as e:
+                    self._reset_session()
+                    raise AdbError(f"adb shell '{command}' failed: {e}") from e
+                if exit_code != 0:
+                    print(f"[WARN] adb shell '{command}' exited with {exit_code}: {output}", file=sys.stderr)
+                return output
+
+        result = subprocess.run(
+            ["adb", *self._serial_args(), "shell", command],
+            capture_output=True, text=True, timeout=timeout
+        )
+        return result.stdout.strip()
+
+    # exec: 스트림으로 명령 실행 후 바이너리 출력 전체 반환 (PTY 변환 없음)
+    def exec_out(self, command, timeout=COMMAND_TIMEOUT):
+        if not self.use_subprocess:
+            try:
+                sock = self._open(f"exec:{command}")
+            except ConnectionRefusedError:
+                print("[WARN] adb server is not reachable, falling back to adb CLI.", file=sys.stderr)
+                self.use_subprocess = True
+            except (OSError, AdbError) as e:
+                # 스트림을 여는 중의 실패는 명령 실행 전이므로 이번 호출만 adb CLI로 실행
+                print(f"[WARN] adb exec:{command} failed to open ({e}), using adb CLI.", file=sys.stderr)
+            else:
+                try:
+                    sock.settimeout(timeout)
+                    chunks = []
+                    while True:
+                        chunk = sock.recv(1 << 20)
+                        if not chunk:
+                            break
+                        chunks.append(chunk)
+                    return b"".join(chunks)
+                finally:
+                    sock.close()
+
+        result = subprocess.run(
+            ["adb", *self._serial_args(), "exec-out", command],
+            capture_output=True, timeout=timeout
+        )
+        return result.stdout
+
+    # exec: 스트림을 쓰기용으로 열기 (명령의 stdin으로 바이트를 바로 전달, PTY 변환 없음)
+    # - 반환: ExecWriter (write() / close(), with 문 사용 가능)
+    def open_writer(self, command):
+        if not self.use_subprocess:
+            try:
+                return ExecWriter(sock=self._open(f"exec:{command}"))
+            except ConnectionRefusedError:
+                print("[WARN] adb server is not reachable, falling back to adb CLI.", file=sys.stderr)
+                self.use_subprocess = True
+            except (OSError, AdbError) as e:
+                print(f"[WARN] adb exec:{command} failed to open ({e}), using adb CLI.", file=sys.stderr)
+        process = subprocess.Popen(
+            ["adb", *self._serial_args(), "exec-out", command],
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        return ExecWriter(process=process)
+
+    def tap(self, x, y):
+        return self.shell(f"input tap {int(x)} {int(y)}")
+
+    def swipe(self, x1, y1, x2, y2, duration_ms=300):
+        return self.shell(f"input swipe {int(x1)} {int(y1)} {int(x2)} {int(y2)} {int(duration_ms)}",
+                          timeout=COMMAND_TIMEOUT + duration_ms / 1000)
+
+    # 같은 좌표로 swipe하여 길게 누르기
+    def hold(self, x, y, duration_ms=10000):
+        return self.swipe(x, y, x, y, duration_ms)
+
+    # PNG 스크린샷 바이트
+    def screencap_png(self):
+        return self.exec_out("screencap -p")
+
+    def _reset_session(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def close(self):
+        self._reset_session()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+# 디바이스별 공유 AdbClient 반환
+def get_adb_client(serial=None) -> AdbClient:
+    serial = serial or os.getenv("ANDROID_SERIAL") or None
+    with _clients_lock:
+        if serial not in _clients:
+            _clients[serial] = AdbClient(serial)
+        return _clients[serial]
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"mean {statistics.mean(samples):.1f} ms, p50 {statistics.median(samples):.1f} ms, p95 {p95:.1f} ms"
+
+
+# 탭 지연 시간 벤치마크: subprocess.run("adb shell ...") vs 지속 shell 스트림
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="adb tap latency benchmark")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--command", default="input tap 810 50", help="명령 (기본: 화면 상단 중앙 탭)")
+    parser.add_argument("--serial", default=None)
+    args = parser.parse_args()
+
+    client = get_adb_client(args.serial)
+    serial = f"-s {client.serial} " if client.serial else ""
+
+    legacy = []
+    for _ in range(args.count):
+        start = time.perf_counter()
+        subprocess.run(f"adb {serial}shell {args.command}", shell=True)
+        legacy.append((time.perf_counter() - start) * 1000)
+
+    client.shell("true") # 스트림 연결은 측정에서 제외
+    socket_samples = []
+    for _ in range(args.count):
+        start = time.perf_counter()
+        client.shell(args.command)
+        socket_samples.append((time.perf_counter() - start) * 1000)
+
+    print(f"subprocess.run : {_summary(legacy)}")
+    print(f"AdbClient.shell: {_summary(socket_samples)}")
+    client.close()
@@ -0,0 +1,148 @@
+from langchain_openai import OpenAIEmbeddings
+from langchain_community.vectorstores import FAISS
+from dotenv import load_dotenv
+from pathlib import Path
+import threading
+
+"""
+AliasVectorIndex 모듈
+- ui_alias.json의 alias 문자열과 canonical 이름("canonical (type)")을 문서 하나씩 임베딩한 FAISS 인덱스
+- conty_faiss_index와 같은 위치의 alias_faiss_index 디렉터리에 저장
+- 문서 id는 "canonical::번호" 형식이라 노드 하나의 문서만 추가/삭제 가능
+  (app.py에서 노드 생성/삭제 시 전체를 다시 임베딩하지 않음)
+- LLMCanonicalMapper는 candidates()로 step과 가까운 canonical 이름 top-k만 프롬프트에 사용
+"""
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+ALIAS_INDEX_PATH = Path(__file__).resolve().parent.parent / "alias_faiss_index"
+ID_SEPARATOR = "::"
+
+
+class AliasVectorIndex:
+    """
+    AliasVectorIndex 클래스
+    - path: FAISS 인덱스 저장 디렉터리
+    - embeddings: 임베딩 객체 (기본 OpenAIEmbeddings)
+    """
+
+    def __init__(self, path=ALIAS_INDEX_PATH, embeddings=None):
+        self.path = Path(path)
+        self.embeddings = embeddings or OpenAIEmbeddings()
+        self.store = None
+        self._lock = threading.Lock()
+
+    # canonical 하나에 해당하는 문서 목록
+    @staticmethod
+    def _documents(canonical, node_type, aliases):
+        texts = [f"{canonical} ({node_type})", *aliases]
+        ids = [f"{canonical}{ID_SEPARATOR}{i}" for i in range(len(texts))]
+        metadatas = [{"canonical": canonical, "type": node_type} for _ in texts]
+        return texts, metadatas, ids
+
+    # 인덱스에 들어 있는 canonical 이름 -> 문서 텍스트 집합
+    def _texts_by_canonical(self):
+        texts = {}
+        for canonical, ids in self._ids_by_canonical().items():
+            texts[canonical] = {self.store.docstore.search(doc_id).page_content for doc_id in ids}
+        return texts
+
+    # 인덱스에 들어 있는 canonical 이름 -> 문서 id 목록
+    def _ids_by_canonical(self):
+        ids = {}
+        if self.store is None:
+            return ids
+        for doc_id in self.store.index_to_docstore_id.values():
+            ids.setdefault(doc_id.rsplit(ID_SEPARATOR, 1)[0], []).append(doc_id)
+        return ids
+
+    # 저장된 인덱스 로드 (없으면 False)
+    def load(self):
+        if not self.path.exists():
+            return False
+        with self._lock:
+            self.store = FAISS.load_local(
+                str(self.path),
+                self.embeddings,
+                allow_dangerous_deserialization=True
+            )
+        return True
+
+    def save(self):
+        if self.store is not None:
+            self.store.save_local(str(self.path))
+
+    # canonical 하나의 문서 추가 (이미 있으면 교체)
+    def add(self, canonical, node_type, aliases, save=True):
+        texts, metadatas, ids = self._documents(canonical, node_type, aliases)
+        with self._lock:
+            old_ids = self._ids_by_canonical().get(canonical)
+            if old_ids:
+                self.store.delete(old_ids)
+            if self.store is None:
+                self.store = FAISS.from_texts(texts, self.embeddings, metadatas=metadatas, ids=ids)
+            else:
+                self.store.add_texts(texts, metadatas=metadatas, ids=ids)
+            if save:
+                self.save()
+
+    # canonical 하나의 문서 삭제
+    def remove(self, canonical, save=True):
+        with self._lock:
+            old_ids = self._ids_by_canonical().get(canonical)
+            if not old_ids:
+                return False
+            self.store.delete(old_ids)
+            if save:
+                self.save()
+        return True
+
+    # alias 데이터와 인덱스를 비교하여 추가/변경/삭제된 canonical만 반영
+    # - 반환: (추가/변경 수, 삭제 수)
+    def sync(self, alias_data: dict):
+        indexed = self._texts_by_canonical()
+        added = [
+            name for name, entry in alias_data.items()
+            if indexed.get(name) != set(self._documents(
+                name, entry.get("type", "Unknown"), entry.get("aliases", []))[0])
+        ]
+        removed = [name for name in indexed if name not in alias_data]
+        for name in removed:
+            self.remove(name, save=False)
+        for name in added:
+            entry = alias_data[name]
+            self.add(name, entry.get("type", "Unknown"), entry.get("aliases", []), save=False)
+        if added or removed:
+            with self._lock:
+                self.save()
+        return len(added), len(removed)
+
+    # step 문장과 가까운 canonical 이름 top-k
+    def candidates(self, query, k=10):
+        if self.store is None:
+            return []
+        with self._lock:
+            docs = self.store.similarity_search(query, k=k * 3)
+        names = []
+        for doc in docs:
+            name = doc.metadata.get("canonical")
+            if name and name not in names:
+                names.append(name)
+            if len(names) >= k:
+                break
+        return names
+
+
+# ui_alias.json 내용과 동기화된 인덱스 반환 (임베딩 / 저장 실패 시 None)
+def load_alias_index(alias_data: dict, path=ALIAS_INDEX_PATH):
+    try:
+        index = AliasVectorIndex(path)
+        index.load()
+        added, removed = index.sync(alias_data)
+        if added or removed:
+            print(f"[INFO] Alias index synced: {added} added, {removed} removed.")
+        return index
+    except Exception as e:
+        print(f"[WARN] Alias vector index unavailable: {e}")
+        return None
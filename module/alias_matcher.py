@@ -0,0 +1,223 @@
+import re
+import unicodedata
+
+"""
+AliasMatcher 모듈
+- ui_alias.json의 alias / canonical 이름만으로 step 문장을 canonical UI 이름에 매칭
+- LLMCanonicalMapper가 LLM 호출 전에 먼저 사용하며, 결과가 명확할 때만 LLM을 생략
+  1) exact: 정규화한 step 문장이 alias와 완전히 같음 (동작 키워드가 없으므로 노드 타입의 기본 동작 사용)
+  2) contains: 정규화한 step 문장에 alias가 포함됨 (포함 관계인 alias끼리는 가장 긴 것 선택)
+  3) fuzzy: step 문장 안의 가장 가까운 부분 문자열과 alias의 편집 거리 기반 유사도가
+     임계값 이상이고 다른 canonical의 최고 유사도와 충분히 차이 남 (오타, 띄어쓰기 차이 등)
+- alias를 뺀 나머지가 동작 키워드(tap / hold)와 조사 / 어미뿐일 때만 fast-path로 처리
+  ("설정화면에서 IP 입력창 탭"처럼 다른 내용어가 남으면 화면 이름이 문맥일 뿐이므로 LLM에 맡김)
+"""
+
+# step 앞의 번호 ("1. ", "2) ")
+STEP_NUMBER_PATTERN = re.compile(r"^\s*\d+\s*[.)]\s*")
+# 정규화 시 제거할 문자 (공백, 구분 기호)
+STRIP_PATTERN = re.compile(r"[\s\-_·,'\"`~!?/:;]+")
+
+# action_type 키워드 (정규화된 문자열 기준)
+HOLD_KEYWORDS = ("길게", "누르는동안", "누르고있", "홀드", "hold", "longpress")
+TAP_KEYWORDS = ("탭", "클릭", "누르", "누른", "눌러", "선택", "터치", "tap", "click", "press")
+# 키워드가 있으면 tap / hold 외의 동작일 수 있으므로 LLM에 맡김
+OTHER_ACTION_KEYWORDS = ("핀치", "드래그", "스와이프", "입력하", "확대", "축소", "pinch", "drag", "swipe", "type")
+# alias와 동작 키워드 외에 남아도 되는 말 (조사, 동사 어미, "버튼" 같은 일반 명사)
+# - "에서", "후", "하여" 뒤의 말 등 문맥을 나타내는 말은 넣지 않음
+FILLER_WORDS = (
+    "을", "를", "이", "가", "은", "는",
+    "버튼", "아이콘", "button", "btn", "icon", "the", "on",
+    "하기", "하다", "한다", "합니다", "하세요", "해주세요", "해줘", "해",
+    "주세요", "준다", "줘", "기", "다", "요",
+)
+LEFTOVER_PATTERN = re.compile(
+    "(?:" + "|".join(
+        re.escape(word)
+        for word in sorted({*HOLD_KEYWORDS, *TAP_KEYWORDS, *FILLER_WORDS}, key=len, reverse=True)
+    ) + ")*"
+)
+
+# exact 매칭(step이 alias 그 자체)일 때 노드 타입별 기본 action_type
+DEFAULT_ACTION_TYPES = {"UIElement": "tap", "Screen": "tap"}
+
+MIN_ALIAS_LENGTH = 2 # 이보다 짧은 alias는 포함 매칭에 사용하지 않음
+MIN_FUZZY_LENGTH = 4 # 이보다 짧은 alias는 fuzzy 매칭에 사용하지 않음
+FUZZY_THRESHOLD = 0.8
+FUZZY_MARGIN = 0.1
+
+
+# 비교용 문자열 정규화 (NFKC, 소문자, 공백/기호 제거)
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return STRIP_PATTERN.sub("", text)
+
+
+# 문자 bigram 집합 (fuzzy 후보 사전 필터용)
+def _bigrams(text: str) -> set:
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+# text 안의 임의 부분 문자열과 pattern 사이의 최소 편집 거리
+def _substring_distance(pattern: str, text: str) -> int:
+    previous = [0] * (len(text) + 1)
+    for i, p in enumerate(pattern, 1):
+        current = [i] + [0] * len(text)
+        for j, t in enumerate(text, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (p != t),
+            )
+        previous = current
+    return min(previous)
+
+
+# text 안에서 pattern과 편집 거리가 가장 작은 부분 문자열의 위치 (start, end)
+def _substring_span(pattern: str, text: str):
+    # 각 칸에 (거리, 부분 문자열 시작 위치)를 함께 저장
+    previous = [(0, j) for j in range(len(text) + 1)]
+    for i, p in enumerate(pattern, 1):
+        current = [(i, 0)] + [None] * len(text)
+        for j, t in enumerate(text, 1):
+            current[j] = min(
+                (previous[j][0] + 1, previous[j][1]),
+                (current[j - 1][0] + 1, current[j - 1][1]),
+                (previous[j - 1][0] + (p != t), previous[j - 1][1]),
+            )
+        previous = current
+    end = min(range(len(text) + 1), key=lambda j: previous[j][0])
+    return previous[end][1], end
+
+
+class AliasMatcher:
+    """
+    AliasMatcher 클래스
+    - alias_data: ui_alias.json 내용 ({canonical: {"type": ..., "aliases": [...]}})
+    """
+
+    def __init__(self, alias_data: dict):
+        self.canonical_type = {}
+        self.entries = [] # (정규화된 alias, canonical)
+        self.exact = {} # 정규화된 alias -> canonical 집합
+        for canonical, entry in alias_data.items():
+            self.canonical_type[canonical] = entry.get("type", "Unknown")
+            for alias in [canonical, *entry.get("aliases", [])]:
+                key = normalize(alias)
+                if not key:
+                    continue
+                self.exact.setdefault(key, set()).add(canonical)
+                self.entries.append((key, canonical))
+        self.fuzzy_entries = [
+            (_bigrams(key), key, canonical)
+            for key, canonical in self.entries if len(key) >= MIN_FUZZY_LENGTH
+        ]
+
+        self.hits = {"exact": 0, "contains": 0, "fuzzy": 0}
+        self.misses = 0
+
+    # step 문장에서 번호를 떼고 정규화
+    def _normalize_step(self, step_text: str) -> str:
+        return normalize(STEP_NUMBER_PATTERN.sub("", step_text or ""))
+
+    # alias를 뺀 나머지 문자열로 action_type 판별 (확실하지 않으면 None)
+    # - 나머지가 동작 키워드와 조사 / 어미로만 이루어진 경우에만 판별
+    def _action_type(self, rest: str):
+        if any(keyword in rest for keyword in OTHER_ACTION_KEYWORDS):
+            return None
+        if not LEFTOVER_PATTERN.fullmatch(rest):
+            return None
+        if any(keyword in rest for keyword in HOLD_KEYWORDS):
+            return "hold"
+        if any(keyword in rest for keyword in TAP_KEYWORDS):
+            return "tap"
+        return None
+
+    # 포함 매칭: 서로 포함 관계가 아닌 다른 canonical이 함께 걸리면 모호하다고 판단
+    # - 반환: (canonical, start, end) / 포함된 alias가 없으면 None / 모호하면 False
+    def _match_contains(self, step: str):
+        found = []
+        for key, canonical in self.entries:
+            if len(key) < MIN_ALIAS_LENGTH:
+                continue
+            start = step.find(key)
+            if start >= 0:
+                found.append((start, start + len(key), key, canonical))
+        if not found:
+            return None
+
+        best = max(found, key=lambda item: item[1] - item[0])
+        for start, end, key, canonical in found:
+            if canonical == best[3]:
+                continue
+            nested = best[0] <= start and end <= best[1]
+            if not nested or end - start == best[1] - best[0]:
+                return False
+        return best[3], best[0], best[1]
+
+    # fuzzy 매칭: 가장 유사한 alias와 다른 canonical의 최고 유사도 차이가 충분할 때만 채택
+    # - 반환: (canonical, start, end) / 없으면 None
+    def _match_fuzzy(self, step: str):
+        grams = _bigrams(step)
+        scores = {}
+        for alias_grams, key, canonical in self.fuzzy_entries:
+            if len(alias_grams & grams) * 2 < len(alias_grams):
+                continue
+            score = 1 - _substring_distance(key, step) / len(key)
+            if score > scores.get(canonical, (0.0, None))[0]:
+                scores[canonical] = (score, key)
+        if not scores:
+            return None
+
+        ranked = sorted(scores.items(), key=lambda item: item[1][0], reverse=True)
+        canonical, (score, key) = ranked[0]
+        second = ranked[1][1][0] if len(ranked) > 1 else 0.0
+        if score >= FUZZY_THRESHOLD and score - second >= FUZZY_MARGIN:
+            return (canonical, *_substring_span(key, step))
+        return None
+
+    # step 문장을 canonical 이름 / action_type으로 매칭 (모호하면 None)
+    def match(self, step_text: str):
+        step = self._normalize_step(step_text)
+        if not step:
+            self.misses += 1
+            return None
+
+        kind = "exact"
+        canonicals = self.exact.get(step, set())
+        result = (next(iter(canonicals)), 0, len(step)) if len(canonicals) == 1 else None
+        if not canonicals:
+            kind = "contains"
+            result = self._match_contains(step)
+        if result is None and not canonicals:
+            kind = "fuzzy"
+            result = self._match_fuzzy(step)
+        if not result:
+            self.misses += 1
+            return None
+
+        canonical, start, end = result
+        if kind == "exact":
+            action_type = DEFAULT_ACTION_TYPES.get(self.canonical_type.get(canonical))
+        else:
+            action_type = self._action_type(step[:start] + step[end:])
+        if action_type is None:
+            self.misses += 1
+            return None
+
+        self.hits[kind] += 1
+        return {
+            "canonical_name": canonical,
+            "action_type": action_type,
+            "match": kind,
+        }
+
+    # fast-path 적중률 통계
+    def stats(self):
+        hits = sum(self.hits.values())
+        total = hits + self.misses
+        return {
+            **self.hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
@@ -1,9 +1,13 @@
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from module.llm_gateway import get_chat_model
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.output_parsers import JsonOutputParser
 from pathlib import Path
+from module.alias_matcher import AliasMatcher
+from module.alias_index import load_alias_index
+from module.graph_engine import read_graph_version, MAIN_SCREENS
+from module.mapping_cache import MappingCache
 import json
 import os
 
@@ -11,23 +15,31 @@ import os
 이 모듈은 사용자로부터 전달된 step 정보를 바탕으로,
 매뉴얼과 UI alias, 그래프 구조를 참고하여 해당 step에
 해당하는 클릭할 UI element 정보를 반환하는 기능을 제공합니다.
+
+- alias JSON / 그래프 구조 파일은 파싱된 인덱스로 메모리에 유지하고
+  파일 mtime이 바뀐 경우에만 다시 읽음
+- alias 문자열과 그래프 구조가 채워진 프롬프트 / 체인도 함께 재사용
+- step 문장이 alias를 그대로(또는 오타 정도 차이로) 가리키면 AliasMatcher로 바로 처리하고
+  모호한 경우에만 LLM 호출
+- LLM 결과는 MappingCache(SQLite)에 저장하여 alias 파일 / 그래프가 바뀌기 전까지 재사용
+- graph(NavigationGraph)가 주어지면 현재 화면에서 N hop 이내에 도달 가능한 요소의 alias만
+  프롬프트에 넣고, LLM이 범위 밖의 이름을 반환하면 범위를 넓혀 다시 질의
+- alias가 많으면(MAPPER_RETRIEVAL_MIN_ALIASES 이상) 먼저 FAISS alias 인덱스에서 step과 가까운
+  top-k canonical만 보내고, 범위 밖이면 위의 화면 기준 범위로 넓힘
 """
 
 # .env 파일에서 환경변수 불러오기
 load_dotenv()
 api_key= os.getenv("OPENAI_API_KEY")
 
-# GPT-5 LLM 초기화
-llm = ChatOpenAI(
-    model="gpt-5",
-    use_responses_api=True,
-    output_version="responses/v1",
-    extra_body={
-        "text":{"verbosity":"low"},
-        "reasoning":{"effort":"low"},
-    },
-    api_key=api_key
-)
+# alias 범위를 정할 때 현재 화면에서 따라갈 관계 수 (Screen -> UIElement -> Tap -> Screen ...)
+SCOPE_HOPS = int(os.getenv("MAPPER_SCOPE_HOPS", "4"))
+# alias 인덱스 검색을 사용할 최소 canonical 수와 검색 개수
+RETRIEVAL_MIN_ALIASES = int(os.getenv("MAPPER_RETRIEVAL_MIN_ALIASES", "100"))
+RETRIEVAL_TOP_K = int(os.getenv("MAPPER_RETRIEVAL_TOP_K", "10"))
+
+# GPT-5 LLM (LLM gateway의 공유 연결 풀 사용)
+llm = get_chat_model("gpt-5", effort="low")
 
 class LLMCanonicalMapper:
     """
@@ -35,15 +47,44 @@ class LLMCanonicalMapper:
     - alias_path: UI alias JSON 파일 경로
     - graph_path: Neo4j 그래프 정보를 담은 파일 경로
     - model: LLM 객체
+    - graph: alias 범위를 정할 NavigationGraph (없으면 항상 전체 alias 사용)
     """
 
-    def __init__(self, alias_path, graph_path, model=None):
+    def __init__(self, alias_path, graph_path, model=None, use_fast_path=True, use_cache=True,
+                 graph=None, scope_hops=SCOPE_HOPS, use_retrieval=True):
         self.alias_path = alias_path
         self.graph_path = graph_path
         self.llm = llm
         self.prompt_template = ChatPromptTemplate.from_template(self._build_prompt_template())
         self.output_parser = JsonOutputParser()
 
+        # 파싱된 alias 인덱스 (파일 mtime이 바뀔 때만 재생성)
+        self.alias_data = {}
+        self.alias_to_canonical = {} # alias / canonical 이름 -> canonical 이름
+        self.canonical_type = {} # canonical 이름 -> 노드 타입
+        self.alias_string = ""
+        self.alias_lines = {} # canonical 이름 -> 프롬프트 한 줄
+        self.graph_structure = ""
+        self.chain = None
+        self.scoped_chain = None # alias_mapping만 호출 시 전달
+        self._mtimes = None
+
+        # 현재 화면 기준 alias 범위 제한
+        self.graph = graph
+        self.scope_hops = scope_hops
+        self.scope_stats = {"requests": 0, "widened": 0, "full_alias_chars": 0, "sent_alias_chars": 0}
+
+        # alias 벡터 인덱스 (alias가 RETRIEVAL_MIN_ALIASES 이상일 때만 로드)
+        self.use_retrieval = use_retrieval
+        self.alias_index = None
+
+        # LLM 호출 전 alias 직접 매칭
+        self.use_fast_path = use_fast_path
+        self.matcher = None
+
+        # LLM 결과 캐시
+        self.cache = MappingCache() if use_cache else None
+
     # LLM에게 전달할 프롬프트
     def _build_prompt_template(self):
         return """You are given a user instruction step and a set of canonical UI elements with their aliases and types.
@@ -90,30 +131,173 @@ Return your answer in JSON format, like this:
     def _load_text(self, path: str) -> str:
         return Path(path).read_text(encoding='utf-8')
 
+    # alias 파일과 그래프 구조 파일의 수정 시각
+    def _file_mtimes(self):
+        return (Path(self.alias_path).stat().st_mtime_ns, Path(self.graph_path).stat().st_mtime_ns)
+
+    # alias 파일을 파싱하여 인덱스 생성
+    def _build_alias_index(self, alias_data):
+        self.alias_data = alias_data
+        self.alias_to_canonical = {}
+        self.canonical_type = {}
+        self.alias_lines = {}
+        for canonical, entry in alias_data.items():
+            type_str = entry.get("type", "Unknown")
+            aliases = entry.get("aliases", [])
+            self.canonical_type[canonical] = type_str
+            self.alias_to_canonical[canonical] = canonical
+            for alias in aliases:
+                self.alias_to_canonical.setdefault(alias, canonical)
+            self.alias_lines[canonical] = f'- {canonical} ({type_str}): {", ".join(aliases)}'
+        self.alias_string = "\n".join(self.alias_lines.values())
+        self.matcher = AliasMatcher(alias_data)
+
+    # 파일이 바뀐 경우에만 alias 인덱스, 그래프 구조, 체인을 다시 생성
+    def reload_if_changed(self):
+        mtimes = self._file_mtimes()
+        if mtimes == self._mtimes:
+            return False
+
+        self._build_alias_index(json.loads(self._load_text(self.alias_path)))
+        if self.use_retrieval and len(self.alias_data) >= RETRIEVAL_MIN_ALIASES:
+            self.alias_index = load_alias_index(self.alias_data)
+        else:
+            self.alias_index = None
+        self.graph_structure = self._load_text(self.graph_path).strip()
+        prompt = self.prompt_template.partial(
+            alias_mapping=self.alias_string,
+            graph_structure=self.graph_structure,
+        )
+        self.chain = prompt | self.llm | self.output_parser
+        scoped_prompt = self.prompt_template.partial(graph_structure=self.graph_structure)
+        self.scoped_chain = scoped_prompt | self.llm | self.output_parser
+        self._mtimes = mtimes
+        return True
+
+    # 캐시 키에 포함할 버전 (alias 파일, 그래프 구조 파일, Neo4j 그래프)
+    def _cache_version(self):
+        alias_mtime, graph_mtime = self._mtimes
+        return f"{alias_mtime}:{graph_mtime}:{read_graph_version()}"
+
+    # 현재 화면에서 hops 이내에 도달 가능한 canonical 이름 (범위를 정할 수 없으면 None)
+    def _scope(self, current_screen, hops):
+        if self.graph is None or hops is None:
+            return None
+        names = self.graph.names_within(current_screen, hops)
+        if not names:
+            return None
+        scope = (names | set(MAIN_SCREENS)) & self.alias_lines.keys()
+        return None if len(scope) == len(self.alias_lines) else scope
+
+    # step과 가까운 canonical top-k (인덱스를 사용하지 않으면 None)
+    def _retrieve(self, step_text):
+        if self.alias_index is None:
+            return None
+        try:
+            names = self.alias_index.candidates(step_text, RETRIEVAL_TOP_K)
+        except Exception as e:
+            print(f"[WARN] Alias index search failed: {e}")
+            return None
+        scope = (set(names) | set(MAIN_SCREENS)) & self.alias_lines.keys()
+        return scope or None
+
+    # 범위를 제한한 alias 목록으로 LLM 실행, 범위 밖의 이름이 나오면 범위를 넓혀 재시도
+    # - alias 인덱스 top-k -> 현재 화면에서 hops 이내 -> hops * 2 ... -> 전체
+    def _invoke_scoped(self, inputs):
+        self.scope_stats["requests"] += 1
+        self.scope_stats["full_alias_chars"] += len(self.alias_string)
+
+        hops = self.scope_hops
+        previous = None
+        previous_from_retrieval = False # previous가 alias 인덱스 검색 범위인지 여부
+        retrieved = self._retrieve(inputs["step_text"])
+        while True:
+            from_retrieval = retrieved is not None
+            if from_retrieval:
+                scope, retrieved = retrieved, None
+            else:
+                scope = self._scope(inputs["current_screen"], hops)
+            # 검색 범위와 같은 그래프 범위는 이미 질의했으므로 hop 수를 늘려 다시 계산
+            if scope is not None and scope == previous and previous_from_retrieval:
+                hops *= 2
+                previous_from_retrieval = False
+                continue
+            # 더 넓혀도 범위가 그대로면 전체 alias 사용
+            if scope is None or scope == previous:
+                self.scope_stats["sent_alias_chars"] += len(self.alias_string)
+                return self.chain.invoke(inputs)
+
+            alias_mapping = "\n".join(line for name, line in self.alias_lines.items() if name in scope)
+            self.scope_stats["sent_alias_chars"] += len(alias_mapping)
+            result = self.scoped_chain.invoke({**inputs, "alias_mapping": alias_mapping})
+            if not isinstance(result, dict) or result.get("canonical_name") in scope:
+                return result
+
+            print(f"[INFO] Mapper returned '{result.get('canonical_name')}' outside the alias scope, widening.")
+            self.scope_stats["widened"] += 1
+            # 그래프 범위에서 벗어나면 매번 hop 수를 두 배로 (검색 범위 다음은 처음 hop 수로 시도)
+            if not from_retrieval:
+                hops *= 2
+            previous, previous_from_retrieval = scope, from_retrieval
+
+    # alias 범위 제한으로 줄어든 프롬프트 크기 통계 (토큰 수는 문자 수 / 4로 추정)
+    def prompt_savings(self):
+        full = self.scope_stats["full_alias_chars"]
+        sent = self.scope_stats["sent_alias_chars"]
+        return {
+            **self.scope_stats,
+            "estimated_tokens_saved": (full - sent) // 4,
+            "saved_ratio": 1 - sent / full if full else 0.0,
+        }
+
+    # alias fast-path 적중률 통계
+    def fast_path_stats(self):
+        return self.matcher.stats() if self.matcher else {}
+
+    # canonical 이름의 노드 타입 (없으면 None)
+    def type_of(self, canonical_name):
+        self.reload_if_changed()
+        return self.canonical_type.get(canonical_name)
+
     def resolve(self, step_text: str, user_input: str, current_screen: str, expected_result: str) -> str:
         """
         주어진 step 정보를 바탕으로
-        - alias JSON과 graph 구조를 읽고
-        - alias 문자열 포맷으로 변환
-        - LLM에 프롬프트를 전달하여 결과를 JSON으로 반환
+        - alias 인덱스와 graph 구조가 채워진 체인을 (파일이 바뀐 경우에만) 갱신하고
+        - alias 직접 매칭이 명확하면 LLM 없이 반환
+        - 아니면 LLM에 프롬프트를 전달하여 결과를 JSON으로 반환
         """
-        alias_data = json.loads(Path(self.alias_path).read_text(encoding='utf-8'))
-        graph_structure = self._load_text(self.graph_path)
+        self.reload_if_changed()
 
-        # 새로운 alias 포맷 문자열 생성
-        alias_string = ""
-        for canonical, entry in alias_data.items():
-            type_str = entry.get("type", "Unknown")
-            aliases = entry.get("aliases", [])
-            alias_string += f'- {canonical} ({type_str}): {", ".join(aliases)}\n'
+        if self.use_fast_path:
+            matched = self.matcher.match(step_text)
+            if matched is not None:
+                print(f"[INFO] Alias fast-path ({matched['match']}): {matched['canonical_name']} "
+                      f"(hit rate {self.matcher.stats()['hit_rate']:.0%})")
+                return {
+                    "canonical_name": matched["canonical_name"],
+                    "action_type": matched["action_type"],
+                    "action_data": None,
+                    "expected_result": expected_result.strip(),
+                }
 
-        # LLM 실행
-        chain = self.prompt_template | self.llm | self.output_parser
-        return chain.invoke({
-            "alias_mapping": alias_string.strip(),
-            "graph_structure": graph_structure.strip(),
+        inputs = {
             "step_text": step_text.strip(),
             "user_input": user_input.strip(),
             "current_screen": current_screen.strip(),
             "expected_result": expected_result.strip()
-        })
\ No newline at end of file
+        }
+
+        # 이전 실행의 LLM 결과 재사용
+        if self.cache is not None:
+            version = self._cache_version()
+            cached = self.cache.get(version, **inputs)
+            if cached is not None:
+                print(f"[INFO] Mapping cache hit: {cached.get('canonical_name')} "
+                      f"(hit rate {self.cache.stats()['hit_rate']:.0%})")
+                return cached
+
+        # LLM 실행
+        result = self._invoke_scoped(inputs)
+        if self.cache is not None and isinstance(result, dict) and result.get("canonical_name"):
+            self.cache.put(version, result=result, **inputs)
+        return result
\ No newline at end of file
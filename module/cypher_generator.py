@@ -1,4 +1,4 @@
-from langchain_openai import ChatOpenAI
+from module.llm_gateway import get_chat_model
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from pathlib import Path
@@ -13,24 +13,15 @@ LLMCypherGenerator 모듈
 
 - update_last_clicked_ui: UI Element를 시작점으로 사용
 - update_last_clicked_screen: Screen을 시작점으로 사용
-- generate: 최종 쿼리 생성
+- generate: 실패한 쿼리를 바탕으로 LLM이 수정 쿼리 생성
 """
 
 # .env 파일에서 환경변수 불러오기
 load_dotenv()
 api_key= os.getenv("OPENAI_API_KEY")
 
-# GPT-5 LLM 초기화
-llm = ChatOpenAI(
-    model="gpt-5",
-    use_responses_api=True,
-    output_version="responses/v1",
-    extra_body={
-        "text":{"verbosity":"low"},
-        "reasoning":{"effort":"low"},
-    },
-    api_key=api_key
-)
+# GPT-5 LLM (LLM gateway의 공유 연결 풀 사용)
+llm = get_chat_model("gpt-5", effort="low")
 
 
 class LLMCypherGenerator:
@@ -74,6 +65,7 @@ Rules:
 - The Cypher query should:
   - Find the shortest path from the given screen or UIElement to the target UIElement
   - Traverse via only the following relationships (directional, forward only): `[:CONTAINS]`, `[:TRIGGERS]`, `[:LEADS_TO]`
+  - Always qualify every node matched by name with its label (e.g. `(start:Screen {{name: "Home"}})`, `(target:UIElement {{name: "..."}})`) so the name index is used
   - After `UNWIND`, you must use `WITH n` before using `WHERE` (Neo4j requires this)
   - Only return UIElement nodes that have both `x` and `y` coordinates (using `n.x IS NOT NULL AND n.y IS NOT NULL`)
   - Return results in path order using `apoc.coll.indexOf(nodes(path), n)`
@@ -103,25 +95,21 @@ Only return this output format:
         self.isScreen = True
         self.last_clicked_ui = None
 
+    # 현재 시작 노드 (name, label) 반환
+    def get_start_node(self):
+        if self.last_clicked_ui is not None and self.isScreen == False:
+            return self.last_clicked_ui, "UIElement"
+        return self.current_screen or "Home", "Screen"
+
     def generate(self, target_ui: str, previous_failed_queries=None) -> str:
         graph_structure = self._load_text(self.graph_path)
 
-        # 시작점 설정 및 노드 이름 결정
-        current_screen = "Home"
-        if self.current_screen != None:
-            current_screen = self.current_screen
-        start_point_description = ""
-        start_node_name = ""
-        used_UIElement = self.last_clicked_ui is not None and not self.isScreen
-
-        if self.last_clicked_ui is not None and self.isScreen == False:
-            start_point_description = f"the previously clicked UI element\"{self.last_clicked_ui}\" (consider it as a UIElement node in the graph)"
-            start_node_name = self.last_clicked_ui
-            used_UIElement = True
+        # 시작점 설정
+        start_node_name, start_node_label = self.get_start_node()
+        if start_node_label == "UIElement":
+            start_point_description = f"the previously clicked UI element\"{start_node_name}\" (consider it as a UIElement node in the graph)"
         else:
-            start_point_description = f"the screen \"{current_screen}\""
-            start_node_name = current_screen
-            used_UIElement = False
+            start_point_description = f"the screen \"{start_node_name}\""
 
         print(f"generate() - current_screen: {self.current_screen}, isScreen: {self.isScreen}, last_clicked_ui: {self.last_clicked_ui}")
 
@@ -133,26 +121,12 @@ Only return this output format:
         }
 
         # 이전 실패 쿼리가 존재하면 context에 추가
+        # (기본 경로 쿼리는 Neo4jHandler의 "tap_path" 템플릿으로 실행되므로 여기서는 LLM만 사용)
         if previous_failed_queries:
             context["graph_structure"] += (
                 f"\n\nPrevious failed queries:\n" +
                 "\n".join(previous_failed_queries)
             )
-        else:
-            # 기본 쿼리 생성 (LLM 사용하지 않음)
-            start_node_label = "UIElement" if used_UIElement else "Screen"
-
-            initialCypher = f"""
-MATCH (start {{name: "{start_node_name}"}})
-MATCH (target:UIElement {{name: "{target_ui}"}})
-MATCH path = shortestPath((start)-[:CONTAINS|TRIGGERS|LEADS_TO*]->(target))
-UNWIND nodes(path) AS n
-WITH n, path
-WHERE n: UIElement AND n.x IS NOT NULL AND n.y IS NOT NULL
-RETURN n.name AS name, n.x AS x, n.y AS y
-ORDER BY apoc.coll.indexOf(nodes(path), n)
-"""
-            return initialCypher
 
         # LLM 호출
         chain = self.prompt_template | self.llm
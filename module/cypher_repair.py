@@ -0,0 +1,202 @@
+from pathlib import Path
+import hashlib
+import json
+import re
+import threading
+
+"""
+CypherRepairer 모듈
+- LLM 재시도 전에 실패한 Cypher 쿼리를 로컬 규칙으로 고쳐 보는 단계
+- Neo4j 오류(EXPLAIN / 실행)를 분류하고, 분류에 맞는 재작성 규칙 후보를 만들어 반환
+  - unwind_where: UNWIND 바로 뒤의 WHERE 앞에 WITH * 추가
+  - apoc_index: apoc가 없을 때 apoc.coll.indexOf(list, x)를 리스트 컴프리헨션으로 대체
+  - missing_parameter: 누락된 $start / $target / $name 파라미터 채우기
+  - missing_label: name으로 찾는 노드에 시작/대상 label 추가
+  - reversed_direction: 시작 -> 대상 방향이 아닌(또는 방향 없는) 경로 패턴 뒤집기
+- 성공한 수정 쿼리(규칙 또는 LLM)는 오류 시그니처(실패 쿼리 + 파라미터 + 오류 코드) 기준으로
+  resource/cypher_repair_cache.json에 저장하여 같은 실패를 다시 LLM에 보내지 않음
+  - 템플릿 쿼리는 문장이 같고 $start / $target만 다르므로 파라미터도 시그니처에 포함
+  - 캐시에는 수정 쿼리만 저장하고, 적용할 때는 현재 step의 파라미터를 바인딩
+"""
+
+REPAIR_CACHE_PATH = Path(__file__).resolve().parent.parent / "resource" / "cypher_repair_cache.json"
+
+ERROR_CODE_PATTERN = re.compile(r"Neo\.\w+\.\w+\.(\w+)")
+MISSING_PARAMETER_PATTERN = re.compile(r"Expected parameter\(s\):\s*([\w, ]+)")
+
+UNWIND_WHERE_PATTERN = re.compile(r"(UNWIND\s+.+?\s+AS\s+\w+)(\s+)(WHERE\b)", re.IGNORECASE | re.DOTALL)
+APOC_INDEX_PATTERN = re.compile(r"apoc\.coll\.indexOf\(\s*((?:nodes|relationships)\(\s*\w+\s*\)|\w+)\s*,\s*(\w+)\s*\)")
+# (var {name: ...}) - label이 없는 노드 패턴
+UNLABELED_NODE_PATTERN = re.compile(r"\((\w+)\s*\{\s*name\s*:\s*(\$\w+|\"[^\"]*\"|'[^']*')\s*\}\s*\)")
+# (var:Label {name: ...}) / (var {name: ...}) - 변수와 name 값
+NAMED_NODE_PATTERN = re.compile(r"\((\w+)(?::\w+)?\s*\{\s*name\s*:\s*(\$\w+|\"[^\"]*\"|'[^']*')\s*\}\s*\)")
+# (a)-[..]->(b), (a)<-[..]-(b), (a)-[..]-(b)
+PATH_PATTERN = re.compile(r"\((\w+)\)\s*(<?-)\s*\[([^\]]*)\]\s*(->?)\s*\((\w+)\)")
+
+
+# 오류 분류
+def classify_error(error):
+    if not error:
+        return "empty_result"
+    text = str(error)
+    if "apoc" in text and ("Unknown function" in text or "no procedure" in text.lower()
+                           or "ProcedureNotFound" in text):
+        return "apoc_missing"
+    match = ERROR_CODE_PATTERN.search(text)
+    code = match.group(1) if match else ""
+    if code == "ParameterMissing" or "Expected parameter" in text:
+        return "parameter_missing"
+    if code == "SyntaxError" or "Invalid input" in text:
+        return "syntax"
+    return code or "other"
+
+
+# 실패 쿼리 + 파라미터 + 오류 분류로 만든 시그니처
+def error_signature(query, params, error):
+    normalized = " ".join((query or "").split())
+    bound = json.dumps(params or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(f"{classify_error(error)}|{normalized}|{bound}".encode("utf-8")).hexdigest()
+
+
+class CypherRepairer:
+    """
+    CypherRepairer 클래스
+    - cache_path: 수정 쿼리 캐시 JSON 경로
+    """
+
+    def __init__(self, cache_path=REPAIR_CACHE_PATH):
+        self.cache_path = Path(cache_path)
+        self._lock = threading.Lock()
+        self.cache = {}
+        self.stats = {"cache_hits": 0, "rule_repairs": 0, "llm_repairs": 0}
+        if self.cache_path.exists():
+            try:
+                self.cache = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                print(f"[WARN] CypherRepairer: failed to load {self.cache_path.name}: {e}")
+
+    # 이전에 같은 실패(같은 쿼리 / 파라미터 / 오류)를 고친 쿼리 조회 (없으면 None)
+    # - 반환: 수정 쿼리 (파라미터는 호출하는 쪽에서 현재 값을 바인딩)
+    def lookup(self, query, params, error):
+        entry = self.cache.get(error_signature(query, params, error))
+        if entry is None:
+            return None
+        self.stats["cache_hits"] += 1
+        return entry["query"]
+
+    # 성공한 수정 쿼리 저장
+    # - failures: [(실패 쿼리, 파라미터, 오류), ...]
+    def remember(self, failures, query, source):
+        # 쿼리는 그대로이고 파라미터만 채운 수정(missing_parameter)은 다시 적용할 내용이 없으므로 저장하지 않음
+        failures = [failure for failure in failures if failure[0] != query]
+        if not failures:
+            return
+        with self._lock:
+            for failed_query, failed_params, error in failures:
+                self.cache[error_signature(failed_query, failed_params, error)] = {
+                    "query": query,
+                    "source": source,
+                    "error": classify_error(error),
+                }
+            self.stats["llm_repairs" if source == "llm" else "rule_repairs"] += 1
+            try:
+                self.cache_path.write_text(json.dumps(self.cache, ensure_ascii=False, indent=2), encoding="utf-8")
+            except OSError as e:
+                print(f"[WARN] CypherRepairer: failed to save repair cache: {e}")
+
+    # name 값($param / 문자열)을 실제 이름으로 변환
+    @staticmethod
+    def _name_value(token, params):
+        if token.startswith("$"):
+            return params.get(token[1:])
+        return token[1:-1]
+
+    # 쿼리의 노드 변수 -> 역할("start" / "target")
+    def _roles(self, query, params, context):
+        roles = {}
+        for var, token in NAMED_NODE_PATTERN.findall(query):
+            name = self._name_value(token, params)
+            for role in ("start", "target"):
+                if role in context and name == context[role][0]:
+                    roles.setdefault(var, role)
+        return roles
+
+    def _fix_unwind_where(self, query, params, context):
+        fixed = UNWIND_WHERE_PATTERN.sub(r"\1\2WITH *\2\3", query)
+        return fixed if fixed != query else None
+
+    def _fix_apoc_index(self, query, params, context):
+        fixed = APOC_INDEX_PATTERN.sub(
+            lambda m: f"[__i IN range(0, size({m.group(1)}) - 1) WHERE ({m.group(1)})[__i] = {m.group(2)}][0]",
+            query,
+        )
+        return fixed if fixed != query else None
+
+    def _fix_missing_label(self, query, params, context):
+        roles = self._roles(query, params, context)
+
+        def add_label(match):
+            role = roles.get(match.group(1))
+            if role is None:
+                return match.group(0)
+            return f"({match.group(1)}:{context[role][1]} {{name: {match.group(2)}}})"
+
+        fixed = UNLABELED_NODE_PATTERN.sub(add_label, query)
+        return fixed if fixed != query else None
+
+    def _fix_direction(self, query, params, context):
+        roles = self._roles(query, params, context)
+
+        def orient(match):
+            left, left_arrow, rel, right_arrow, right = match.groups()
+            if {roles.get(left), roles.get(right)} != {"start", "target"}:
+                return match.group(0)
+            if left_arrow == "<-" and right_arrow == "-":
+                source = right
+            elif left_arrow == "-" and right_arrow == "->":
+                source = left
+            else:
+                source = None
+            if source is not None and roles[source] == "start":
+                return match.group(0)
+            start, target = (left, right) if roles[left] == "start" else (right, left)
+            return f"({start})-[{rel}]->({target})"
+
+        fixed = PATH_PATTERN.sub(orient, query)
+        return fixed if fixed != query else None
+
+    # 오류 분류에 맞는 수정 후보 목록
+    # - context: {"start": (name, label), "target": (name, label)}
+    # - 반환: [(규칙 이름, 수정 쿼리, 파라미터), ...]
+    def candidates(self, query, params, error, context):
+        params = dict(params or {})
+        kind = classify_error(error)
+
+        if kind == "parameter_missing":
+            match = MISSING_PARAMETER_PATTERN.search(str(error))
+            values = {
+                "start": context.get("start", (None,))[0],
+                "target": context.get("target", (None,))[0],
+                "name": context.get("target", (None,))[0],
+            }
+            missing = [name.strip() for name in match.group(1).split(",")] if match else []
+            filled = {name: values[name] for name in missing if values.get(name) is not None}
+            if filled and len(filled) == len(missing):
+                return [("missing_parameter", query, {**params, **filled})]
+            return []
+
+        rules = {
+            "syntax": [self._fix_unwind_where],
+            "apoc_missing": [self._fix_apoc_index],
+            "empty_result": [self._fix_missing_label, self._fix_direction],
+        }.get(kind, [self._fix_unwind_where, self._fix_missing_label, self._fix_direction])
+
+        results = []
+        current = query
+        for rule in rules:
+            fixed = rule(current, params, context)
+            if fixed is not None:
+                # 규칙을 누적 적용 (label 추가 후 방향 수정 등)
+                current = fixed
+                results.append((rule.__name__.replace("_fix_", ""), current, params))
+        return results
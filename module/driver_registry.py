@@ -0,0 +1,139 @@
+from neo4j import GraphDatabase, AsyncGraphDatabase
+from dotenv import load_dotenv
+import asyncio
+import atexit
+import os
+import threading
+import time
+
+"""
+Neo4j 드라이버 레지스트리
+- 프로세스 전체에서 하나의 Neo4j 드라이버(sync / async)를 지연 생성하여 공유
+- 모든 모듈과 MCP 서버는 직접 GraphDatabase.driver()를 만들지 않고 여기서 가져다 사용
+- 드라이버 내부 커넥션 풀을 재사용하므로 매 호출마다 TCP/Bolt handshake와 인증을 반복하지 않음
+
+환경 변수:
+- NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD: 접속 정보
+- NEO4J_MAX_POOL_SIZE: 커넥션 풀 최대 크기 (기본 10)
+- NEO4J_LIVENESS_CHECK_SECONDS: 이 시간 이상 유휴 상태였던 커넥션은 사용 전에 상태 확인 (기본 30)
+- NEO4J_HEALTH_CHECK_SECONDS: get_driver() 호출 시 verify_connectivity() 재확인 주기 (기본 60)
+
+주요 함수:
+- get_driver(): 공유 sync 드라이버
+- get_async_driver(): 현재 이벤트 루프용 공유 async 드라이버
+- close_drivers() / aclose_drivers(): 드라이버 종료
+"""
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "10"))
+LIVENESS_CHECK_SECONDS = float(os.getenv("NEO4J_LIVENESS_CHECK_SECONDS", "30"))
+HEALTH_CHECK_SECONDS = float(os.getenv("NEO4J_HEALTH_CHECK_SECONDS", "60"))
+
+_lock = threading.Lock()
+_driver = None
+_driver_checked_at = 0.0
+_async_driver = None
+_async_loop = None
+_closing_tasks = set() # 종료 중인 이전 async 드라이버 (task가 GC되지 않도록 보관)
+
+
+# 드라이버 생성 옵션
+def _driver_config():
+    return {
+        "auth": (os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD")),
+        "max_connection_pool_size": MAX_POOL_SIZE,
+        "liveness_check_timeout": LIVENESS_CHECK_SECONDS,
+    }
+
+
+# 공유 sync 드라이버 반환 (최초 호출 시 생성, 주기적으로 연결 상태 확인)
+def get_driver():
+    global _driver, _driver_checked_at
+    with _lock:
+        if _driver is None:
+            _driver = GraphDatabase.driver(os.getenv("NEO4J_URI"), **_driver_config())
+            _driver_checked_at = time.monotonic()
+            return _driver
+
+        if time.monotonic() - _driver_checked_at > HEALTH_CHECK_SECONDS:
+            try:
+                _driver.verify_connectivity()
+            except Exception as e:
+                print(f"[WARN] Neo4j driver connectivity check failed, recreating driver: {e}")
+                try:
+                    _driver.close()
+                except Exception:
+                    pass
+                _driver = GraphDatabase.driver(os.getenv("NEO4J_URI"), **_driver_config())
+            _driver_checked_at = time.monotonic()
+        return _driver
+
+
+# 이전 이벤트 루프의 async 드라이버 종료 (커넥션 풀이 남지 않도록)
+# - 이전 루프가 아직 실행 중이면 그 루프에서, 이미 끝났으면 현재 루프에서 종료 시도
+def _close_async_driver(driver, driver_loop, loop):
+    def report(future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"[WARN] Failed to close async Neo4j driver: {future.exception()}")
+
+    if driver_loop is not None and driver_loop.is_running() and not driver_loop.is_closed():
+        asyncio.run_coroutine_threadsafe(driver.close(), driver_loop).add_done_callback(report)
+    else:
+        task = loop.create_task(driver.close())
+        _closing_tasks.add(task)
+        task.add_done_callback(_closing_tasks.discard)
+        task.add_done_callback(report)
+
+
+# 공유 async 드라이버 반환
+# - async 드라이버는 생성된 이벤트 루프에 묶이므로 루프가 바뀌면 이전 드라이버를 닫고 새로 생성
+def get_async_driver():
+    global _async_driver, _async_loop
+    loop = asyncio.get_running_loop()
+    with _lock:
+        if _async_driver is None or _async_loop is not loop or loop.is_closed():
+            if _async_driver is not None:
+                _close_async_driver(_async_driver, _async_loop, loop)
+            _async_driver = AsyncGraphDatabase.driver(os.getenv("NEO4J_URI"), **_driver_config())
+            _async_loop = loop
+        return _async_driver
+
+
+# sync 드라이버 연결 상태 확인
+def check_connectivity() -> bool:
+    try:
+        get_driver().verify_connectivity()
+        return True
+    except Exception as e:
+        print(f"[WARN] Neo4j connectivity check failed: {e}")
+        return False
+
+
+# sync 드라이버 종료 (프로세스 종료 시 자동 호출)
+def close_drivers():
+    global _driver
+    with _lock:
+        if _driver is not None:
+            try:
+                _driver.close()
+            except Exception as e:
+                print(f"[WARN] Failed to close Neo4j driver: {e}")
+            _driver = None
+
+
+# async 드라이버 종료 (드라이버를 만든 이벤트 루프 안에서 호출)
+async def aclose_drivers():
+    global _async_driver, _async_loop
+    driver = _async_driver
+    _async_driver = None
+    _async_loop = None
+    if driver is not None:
+        try:
+            await driver.close()
+        except Exception as e:
+            print(f"[WARN] Failed to close async Neo4j driver: {e}")
+
+
+atexit.register(close_drivers)
@@ -0,0 +1,211 @@
+from module.adb_client import get_adb_client
+from module.screen_capture import decode_raw
+from collections import deque
+from dotenv import load_dotenv
+import os
+import sys
+import threading
+import time
+import zlib
+
+import cv2
+
+"""
+FrameMonitor 모듈
+- InMemoryLogMonitor의 화면 버전: 별도 스레드에서 raw screencap을 계속 받아
+  저해상도 회색조 프레임을 작은 링 버퍼(deque)에 보관하고 직전 프레임과의 차이(delta)를 계산
+- 마지막 프레임은 원본 해상도(RGB)로도 보관하므로 화면 확인 시 새로 캡처하지 않고 메모리에서 읽음
+- mark() / wait_for_change() / wait_for_stable(): 고정 sleep 대신 화면 변화/안정을 기다림
+  wait_for_stable()은 이미 버퍼에 있는 프레임(since 이후)으로 먼저 판단하고,
+  부족할 때만 캡처 간격에 맞춘 시간만큼 새 프레임을 기다림
+- 비용: screencap은 디바이스에서 축소하는 옵션이 없어 프레임마다 원본 해상도 raw RGBA
+  (1080x2400 기준 약 10MB)를 만든 뒤 PC에서 축소함
+  디바이스에 gzip이 있으면 "screencap | gzip -1"로 압축해서 받으므로 전송량이 크게 줄어듦 (UI 화면 기준 수백 KB)
+  같은 adb 서버를 쓰는 탭 / 스크린샷 / logcat 스트림과 대역폭을 나누므로 기본값은 사용 안 함(0)이며,
+  사용할 때도 0.5초 이상 간격을 권장 (MIN_INTERVAL보다 짧게 설정하면 MIN_INTERVAL로 맞춤)
+
+환경 변수:
+- FRAME_MONITOR_INTERVAL: 캡처 간격(초) (기본 0 = 모니터를 시작하지 않음, 사용 시 1.0 권장)
+- FRAME_MONITOR_WIDTH: 저해상도 프레임 가로 픽셀 (기본 270)
+"""
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+INTERVAL = float(os.getenv("FRAME_MONITOR_INTERVAL", "0"))
+FRAME_WIDTH = int(os.getenv("FRAME_MONITOR_WIDTH", "270"))
+BUFFER_SIZE = 16
+MIN_INTERVAL = 0.5 # 최소 캡처 간격(초)
+CHANGE_THRESHOLD = 1.0 # 평균 밝기 차이(0~255)가 이보다 크면 화면이 바뀐 것으로 판단
+
+
+class FrameMonitor:
+    """
+    Frame Monitor
+    - interval: 캡처 간격(초)
+    - width: 저해상도 프레임 가로 픽셀
+    - buffer_size: 링 버퍼에 보관할 프레임 수
+    """
+    def __init__(self, interval=INTERVAL, width=FRAME_WIDTH, buffer_size=BUFFER_SIZE):
+        self.adb = get_adb_client()
+        self.interval = max(interval, MIN_INTERVAL) if interval > 0 else 0
+        self.width = width
+        self.thread = None
+        self._running = False
+        # (프레임 번호, 캡처 시각, 저해상도 회색조 프레임, 직전 프레임과의 delta)
+        self.frames = deque(maxlen=buffer_size)
+        self.frame_count = 0
+        self.bytes_received = 0 # adb로 받은 프레임 누적 크기 (압축한 경우 압축 크기)
+        self.compress = None # 디바이스에서 gzip 압축 여부 (None: 아직 확인 전)
+        self._latest = None # (캡처 시각, 원본 RGB 프레임)
+        self._condition = threading.Condition()
+        print("FrameMonitor initialized (in-memory ring buffer mode).")
+
+    # 별도 스레드에서 프레임 캡처 시작 (interval이 0이면 시작하지 않음)
+    def start_monitoring(self):
+        if self.interval <= 0 or self._running:
+            return
+        self._running = True
+        self.thread = threading.Thread(target=self._capture_frames, daemon=True)
+        self.thread.start()
+        print(f"FrameMonitor: Started frame capture in memory (every {self.interval:.1f}s).")
+
+    # 디바이스에 gzip이 있는지 확인 (screencap 출력을 압축해서 받기 위해)
+    def _probe_compression(self):
+        try:
+            return bool(self.adb.shell("command -v gzip").strip())
+        except Exception as e:
+            print(f"[WARN] FrameMonitor: gzip probe failed: {e}", file=sys.stderr)
+            return False
+
+    # raw screencap 한 장 (반환: (raw 바이트, adb로 받은 바이트 수))
+    def _read_frame(self):
+        if self.compress is None:
+            self.compress = self._probe_compression()
+        if self.compress:
+            data = self.adb.exec_out("screencap | gzip -1")
+            try:
+                return zlib.decompress(data, 16 + zlib.MAX_WBITS), len(data)
+            except zlib.error as e:
+                print(f"[WARN] FrameMonitor: compressed capture failed ({e}), using raw screencap.",
+                      file=sys.stderr)
+                self.compress = False
+        raw = self.adb.exec_out("screencap")
+        return raw, len(raw)
+
+    # 별도 스레드에서 프레임 캡처
+    def _capture_frames(self):
+        failures = 0
+        try:
+            while self._running:
+                started = time.monotonic()
+                try:
+                    raw, received = self._read_frame()
+                    image = decode_raw(raw)
+                    failures = 0
+                except Exception as e:
+                    failures += 1
+                    if failures >= 5:
+                        raise
+                    print(f"[WARN] FrameMonitor: capture failed: {e}")
+                    time.sleep(self.interval)
+                    continue
+
+                height = max(1, round(image.shape[0] * self.width / image.shape[1]))
+                small = cv2.resize(cv2.cvtColor(image, cv2.COLOR_RGB2GRAY), (self.width, height),
+                                   interpolation=cv2.INTER_AREA)
+                with self._condition:
+                    delta = float(cv2.absdiff(small, self.frames[-1][2]).mean()) if self.frames else 0.0
+                    self.frame_count += 1
+                    self.bytes_received += received
+                    self.frames.append((self.frame_count, time.monotonic(), small, delta))
+                    self._latest = (time.monotonic(), image)
+                    self._condition.notify_all()
+
+                time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+        except Exception as e:
+            print(f"FrameMonitor ERROR: {e}")
+        finally:
+            self._running = False
+            with self._condition:
+                self._condition.notify_all()
+            print("FrameMonitor: Capture stopped.")
+
+    # 프레임 캡처 종료 및 스레드 정리
+    def stop_monitoring(self):
+        if self.thread:
+            self._running = False
+            self.thread.join(timeout=5)
+            print(f"FrameMonitor: Monitoring stopped and cleaned up. "
+                  f"({self.frame_count} frames, {self.bytes_received / 1024 / 1024:.0f}MB received)")
+
+    # 프레임 모니터가 동작 중인지 여부
+    @property
+    def running(self):
+        return self._running
+
+    # 현재까지 캡처한 프레임 위치 (wait_for_change / wait_for_stable의 기준점)
+    def mark(self) -> int:
+        with self._condition:
+            return self.frame_count
+
+    # 마지막 프레임 (원본 해상도 RGB), max_age초보다 오래되었거나 없으면 None
+    def latest_frame(self, max_age=None):
+        with self._condition:
+            if self._latest is None:
+                return None
+            captured_at, image = self._latest
+        if max_age is not None and time.monotonic() - captured_at > max_age:
+            return None
+        return image
+
+    # 프레임 번호가 since인 저해상도 프레임 (링 버퍼에 없으면 None)
+    def _frame_at(self, since):
+        for number, _, small, _ in self.frames:
+            if number == since:
+                return small
+        return None
+
+    # since 시점 프레임과 비교하여 화면이 바뀔 때까지 대기
+    # - 반환: 바뀐 정도(평균 밝기 차이), timeout 초과 시 None
+    def wait_for_change(self, since=None, threshold=CHANGE_THRESHOLD, timeout=3.0):
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            since = self.frame_count if since is None else since
+            reference = self._frame_at(since)
+            checked = since
+            while True:
+                for number, _, small, _ in self.frames:
+                    if number <= checked:
+                        continue
+                    checked = number
+                    if reference is None:
+                        # 기준 프레임이 없으면(모니터 시작 전 mark 등) 다음 프레임을 기준으로 사용
+                        reference = small
+                        continue
+                    difference = float(cv2.absdiff(small, reference).mean())
+                    if difference > threshold:
+                        return difference
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    return None
+                self._condition.wait(remaining)
+
+    # since 이후 연속 stable_frames장의 delta가 threshold 이하가 될 때까지 대기
+    # - since 이후 프레임이 이미 버퍼에 있으면 그 프레임으로 바로 판단 (since가 None이면 버퍼 전체)
+    # - timeout이 None이면 캡처 간격 기준으로 stable_frames + 1장을 받을 시간만큼 대기
+    # - 반환: 안정 여부 (timeout 초과 또는 모니터 중지 시 False)
+    def wait_for_stable(self, since=None, stable_frames=2, threshold=CHANGE_THRESHOLD, timeout=None):
+        if timeout is None:
+            timeout = self.interval * (stable_frames + 1)
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            since = 0 if since is None else since
+            while True:
+                recent = [delta for number, _, _, delta in self.frames if number > since]
+                if len(recent) >= stable_frames and all(d <= threshold for d in recent[-stable_frames:]):
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    return False
+                self._condition.wait(remaining)
@@ -0,0 +1,280 @@
+from module.adb_client import get_adb_client
+import math
+import os
+import re
+import struct
+import time
+
+"""
+GestureExecutor 클래스
+- pinch / swipe / drag / multi_tap 같은 제스처를 디바이스 터치스크린에 직접 주입
+- 제스처를 Linux multi-touch protocol B의 input_event 구조체로 PC에서 미리 변환하고,
+  디바이스에서는 제스처당 "cat > 터치 장치" 프로세스 하나만 실행하여 exec: 스트림으로 프레임을 전달
+  - 프레임 하나(SLOT / TRACKING_ID / X / Y / SYN_REPORT)는 한 번의 write로 전송
+  - 프레임 간격은 PC에서 절대 시각 기준으로 맞추므로 지연이 누적되지 않음
+    (sendevent는 이벤트마다 디바이스 프로세스를 실행하여 16ms 프레임 간격을 지킬 수 없음)
+  - 실제 소요 시간은 last_timing에 기록하고, 계획보다 DRIFT_WARN_MS 이상 길어지면 경고 출력
+- 멀티터치 입력 장치를 찾지 못하거나 쓰기 권한이 없으면
+  swipe / drag / multi_tap은 input 명령으로 대체하고 pinch는 False 반환
+
+환경 변수:
+- GESTURE_TOUCH_DEVICE: 터치 입력 장치 경로 (예: /dev/input/event2, 없으면 getevent -pl로 탐색)
+"""
+
+# linux/input-event-codes.h
+EV_SYN, EV_KEY, EV_ABS = 0, 1, 3
+SYN_REPORT = 0
+BTN_TOUCH = 330
+ABS_MT_SLOT = 47
+ABS_MT_TOUCH_MAJOR = 48
+ABS_MT_POSITION_X = 53
+ABS_MT_POSITION_Y = 54
+ABS_MT_TRACKING_ID = 57
+ABS_MT_PRESSURE = 58
+
+FRAME_MS = 16 # 이동 프레임 간격
+DRIFT_WARN_MS = 50 # 계획보다 이만큼 오래 걸리면 경고
+RELEASE_WAIT = 0.05 # 마지막 프레임 전송 후 스트림을 닫기 전 대기 시간(초)
+
+DIRECTIONS = {"up": (0, -1), "down": (0, 1), "left": (-1, 0), "right": (1, 0)}
+
+GESTURE_TYPES = ("pinch", "zoom_in", "zoom_out", "swipe", "drag", "multi_tap", "double_tap")
+
+
+class GestureExecutor:
+    def __init__(self, device=None):
+        self.adb = get_adb_client()
+        self.device = device or os.getenv("GESTURE_TOUCH_DEVICE")
+        self.axis_max = None # (x 최대값, y 최대값)
+        self.has_pressure = False
+        self.event_format = "<qqHHi" # struct input_event (64비트: timeval 16바이트)
+        self.last_timing = None # (계획 ms, 실제 ms)
+        self._screen_size = None
+        self._tracking_id = 100
+
+    # 화면 크기 (wm size, Override 우선)
+    def screen_size(self):
+        if self._screen_size is None:
+            output = self.adb.shell("wm size")
+            sizes = re.findall(r"(\d+)x(\d+)", output)
+            self._screen_size = tuple(map(int, sizes[-1])) if sizes else (1080, 1920)
+        return self._screen_size
+
+    # getevent -pl 출력에서 멀티터치(protocol B) 입력 장치와 좌표 범위 탐색
+    def _probe(self):
+        if self.axis_max is not None:
+            return self.axis_max[0] > 0
+        output = self.adb.shell("getevent -pl")
+        devices = {}
+        current = None
+        for line in output.splitlines():
+            match = re.match(r"add device \d+:\s*(\S+)", line)
+            if match:
+                current = devices.setdefault(match.group(1), {})
+                continue
+            if current is None:
+                continue
+            for axis in ("ABS_MT_SLOT", "ABS_MT_POSITION_X", "ABS_MT_POSITION_Y", "ABS_MT_PRESSURE"):
+                axis_match = re.search(axis + r"\s*:.*?max (\d+)", line)
+                if axis_match:
+                    current[axis] = int(axis_match.group(1))
+
+        candidates = {
+            path: axes for path, axes in devices.items()
+            if "ABS_MT_SLOT" in axes and "ABS_MT_POSITION_X" in axes and "ABS_MT_POSITION_Y" in axes
+        }
+        if self.device is None and candidates:
+            self.device = next(iter(candidates))
+        axes = candidates.get(self.device)
+        if axes is None:
+            print("[WARN] GestureExecutor: no multi-touch (protocol B) input device found.")
+            self.axis_max = (0, 0)
+            return False
+        if self.adb.shell(f"test -w {self.device} && echo writable") != "writable":
+            print(f"[WARN] GestureExecutor: {self.device} is not writable from adb shell.")
+            self.axis_max = (0, 0)
+            return False
+        self.axis_max = (axes["ABS_MT_POSITION_X"], axes["ABS_MT_POSITION_Y"])
+        self.has_pressure = "ABS_MT_PRESSURE" in axes
+        # 32비트 디바이스는 timeval이 8바이트
+        if "64" not in self.adb.shell("getprop ro.product.cpu.abi"):
+            self.event_format = "<iiHHi"
+        return True
+
+    # 화면 좌표 -> 터치 장치 좌표
+    def _scale(self, x, y):
+        width, height = self.screen_size()
+        return (
+            round(x * self.axis_max[0] / max(1, width - 1)),
+            round(y * self.axis_max[1] / max(1, height - 1)),
+        )
+
+    # 프레임 목록을 프레임별 input_event 바이트로 변환 (시각은 커널이 채우므로 0)
+    # - frames: [(손가락별 좌표 [(x, y) 또는 None], 다음 프레임까지 ms), ...]
+    #   None은 손가락을 뗀 상태
+    # - 반환: [(프레임 바이트, 다음 프레임까지 ms), ...]
+    def _pack(self, frames):
+        packed = []
+        down = {}
+        touching = False
+        for positions, wait_ms in frames:
+            events = []
+            for slot, position in enumerate(positions):
+                if position is None:
+                    if slot in down:
+                        events.append((EV_ABS, ABS_MT_SLOT, slot))
+                        events.append((EV_ABS, ABS_MT_TRACKING_ID, -1))
+                        del down[slot]
+                    continue
+                x, y = self._scale(*position)
+                events.append((EV_ABS, ABS_MT_SLOT, slot))
+                if slot not in down:
+                    self._tracking_id += 1
+                    events.append((EV_ABS, ABS_MT_TRACKING_ID, self._tracking_id))
+                    if self.has_pressure:
+                        events.append((EV_ABS, ABS_MT_PRESSURE, 50))
+                    events.append((EV_ABS, ABS_MT_TOUCH_MAJOR, 5))
+                if down.get(slot) != (x, y):
+                    events.append((EV_ABS, ABS_MT_POSITION_X, x))
+                    events.append((EV_ABS, ABS_MT_POSITION_Y, y))
+                down[slot] = (x, y)
+            if bool(down) != touching:
+                touching = bool(down)
+                events.append((EV_KEY, BTN_TOUCH, 1 if touching else 0))
+            events.append((EV_SYN, SYN_REPORT, 0))
+            data = b"".join(struct.pack(self.event_format, 0, 0, *event) for event in events)
+            packed.append((data, wait_ms))
+        return packed
+
+    # 프레임 목록을 터치 장치에 직접 기록 (디바이스 프로세스는 cat 하나)
+    def _run(self, frames):
+        packed = self._pack(frames)
+        planned = sum(wait for _, wait in frames)
+        started = time.monotonic()
+        deadline = started
+        try:
+            with self.adb.open_writer(f"cat > {self.device}") as writer:
+                for data, wait_ms in packed:
+                    writer.write(data)
+                    deadline += wait_ms / 1000
+                    delay = deadline - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                time.sleep(RELEASE_WAIT)
+        except OSError as e:
+            print(f"[WARN] GestureExecutor: failed to write touch events: {e}")
+            return False
+
+        elapsed = (time.monotonic() - started - RELEASE_WAIT) * 1000
+        self.last_timing = (planned, elapsed)
+        if elapsed - planned > DRIFT_WARN_MS:
+            print(f"[WARN] GestureExecutor: gesture took {elapsed:.0f}ms (planned {planned}ms)")
+        return True
+
+    # 시작/끝 좌표 사이를 FRAME_MS 간격으로 보간한 손가락 위치 목록
+    @staticmethod
+    def _interpolate(starts, ends, duration_ms):
+        steps = max(1, int(duration_ms / FRAME_MS))
+        frames = []
+        for i in range(steps + 1):
+            t = i / steps
+            frames.append(([
+                (round(sx + (ex - sx) * t), round(sy + (ey - sy) * t))
+                for (sx, sy), (ex, ey) in zip(starts, ends)
+            ], FRAME_MS if i < steps else 0))
+        return frames
+
+    def swipe(self, x1, y1, x2, y2, duration_ms=300):
+        if not self._probe():
+            self.adb.swipe(x1, y1, x2, y2, duration_ms)
+            return True
+        frames = self._interpolate([(x1, y1)], [(x2, y2)], duration_ms)
+        return self._run(frames + [([None], 0)])
+
+    # 길게 누른 뒤 이동 (드래그 앤 드롭)
+    def drag(self, x1, y1, x2, y2, hold_ms=600, duration_ms=500):
+        if not self._probe():
+            # input draganddrop은 API 24 이상에서만 지원
+            self.adb.shell(f"input draganddrop {int(x1)} {int(y1)} {int(x2)} {int(y2)} {int(hold_ms + duration_ms)}")
+            return True
+        frames = [([(x1, y1)], hold_ms)]
+        frames += self._interpolate([(x1, y1)], [(x2, y2)], duration_ms)
+        return self._run(frames + [([None], 0)])
+
+    # 두 손가락 핀치 (end_distance > start_distance 이면 확대)
+    def pinch(self, cx, cy, start_distance, end_distance, duration_ms=400, angle=0.0):
+        if not self._probe():
+            return False
+        dx, dy = math.cos(angle) / 2, math.sin(angle) / 2
+
+        def fingers(distance):
+            return [(cx - dx * distance, cy - dy * distance), (cx + dx * distance, cy + dy * distance)]
+
+        frames = self._interpolate(fingers(start_distance), fingers(end_distance), duration_ms)
+        return self._run(frames + [([None, None], 0)])
+
+    # 같은 위치를 count번 연속 탭 (double tap 등)
+    def multi_tap(self, x, y, count=2, interval_ms=80, press_ms=40):
+        if not self._probe():
+            for _ in range(count):
+                self.adb.tap(x, y)
+            return True
+        frames = []
+        for _ in range(count):
+            frames.append(([(x, y)], press_ms))
+            frames.append(([None], interval_ms))
+        return self._run(frames)
+
+    # action_type / action_data를 제스처로 실행 (지원하지 않거나 action_data가 잘못되면 False)
+    # - x, y: 대상 UIElement 좌표 (없으면 화면 중앙)
+    def perform(self, action_type, action_data=None, x=None, y=None, step=""):
+        width, height = self.screen_size()
+        if x is None or y is None:
+            x, y = width // 2, height // 2
+        data = action_data if isinstance(action_data, dict) else {}
+        text = f"{action_data if isinstance(action_data, str) else ''} {step}".lower()
+        try:
+            distance = int(data.get("distance", min(width, height) // 3))
+            duration_ms = int(data.get("duration_ms", 300))
+            count = int(data.get("count", 2))
+        except (TypeError, ValueError):
+            print(f"[WARN] GestureExecutor: invalid action_data: {action_data}")
+            return False
+
+        if action_type in ("pinch", "zoom_in", "zoom_out"):
+            zoom_out = action_type == "zoom_out" or data.get("direction") == "in" \
+                or any(keyword in text for keyword in ("축소", "zoom out", "pinch in"))
+            small, large = distance // 3, distance
+            if zoom_out:
+                return self.pinch(x, y, large, small)
+            return self.pinch(x, y, small, large)
+
+        if action_type in ("swipe", "drag"):
+            if "to" in data:
+                try:
+                    x2, y2 = (int(v) for v in data["to"])
+                except (TypeError, ValueError):
+                    print(f"[WARN] GestureExecutor: invalid 'to' coordinates: {data['to']}")
+                    return False
+            else:
+                direction = data.get("direction") or next(
+                    (d for d, keywords in (
+                        ("up", ("위로", "up")), ("down", ("아래로", "down")),
+                        ("left", ("왼쪽", "left")), ("right", ("오른쪽", "right")),
+                    ) if any(keyword in text for keyword in keywords)),
+                    "up",
+                )
+                if not isinstance(direction, str) or direction not in DIRECTIONS:
+                    print(f"[WARN] GestureExecutor: unknown direction: {direction}")
+                    return False
+                dx, dy = DIRECTIONS[direction]
+                x2 = min(max(0, x + dx * distance), width - 1)
+                y2 = min(max(0, y + dy * distance), height - 1)
+            if action_type == "drag":
+                return self.drag(x, y, x2, y2)
+            return self.swipe(x, y, x2, y2, duration_ms)
+
+        if action_type in ("multi_tap", "double_tap"):
+            return self.multi_tap(x, y, count)
+
+        return False
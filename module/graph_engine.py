@@ -0,0 +1,352 @@
+from array import array
+from collections import deque
+from pathlib import Path
+import json
+import os
+import time
+
+"""
+NavigationGraph 모듈
+- Neo4j의 UI 그래프(Screen, UIElement, Tap, Hold)를 한 번만 읽어 메모리 스냅샷으로 보관
+- 인접 리스트를 CSR 형태의 array로 압축하고, 경로/좌표 시퀀스 조회를 로컬 BFS로 처리
+- app.py 편집기가 그래프를 수정하면 graph_version.txt가 갱신되고, 다음 조회 시 자동으로 다시 로드
+
+스냅샷 소스:
+- Neo4j (기본)
+- resource/graph_snapshot.json (Neo4j에 접속할 수 없을 때)
+  resource/neo4j.dump는 Neo4j 바이너리 아카이브라 직접 읽을 수 없으므로,
+  `python -m module.graph_engine`으로 Neo4j에서 스냅샷 JSON을 내보내 사용
+
+주요 메서드:
+- find_tap_sequence(): 시작 노드에서 대상 노드까지 경로 상의 UIElement (name, x, y) 목록
+- routes_from(): 시작 노드에서 도달 가능한 모든 UIElement까지의 좌표 목록
+- nearest_screen(): 특정 노드에서 가장 가까운 메인 화면
+- label_of(): 노드 label 조회
+- is_reachable(): 지정한 관계만 따라 도달 가능한지 확인
+- names_within(): 시작 노드에서 N hop 이내에 도달 가능한 노드 이름
+"""
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SNAPSHOT_PATH = BASE_DIR / "resource" / "graph_snapshot.json"
+VERSION_PATH = BASE_DIR / "resource" / "graph_version.txt"
+
+RELATIONSHIP_TYPES = ("CONTAINS", "TRIGGERS", "LEADS_TO")
+MAIN_SCREENS = ("Home", "Settings", "Run", "Move", "System", "Program")
+
+NODES_QUERY = """
+MATCH (n)
+WHERE n:Screen OR n:UIElement OR n:Tap OR n:Hold
+RETURN elementId(n) AS id, head(labels(n)) AS label, n.name AS name, n.x AS x, n.y AS y
+"""
+
+EDGES_QUERY = """
+MATCH (a)-[r:CONTAINS|TRIGGERS|LEADS_TO]->(b)
+RETURN elementId(a) AS source, type(r) AS type, elementId(b) AS target
+"""
+
+
+# 그래프 버전 파일 갱신 (app.py에서 그래프 수정 후 호출)
+def bump_graph_version():
+    VERSION_PATH.write_text(str(time.time_ns()), encoding="utf-8")
+
+
+# 그래프 버전 조회 (버전 파일의 수정 시각)
+def read_graph_version() -> int:
+    try:
+        return os.stat(VERSION_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+class NavigationGraph:
+    """
+    NavigationGraph 클래스
+    - driver: Neo4j 드라이버 (None이면 스냅샷 파일만 사용)
+    - snapshot_path: 오프라인 스냅샷 JSON 경로
+    """
+
+    def __init__(self, driver=None, snapshot_path=SNAPSHOT_PATH):
+        self.driver = driver
+        self.snapshot_path = Path(snapshot_path)
+        self.version = None
+        self.source = None
+        self._set_data([], [])
+
+    # 노드/관계 목록으로 CSR 인접 배열 구성
+    # - nodes: [(label, name, x, y), ...]
+    # - edges: [(source_idx, type_idx, target_idx), ...]
+    def _set_data(self, nodes, edges):
+        count = len(nodes)
+        self.labels = [node[0] for node in nodes]
+        self.names = [node[1] for node in nodes]
+        self.xs = array("i", (node[2] if isinstance(node[2], int) else -1 for node in nodes))
+        self.ys = array("i", (node[3] if isinstance(node[3], int) else -1 for node in nodes))
+
+        self.name_index = {}
+        for idx, name in enumerate(self.names):
+            self.name_index.setdefault(name, []).append(idx)
+
+        self.out_offsets, self.out_targets, self.out_types = self._build_csr(
+            count, ((s, t, d) for s, t, d in edges))
+        self.in_offsets, self.in_targets, self.in_types = self._build_csr(
+            count, ((d, t, s) for s, t, d in edges))
+
+    @staticmethod
+    def _build_csr(count, edges):
+        buckets = [[] for _ in range(count)]
+        for source, rel_type, target in edges:
+            buckets[source].append((target, rel_type))
+
+        offsets = array("i", [0])
+        targets = array("i")
+        types = array("b")
+        for bucket in buckets:
+            for target, rel_type in bucket:
+                targets.append(target)
+                types.append(rel_type)
+            offsets.append(len(targets))
+        return offsets, targets, types
+
+    # Neo4j에서 전체 그래프를 읽어 스냅샷 구성
+    def load_from_neo4j(self, driver=None):
+        driver = driver or self.driver
+        version = read_graph_version()
+        with driver.session() as session:
+            node_records = session.run(NODES_QUERY).values()
+            edge_records = session.run(EDGES_QUERY).values()
+
+        index = {}
+        nodes = []
+        for element_id, label, name, x, y in node_records:
+            index[element_id] = len(nodes)
+            nodes.append((label, name, x, y))
+
+        edges = [
+            (index[source], RELATIONSHIP_TYPES.index(rel_type), index[target])
+            for source, rel_type, target in edge_records
+            if source in index and target in index
+        ]
+
+        self._set_data(nodes, edges)
+        self.version = version
+        self.source = "neo4j"
+        print(f"NavigationGraph: loaded {len(nodes)} nodes, {len(edges)} edges from Neo4j.")
+
+    # 스냅샷 JSON 파일에서 그래프 로드
+    def load_snapshot(self, path=None):
+        path = Path(path or self.snapshot_path)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        self._set_data([tuple(node) for node in data["nodes"]], [tuple(edge) for edge in data["edges"]])
+        self.version = read_graph_version()
+        self.source = "snapshot"
+        print(f"NavigationGraph: loaded {len(self.names)} nodes from {path.name}.")
+
+    # 현재 그래프를 스냅샷 JSON 파일로 저장
+    def save_snapshot(self, path=None):
+        path = Path(path or self.snapshot_path)
+        nodes = [
+            [self.labels[i], self.names[i],
+             self.xs[i] if self.xs[i] >= 0 else None,
+             self.ys[i] if self.ys[i] >= 0 else None]
+            for i in range(len(self.names))
+        ]
+        edges = []
+        for source in range(len(self.names)):
+            for pos in range(self.out_offsets[source], self.out_offsets[source + 1]):
+                edges.append([source, self.out_types[pos], self.out_targets[pos]])
+        data = {"relationship_types": list(RELATIONSHIP_TYPES), "nodes": nodes, "edges": edges}
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    # Neo4j 우선, 실패 시 스냅샷 파일로 로드
+    def reload(self):
+        if self.driver is not None:
+            try:
+                self.load_from_neo4j()
+                return
+            except Exception as e:
+                print(f"[WARN] NavigationGraph: failed to load from Neo4j: {e}")
+        if self.snapshot_path.exists():
+            self.load_snapshot()
+        else:
+            self._set_data([], [])
+            self.version = read_graph_version()
+            self.source = None
+
+    # 그래프 버전이 바뀌었으면 다시 로드
+    def ensure_fresh(self):
+        if self.version is None or self.version != read_graph_version():
+            self.reload()
+
+    def _ids(self, name, label=None):
+        ids = self.name_index.get(name, [])
+        if label is None:
+            return ids
+        return [idx for idx in ids if self.labels[idx] == label]
+
+    # BFS로 최단 경로(노드 인덱스 목록) 계산
+    # - directed=False면 관계 방향을 무시
+    # - rel_types에 포함된 관계만 따라감
+    def _bfs(self, sources, is_target, rel_types=RELATIONSHIP_TYPES, directed=True, max_depth=None):
+        if not sources:
+            return None
+        allowed = {RELATIONSHIP_TYPES.index(t) for t in rel_types}
+        parent = array("i", [-2]) * len(self.names)
+        depth = {}
+        queue = deque()
+        for source in sources:
+            parent[source] = -1
+            depth[source] = 0
+            queue.append(source)
+
+        adjacency = [(self.out_offsets, self.out_targets, self.out_types)]
+        if not directed:
+            adjacency.append((self.in_offsets, self.in_targets, self.in_types))
+
+        while queue:
+            node = queue.popleft()
+            if depth[node] > 0 and is_target(node):
+                path = []
+                while node != -1:
+                    path.append(node)
+                    node = parent[node]
+                path.reverse()
+                return path
+            if max_depth is not None and depth[node] >= max_depth:
+                continue
+            for offsets, targets, types in adjacency:
+                for pos in range(offsets[node], offsets[node + 1]):
+                    nxt = targets[pos]
+                    if types[pos] in allowed and parent[nxt] == -2:
+                        parent[nxt] = node
+                        depth[nxt] = depth[node] + 1
+                        queue.append(nxt)
+        return None
+
+    # 시작 노드 -> 대상 노드 최단 경로 상의 UIElement 좌표 목록
+    # - 반환: [[name, x, y], ...] (경로가 없으면 None)
+    def find_tap_sequence(self, start_name, target_name, start_label=None, target_label="UIElement"):
+        self.ensure_fresh()
+        targets = set(self._ids(target_name, target_label))
+        if not targets:
+            return None
+        path = self._bfs(self._ids(start_name, start_label), targets.__contains__)
+        if path is None:
+            return None
+        return [
+            [self.names[idx], self.xs[idx], self.ys[idx]]
+            for idx in path
+            if self.labels[idx] == "UIElement" and self.xs[idx] >= 0 and self.ys[idx] >= 0
+        ]
+
+    # 시작 노드에서 도달 가능한 모든 UIElement까지의 좌표 목록
+    # - 반환: {target_name: [[name, x, y], ...]}
+    def routes_from(self, start_name, start_label=None):
+        self.ensure_fresh()
+        sources = self._ids(start_name, start_label)
+        parent = array("i", [-2]) * len(self.names)
+        order = []
+        queue = deque()
+        for source in sources:
+            parent[source] = -1
+            queue.append(source)
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for pos in range(self.out_offsets[node], self.out_offsets[node + 1]):
+                nxt = self.out_targets[pos]
+                if parent[nxt] == -2:
+                    parent[nxt] = node
+                    queue.append(nxt)
+
+        routes = {}
+        for target in order:
+            if parent[target] == -1 or self.labels[target] != "UIElement":
+                continue
+            if self.names[target] in routes:
+                continue
+            path = []
+            node = target
+            while node != -1:
+                path.append(node)
+                node = parent[node]
+            path.reverse()
+            routes[self.names[target]] = [
+                [self.names[idx], self.xs[idx], self.ys[idx]]
+                for idx in path
+                if self.labels[idx] == "UIElement" and self.xs[idx] >= 0 and self.ys[idx] >= 0
+            ]
+        return routes
+
+    # 특정 노드에서 가장 가까운 메인 화면 (관계 방향 무시, 최대 10 hop)
+    def nearest_screen(self, name, max_depth=10):
+        if name in MAIN_SCREENS:
+            return name
+        self.ensure_fresh()
+        path = self._bfs(
+            self._ids(name),
+            lambda idx: self.labels[idx] == "Screen" and self.names[idx] in MAIN_SCREENS,
+            directed=False,
+            max_depth=max_depth,
+        )
+        return self.names[path[-1]] if path else None
+
+    # 노드 label 조회
+    def label_of(self, name):
+        self.ensure_fresh()
+        ids = self._ids(name)
+        return self.labels[ids[0]] if ids else None
+
+    # start -> target 으로 지정한 관계만 따라 도달 가능한지 확인
+    def is_reachable(self, start_name, target_name, start_label=None, target_label=None,
+                     rel_types=RELATIONSHIP_TYPES):
+        self.ensure_fresh()
+        targets = set(self._ids(target_name, target_label))
+        if not targets:
+            return False
+        return self._bfs(self._ids(start_name, start_label), targets.__contains__, rel_types) is not None
+
+    # 시작 노드에서 관계 방향대로 max_hops 이내에 도달 가능한 노드 이름 집합 (시작 노드 포함)
+    def names_within(self, name, max_hops, label=None):
+        self.ensure_fresh()
+        sources = self._ids(name, label)
+        depth = {source: 0 for source in sources}
+        queue = deque(sources)
+        while queue:
+            node = queue.popleft()
+            if depth[node] >= max_hops:
+                continue
+            for pos in range(self.out_offsets[node], self.out_offsets[node + 1]):
+                nxt = self.out_targets[pos]
+                if nxt not in depth:
+                    depth[nxt] = depth[node] + 1
+                    queue.append(nxt)
+        return {self.names[idx] for idx in depth}
+
+
+_shared_graph = None
+
+
+# 프로세스 전역 NavigationGraph 반환 (최초 호출 시 로드)
+def get_navigation_graph(driver=None) -> NavigationGraph:
+    global _shared_graph
+    if _shared_graph is None:
+        _shared_graph = NavigationGraph(driver)
+    elif driver is not None and _shared_graph.driver is None:
+        _shared_graph.driver = driver
+        _shared_graph.version = None
+    _shared_graph.ensure_fresh()
+    return _shared_graph
+
+
+# Neo4j 그래프를 resource/graph_snapshot.json으로 내보내기
+if __name__ == "__main__":
+    from module.driver_registry import get_driver, close_drivers
+
+    driver = get_driver()
+    try:
+        graph = NavigationGraph(driver)
+        graph.load_from_neo4j()
+        graph.save_snapshot()
+        print(f"Snapshot saved to {graph.snapshot_path}")
+    finally:
+        close_drivers()
@@ -0,0 +1,96 @@
+from dotenv import load_dotenv
+import base64
+import os
+import sys
+
+import cv2
+
+"""
+VLM 이미지 전처리 모듈
+- 화면(RGB 배열)을 LLM에 보내기 전에 영역 자르기 -> 축소 -> JPEG/WebP 재인코딩
+  전체 해상도 PNG보다 업로드 크기와 모델 처리 시간이 크게 줄어듦
+- focus_region()은 대상 UIElement의 x, y(그래프 좌표)를 중심으로 한 관심 영역을 계산
+- 호출마다 이전 방식(전체 해상도 PNG) 대비 전송 크기 감소율을 출력
+
+환경 변수:
+- VLM_IMAGE_MAX_SIDE: 긴 변 최대 픽셀 (기본 1280, 0이면 축소하지 않음)
+- VLM_IMAGE_FORMAT: jpeg | webp | png (기본 jpeg)
+- VLM_IMAGE_QUALITY: JPEG/WebP 품질 (기본 85)
+- VLM_ROI_SIZE: 관심 영역 한 변 크기 (기본 640)
+- VLM_IMAGE_LOG_BASELINE: 0이면 비교용 전체 해상도 PNG 인코딩을 생략하고 전송 크기만 출력 (기본 1)
+"""
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+MAX_SIDE = int(os.getenv("VLM_IMAGE_MAX_SIDE", "1280"))
+IMAGE_FORMAT = os.getenv("VLM_IMAGE_FORMAT", "jpeg").lower()
+QUALITY = int(os.getenv("VLM_IMAGE_QUALITY", "85"))
+ROI_SIZE = int(os.getenv("VLM_ROI_SIZE", "640"))
+LOG_BASELINE = os.getenv("VLM_IMAGE_LOG_BASELINE", "1") != "0"
+
+# 형식 -> (확장자, MIME, 품질 옵션)
+FORMATS = {
+    "jpeg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+    "jpg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY),
+    "png": (".png", "image/png", None),
+}
+
+
+# (x, y)를 중심으로 한 size x size 관심 영역 (화면 밖으로 나가지 않도록 이동)
+# - 반환: (left, top, right, bottom), 좌표가 없으면 None
+def focus_region(shape, x, y, size=ROI_SIZE):
+    if x is None or y is None:
+        return None
+    height, width = shape[:2]
+    half_w, half_h = min(size, width) // 2, min(size, height) // 2
+    cx = min(max(int(x), half_w), width - half_w)
+    cy = min(max(int(y), half_h), height - half_h)
+    return cx - half_w, cy - half_h, cx + half_w, cy + half_h
+
+
+# 긴 변이 max_side 이하가 되도록 축소 (확대는 하지 않음)
+def downscale(image, max_side=MAX_SIDE):
+    height, width = image.shape[:2]
+    if not max_side or max(height, width) <= max_side:
+        return image
+    scale = max_side / max(height, width)
+    return cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+
+
+# RGB 배열 인코딩 (반환: 바이트, MIME)
+def encode(image, image_format=IMAGE_FORMAT, quality=QUALITY):
+    extension, mime, quality_flag = FORMATS.get(image_format, FORMATS["jpeg"])
+    params = [quality_flag, int(quality)] if quality_flag is not None else []
+    ok, encoded = cv2.imencode(extension, cv2.cvtColor(image, cv2.COLOR_RGB2BGR), params)
+    if not ok:
+        raise RuntimeError(f"failed to encode image as {image_format}")
+    return encoded.tobytes(), mime
+
+
+# 자르기 -> 축소 -> 재인코딩 후 LLM 이미지 입력용 data URL 반환
+# - region: (left, top, right, bottom) 관심 영역 (None이면 전체 화면)
+# - label: 로그에 표시할 호출 위치
+def prepare_image(image, region=None, max_side=MAX_SIDE, image_format=IMAGE_FORMAT,
+                  quality=QUALITY, label="vlm"):
+    height, width = image.shape[:2]
+    # 이전에 전송하던 전체 해상도 PNG 크기 (비교 로그용)
+    baseline = len(encode(image, "png")[0]) if LOG_BASELINE else None
+
+    processed = image
+    if region is not None:
+        left, top, right, bottom = (int(v) for v in region)
+        processed = processed[max(0, top):min(height, bottom), max(0, left):min(width, right)]
+    processed = downscale(processed, max_side)
+    data, mime = encode(processed, image_format, quality)
+
+    sent = f"{processed.shape[1]}x{processed.shape[0]} {mime.split('/')[1]} {len(data) / 1024:.0f}KB"
+    # verify_mcp는 stdout을 MCP stdio 통신에 사용하므로 stderr로 출력
+    if baseline:
+        reduction = 100 * (1 - len(data) / baseline)
+        print(f"[INFO] {label} image: {width}x{height} png {baseline / 1024:.0f}KB -> {sent} "
+              f"({reduction:.0f}% smaller)", file=sys.stderr)
+    else:
+        print(f"[INFO] {label} image: {width}x{height} -> {sent}", file=sys.stderr)
+    return f"data:{mime};base64," + base64.b64encode(data).decode("utf-8")
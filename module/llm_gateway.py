@@ -0,0 +1,428 @@
+from langchain_openai import ChatOpenAI
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from collections import deque
+from dotenv import load_dotenv
+import asyncio
+import atexit
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import weakref
+
+import httpx
+
+"""
+LLM Gateway 모듈
+- 모든 ChatOpenAI 객체를 이 모듈에서 만들고 (model, effort)별로 하나씩 공유
+  (모듈 import 시마다 / 호출마다 새로 만들지 않음)
+- (model, effort)별 httpx 연결 풀을 두고, 전송 계층(transport)에서 공통 정책 적용
+  - 동시 요청 수 제한 (동기 호출은 프로세스 전체 threading 세마포어,
+    비동기 호출은 이벤트 루프별 asyncio 세마포어 - 이벤트 루프를 막지 않고 대기)
+  - 선택적 초당 요청 수 제한 (token bucket, 기본 사용 안 함)
+  - 408 / 429 / 5xx / 네트워크 오류 / 타임아웃 시 지수 백오프 재시도 (Retry-After 반영, 전체 기한을 넘기지 않음)
+    (409 등 요청 내용 때문에 실패한 응답은 completion POST를 다시 보내지 않음)
+  - 선택적 hedged 요청: 응답이 hedge_after초 안에 오지 않으면 같은 요청을 한 번 더 보내 먼저 온 응답 사용
+  - 호출별 지연 시간 / 토큰 수 / 재시도 / hedge 통계 (프로세스 종료 시 stderr로 요약 출력)
+- ChatOpenAI 자체 재시도는 끄고(max_retries=0) 이 모듈에서만 재시도
+
+환경 변수:
+- LLM_MAX_CONCURRENCY: 동시 요청 수 (기본 8, 동기 호출 전체 / 이벤트 루프별 비동기 호출에 각각 적용)
+- LLM_RATE_PER_SECOND / LLM_RATE_BURST: 초당 요청 수 / 순간 허용량 (기본 0 = 제한 없음 / 5)
+- LLM_MAX_RETRIES: 최대 재시도 횟수 (기본 2)
+- LLM_ATTEMPT_TIMEOUT: 요청 한 번의 타임아웃(초) (기본 60)
+- LLM_REQUEST_DEADLINE: 재시도를 포함한 전체 기한(초) (기본 120)
+- LLM_HEDGE_AFTER: hedged 요청을 보낼 대기 시간(초) (기본 0 = 사용 안 함)
+- LLM_POOL_SIZE: (model, effort)별 최대 연결 수 (기본 10)
+"""
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+RATE_PER_SECOND = float(os.getenv("LLM_RATE_PER_SECOND", "0"))
+RATE_BURST = int(os.getenv("LLM_RATE_BURST", "5"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+ATTEMPT_TIMEOUT = float(os.getenv("LLM_ATTEMPT_TIMEOUT", "60"))
+REQUEST_DEADLINE = float(os.getenv("LLM_REQUEST_DEADLINE", "120"))
+HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))
+POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "10"))
+
+RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+RETRY_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# reasoning 모델 (responses API + reasoning effort 사용)
+REASONING_MODELS = ("gpt-5", "o1", "o3", "o4")
+
+
+class TokenBucket:
+    """
+    초당 요청 수 제한
+    - rate: 초당 토큰 충전 수 (0이면 제한 없음)
+    - burst: 최대 토큰 수
+    """
+
+    def __init__(self, rate=RATE_PER_SECOND, burst=RATE_BURST):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    # 토큰 하나를 예약하고 기다려야 하는 시간(초) 반환
+    def reserve(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class GatewayMetrics:
+    """
+    (model, effort) 하나의 호출 통계
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=1000)
+        self.counts = {
+            "calls": 0, "errors": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+            "input_tokens": 0, "output_tokens": 0,
+        }
+
+    def add(self, name, amount=1):
+        with self._lock:
+            self.counts[name] += amount
+
+    # 응답 하나 기록 (JSON 응답이면 usage에서 토큰 수 추출)
+    def record(self, latency, response):
+        input_tokens = output_tokens = 0
+        if "application/json" in response.headers.get("content-type", ""):
+            try:
+                usage = json.loads(response.content).get("usage") or {}
+                input_tokens = usage.get("input_tokens", usage.get("prompt_tokens", 0)) or 0
+                output_tokens = usage.get("output_tokens", usage.get("completion_tokens", 0)) or 0
+            except (ValueError, AttributeError, httpx.ResponseNotRead):
+                pass
+        with self._lock:
+            self.latencies.append(latency)
+            self.counts["calls"] += 1
+            self.counts["input_tokens"] += input_tokens
+            self.counts["output_tokens"] += output_tokens
+
+    def summary(self):
+        with self._lock:
+            samples = sorted(self.latencies)
+            result = dict(self.counts)
+        if samples:
+            result["p50_ms"] = round(statistics.median(samples) * 1000)
+            result["p95_ms"] = round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000)
+        return result
+
+
+# 요청 본문이 스트리밍 요청인지 여부 (스트리밍은 응답을 미리 읽을 수 없으므로 hedge 제외)
+def _is_stream(request):
+    try:
+        return bool(json.loads(request.content or b"{}").get("stream"))
+    except (ValueError, AttributeError, httpx.RequestNotRead):
+        return True
+
+
+# 재시도 대기 시간 (Retry-After 우선, 없으면 지수 백오프 + jitter)
+def _backoff(attempt, response):
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(BACKOFF_MAX, float(retry_after))
+            except ValueError:
+                pass
+    return min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)) * (0.5 + random.random() / 2)
+
+
+class LLMGateway:
+    """
+    LLMGateway 클래스
+    - max_concurrency: 동시 요청 수 (동기 호출 전체 / 이벤트 루프별 비동기 호출)
+    - bucket: 초당 요청 수 제한
+    - hedge_after: hedged 요청을 보낼 대기 시간(초), 0이면 사용 안 함
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, bucket=None, max_retries=MAX_RETRIES,
+                 deadline=REQUEST_DEADLINE, hedge_after=HEDGE_AFTER, pool_size=POOL_SIZE):
+        self.max_concurrency = max(1, max_concurrency)
+        self.semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._async_semaphores = weakref.WeakKeyDictionary() # 이벤트 루프 -> asyncio.Semaphore
+        self.bucket = bucket or TokenBucket()
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self.pool_size = pool_size
+        self.metrics = {}
+        self._models = {}
+        self._lock = threading.Lock()
+        self._executor = None # 동기 hedged 요청용 스레드 풀
+
+    # (model, effort)별 공유 ChatOpenAI
+    def chat_model(self, model, effort=None, verbosity="low"):
+        key = (model, effort)
+        with self._lock:
+            if key not in self._models:
+                self.metrics[key] = GatewayMetrics()
+                self._models[key] = self._build(model, effort, verbosity)
+            return self._models[key]
+
+    def _limits(self):
+        return httpx.Limits(
+            max_connections=self.pool_size,
+            max_keepalive_connections=self.pool_size,
+            keepalive_expiry=60,
+        )
+
+    def _build(self, model, effort, verbosity):
+        key = (model, effort)
+        proxy = os.getenv("HTTPS_PROXY") or os.getenv("https_proxy") or None
+        http_client = httpx.Client(
+            transport=_GatewayTransport(self, key, httpx.HTTPTransport(limits=self._limits(), proxy=proxy)),
+            timeout=ATTEMPT_TIMEOUT,
+        )
+        http_async_client = httpx.AsyncClient(
+            transport=_AsyncGatewayTransport(self, key, httpx.AsyncHTTPTransport(limits=self._limits(), proxy=proxy)),
+            timeout=ATTEMPT_TIMEOUT,
+        )
+        options = {
+            "model": model,
+            "api_key": os.getenv("OPENAI_API_KEY"),
+            "http_client": http_client,
+            "http_async_client": http_async_client,
+            "max_retries": 0,
+            "timeout": ATTEMPT_TIMEOUT,
+        }
+        if model.startswith(REASONING_MODELS):
+            extra_body = {"text": {"verbosity": verbosity}}
+            if effort:
+                extra_body["reasoning"] = {"effort": effort}
+            options.update(use_responses_api=True, output_version="responses/v1", extra_body=extra_body)
+        return ChatOpenAI(**options)
+
+    # 응답을 끝까지 읽은 뒤 반환 (hedge 경쟁용)
+    @staticmethod
+    def _read(transport, request):
+        response = transport.handle_request(request)
+        try:
+            response.read()
+        except Exception:
+            response.close()
+            raise
+        return response
+
+    @staticmethod
+    def _discard(future):
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+
+    # hedge_after초 안에 응답이 없으면 같은 요청을 한 번 더 보내고 먼저 성공한 응답 사용
+    # - 스트리밍이 아닌 응답은 본문까지 읽어서 반환 (토큰 수 기록)
+    def _send_hedged(self, key, transport, request):
+        if _is_stream(request):
+            return transport.handle_request(request)
+        if self.hedge_after <= 0:
+            return self._read(transport, request)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=max(2, self.pool_size), thread_name_prefix="llm-hedge")
+        futures = [self._executor.submit(self._read, transport, request)]
+        done, _ = wait(futures, timeout=self.hedge_after)
+        if not done:
+            self.metrics[key].add("hedges")
+            futures.append(self._executor.submit(self._read, transport, request))
+
+        pending = set(futures)
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.add_done_callback(self._discard)
+                    if len(futures) > 1 and future is futures[1]:
+                        self.metrics[key].add("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    # 동기 요청: token bucket -> semaphore -> (hedged) 전송 -> 재시도
+    def send(self, key, transport, request):
+        metrics = self.metrics[key]
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            time.sleep(self.bucket.reserve())
+            response, error = None, None
+            with self.semaphore:
+                started = time.monotonic()
+                try:
+                    response = self._send_hedged(key, transport, request)
+                except RETRY_ERRORS as e:
+                    error = e
+            latency = time.monotonic() - started
+
+            if response is not None and response.status_code not in RETRY_STATUS:
+                metrics.record(latency, response)
+                return response
+
+            delay = _backoff(attempt, response)
+            if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                metrics.add("errors")
+                if response is not None:
+                    return response
+                raise error
+            if response is not None:
+                response.close()
+            metrics.add("retries")
+            attempt += 1
+            time.sleep(delay)
+
+    # 현재 이벤트 루프의 asyncio 세마포어 (루프마다 하나)
+    def _async_semaphore(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._async_semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._async_semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+            return semaphore
+
+    # 비동기 버전
+    @staticmethod
+    async def _aread(transport, request):
+        response = await transport.handle_async_request(request)
+        try:
+            await response.aread()
+        except BaseException:
+            await response.aclose()
+            raise
+        return response
+
+    async def _asend_hedged(self, key, transport, request):
+        if _is_stream(request):
+            return await transport.handle_async_request(request)
+        if self.hedge_after <= 0:
+            return await self._aread(transport, request)
+        tasks = [asyncio.ensure_future(self._aread(transport, request))]
+        done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+        if not done:
+            self.metrics[key].add("hedges")
+            tasks.append(asyncio.ensure_future(self._aread(transport, request)))
+
+        pending = set(tasks)
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if len(tasks) > 1 and task is tasks[1]:
+                            self.metrics[key].add("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def asend(self, key, transport, request):
+        metrics = self.metrics[key]
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            await asyncio.sleep(self.bucket.reserve())
+            response, error = None, None
+            async with self._async_semaphore():
+                started = time.monotonic()
+                try:
+                    response = await self._asend_hedged(key, transport, request)
+                except RETRY_ERRORS as e:
+                    error = e
+            latency = time.monotonic() - started
+
+            if response is not None and response.status_code not in RETRY_STATUS:
+                metrics.record(latency, response)
+                return response
+
+            delay = _backoff(attempt, response)
+            if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                metrics.add("errors")
+                if response is not None:
+                    return response
+                raise error
+            if response is not None:
+                await response.aclose()
+            metrics.add("retries")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    # (model, effort)별 통계
+    def summary(self):
+        with self._lock:
+            items = list(self.metrics.items())
+        return {f"{model}/{effort or '-'}": metrics.summary() for (model, effort), metrics in items}
+
+    # 호출이 있었으면 통계 출력 (MCP 서버는 stdout을 통신에 사용하므로 stderr)
+    def print_summary(self):
+        for name, summary in self.summary().items():
+            if summary["calls"] or summary["errors"]:
+                print(f"[INFO] LLM {name}: {summary}", file=sys.stderr)
+
+
+class _GatewayTransport(httpx.BaseTransport):
+    def __init__(self, gateway, key, transport):
+        self.gateway = gateway
+        self.key = key
+        self.transport = transport
+
+    def handle_request(self, request):
+        return self.gateway.send(self.key, self.transport, request)
+
+    def close(self):
+        self.transport.close()
+
+
+class _AsyncGatewayTransport(httpx.AsyncBaseTransport):
+    def __init__(self, gateway, key, transport):
+        self.gateway = gateway
+        self.key = key
+        self.transport = transport
+
+    async def handle_async_request(self, request):
+        return await self.gateway.asend(self.key, self.transport, request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+# 프로세스 공유 LLMGateway
+def get_gateway() -> LLMGateway:
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+            atexit.register(_gateway.print_summary)
+        return _gateway
+
+
+# 공유 ChatOpenAI 반환 (예: get_chat_model("gpt-5", effort="low"))
+def get_chat_model(model, effort=None, verbosity="low") -> ChatOpenAI:
+    return get_gateway().chat_model(model, effort, verbosity)
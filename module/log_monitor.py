@@ -1,8 +1,39 @@
+from module.adb_client import get_adb_client
+from module.settle import APP_PACKAGE
 import re
 from datetime import datetime, timedelta
 from pathlib import Path
 from collections import deque
 from datetime import datetime, timedelta
+from itertools import islice
+import argparse
+import os
+import queue
+import subprocess
+import threading
+import time
+
+# 화면 전환을 나타내는 로그 키워드
+TRANSITION_KEYWORDS = ("StartFragment :",)
+# 로그가 들어올 때마다 가장 최근 일치 줄을 기록해 두는 키워드 (save_log에서 조회)
+INDEXED_KEYWORDS = ("[Msg]", "Toast.Show", "StartFragment :")
+# 오래된 로그 정리 간격(초) - 줄마다 정리하지 않고 모아서 정리
+CLEAN_INTERVAL = 1.0
+
+# logcat 파이프 읽기 단위와 읽기 -> 파싱 스레드 사이 대기열 크기 (약 CHUNK_SIZE x CHUNK_QUEUE_SIZE 바이트)
+CHUNK_SIZE = 64 * 1024
+CHUNK_QUEUE_SIZE = 256
+# 파싱이 밀려 대기열이 가득 차면 이 시간(초)만큼 읽기를 멈추고(backpressure), 그래도 가득 차 있으면 버림
+BACKPRESSURE_TIMEOUT = 0.5
+
+# "-v time" 시간 형식: "07-10 14:32:01.410 ..." (초 단위 앞부분이 바뀔 때만 검사)
+TIMESTAMP_PATTERN = re.compile(r"\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}")
+TIMESTAMP_LENGTH = 18
+SECOND_PREFIX_LENGTH = 14 # "MM-DD HH:MM:SS"
+MAX_CACHED_SECONDS = 4096
+# 앱 pid를 아직 모를 때 pidof를 다시 조회하는 최소 간격(초)
+PID_REFRESH_INTERVAL = 5.0
+
 
 class InMemoryLogMonitor:
     """
@@ -10,15 +41,48 @@ class InMemoryLogMonitor:
     - adb logcat을 통해 안드로이드 디바이스 로그를 실시간으로 가져와 메모리 버퍼에 저장
     - 최근 N분간의 로그만 유지
     - 키워드 검색 및 특정 로그 저장 기능 제공
+    - mark() / wait_for() / wait_until_settled(): 고정 sleep 대신 새 로그가 들어올 때까지 대기
+      wait_until_settled()는 앱 프로세스(app_package의 pid)의 로그만 보고 판단
+      (다른 프로세스의 시스템 로그는 계속 들어오므로 조용한 구간 판단에서 제외)
+      pid는 시작 시 pidof로 조회하고, 앱이 다시 실행되면 ActivityManager의 "Start proc" 로그로 갱신
+    - 등록된 키워드(INDEXED_KEYWORDS)는 로그가 들어올 때 최근 일치 줄을 기록하므로 search()가 버퍼를 훑지 않음
+    - 수집 경로: 읽기 스레드가 파이프를 CHUNK_SIZE 단위로 읽어 대기열에 넣고,
+      파싱 스레드가 chunk 단위로 줄을 나누고 시간을 파싱한 뒤 한 번의 lock으로 버퍼에 추가
+      (대기열이 가득 차 버린 줄 수는 dropped_lines)
     """
-    def __init__(self, buffer_max_minutes=10):
+    def __init__(self, buffer_max_minutes=10, keywords=INDEXED_KEYWORDS, app_package=APP_PACKAGE):
         self.process = None
         self.thread = None
+        self.reader_thread = None
         self._running = False
         self.log_buffer = deque()
         self.start_time = None
         self.buffer_max_minutes = buffer_max_minutes
-        self.current_year = datetime.now().year
+        # 새 로그 알림용 (line_count: 지금까지 추가된 로그 수, last_line_at: 마지막 로그 수신 시각)
+        self._condition = threading.Condition()
+        self.line_count = 0
+        self.last_line_at = time.monotonic()
+        # 키워드(소문자) -> (로그 번호, 시간, 로그), evicted_count: 버퍼에서 제거된 로그 수
+        self._latest = {}
+        self._keyword_pattern = None
+        self.evicted_count = 0
+        self._last_clean = time.monotonic()
+        # "MM-DD HH:MM:SS" -> 연도를 보정한 datetime (같은 초의 로그는 다시 계산하지 않음)
+        self._second_cache = {}
+        self._chunks = None
+        self.dropped_lines = 0
+        self.dropped_chunks = 0
+        # 앱 프로세스 pid와 앱 로그 위치 (app_line_number: 마지막 앱 로그의 로그 번호)
+        self.app_package = app_package
+        self.app_pids = set()
+        self.app_line_number = 0
+        self.app_last_line_at = self.last_line_at
+        self._pid_checked_at = None
+        self._start_proc_pattern = re.compile(
+            r"Start proc (\d+):" + re.escape(app_package) + r"(:[\w.]+)?/"
+        )
+        for keyword in keywords:
+            self.register_keyword(keyword)
         print("LogMonitor initialized (in-memory buffer mode).")
 
     # 로그 모니터 시작 시간 설정
@@ -28,81 +92,337 @@ class InMemoryLogMonitor:
 
     # adb logcat 실행 후 별도 스레드에서 로그를 메모리 버퍼에 저장
     def start_monitoring(self):
-        import subprocess
         self.process = subprocess.Popen(
             ["adb", "logcat", "-v", "time", "*:I"],
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            encoding="utf-8"
+            bufsize=0
         )
         self._running = True
-        import threading
+        self._chunks = queue.Queue(maxsize=CHUNK_QUEUE_SIZE)
+        self.reader_thread = threading.Thread(target=self._read_chunks, daemon=True)
         self.thread = threading.Thread(target=self._buffer_logs, daemon=True)
         self.thread.start()
+        self.reader_thread.start()
+        self.refresh_app_pids()
         print("LogMonitor: Started log buffering in memory.")
 
-    # 별도 스레드에서 로그 읽기
+    # 앱 프로세스 pid 조회 (pidof), 앱이 실행 중이 아니면 빈 집합
+    def refresh_app_pids(self):
+        self._pid_checked_at = time.monotonic()
+        try:
+            output = get_adb_client().shell(f"pidof {self.app_package}")
+        except Exception as e:
+            print(f"[WARN] LogMonitor: failed to read the app pid: {e}")
+            return self.app_pids
+        pids = {int(pid) for pid in output.split() if pid.isdigit()}
+        with self._condition:
+            self.app_pids = pids
+        return pids
+
+    # "-v time" 로그 줄의 pid ("MM-DD HH:MM:SS.mmm I/Tag( 1234): ..."), 없으면 None
+    @staticmethod
+    def _line_pid(line):
+        close = line.find("):", TIMESTAMP_LENGTH)
+        if close < 0:
+            return None
+        pid = line[line.rfind("(", 0, close) + 1:close].strip()
+        return int(pid) if pid.isdigit() else None
+
+    # 별도 스레드에서 logcat 출력을 chunk 단위로 읽어 대기열에 추가
+    def _read_chunks(self):
+        fd = self.process.stdout.fileno()
+        resync = b""
+        try:
+            while self._running:
+                chunk = os.read(fd, CHUNK_SIZE)
+                if not chunk:
+                    break
+                chunk = resync + chunk
+                resync = b""
+                try:
+                    self._chunks.put(chunk, timeout=BACKPRESSURE_TIMEOUT)
+                except queue.Full:
+                    self.dropped_chunks += 1
+                    self.dropped_lines += chunk.count(b"\n")
+                    if self.dropped_chunks == 1 or self.dropped_chunks % 100 == 0:
+                        print(f"[WARN] LogMonitor: parser is falling behind, "
+                              f"{self.dropped_lines} lines dropped so far.")
+                    # 버린 chunk의 마지막 조각은 다음 chunk와 이어지므로 줄바꿈을 붙여 다음 chunk 앞에 유지
+                    resync = b"\n" + chunk[chunk.rfind(b"\n") + 1:]
+        except OSError as e:
+            if self._running:
+                print(f"LogMonitor ERROR: {e}")
+        finally:
+            while self.thread.is_alive():
+                try:
+                    self._chunks.put(None, timeout=BACKPRESSURE_TIMEOUT)
+                    break
+                except queue.Full:
+                    continue
+
+    # 별도 스레드에서 대기열의 chunk를 파싱하여 버퍼에 추가
     def _buffer_logs(self):
+        pending = b""
         try:
-            for line in iter(self.process.stdout.readline, ''):
-                if not self._running:
+            while True:
+                chunk = self._chunks.get()
+                if chunk is None or not self._running:
                     break
-                cleaned_line = line.strip()
-                if cleaned_line:
-                    # logcat 시간 추출: 예시 => "07-10 14:32:01.410"
-                    timestamp_match = re.match(r"^(\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3})", cleaned_line)
-                    if timestamp_match:
-                        log_time_str = timestamp_match.group(1)
-                        try:
-                            # 현재 연도 보정
-                            timestamp = datetime.strptime(f"{self.current_year}-{log_time_str}", "%Y-%m-%d %H:%M:%S.%f")
-                        except ValueError:
-                            timestamp = datetime.now()  # 파싱 실패 시 fallback
-                    else:
-                        timestamp = datetime.now()  # 시간 형식 없을 경우 fallback
-
-                    self.log_buffer.append((timestamp, cleaned_line))
-                    self._clean_old_logs()
+                pending = self._ingest_chunk(pending + chunk)
         except Exception as e:
             print(f"LogMonitor ERROR: {e}")
         finally:
             self._running = False
+            with self._condition:
+                self._condition.notify_all()
             print("LogMonitor: Buffering stopped.")
 
+    # 키워드 사전 검사용 정규식 (등록된 키워드 중 하나라도 포함하는지)
+    def _build_keyword_pattern(self):
+        keywords = sorted(self._latest, key=len, reverse=True)
+        self._keyword_pattern = re.compile("|".join(map(re.escape, keywords))) if keywords else None
+
+    # logcat 시간을 연도까지 보정하여 datetime으로 변환 (형식이 다르면 None)
+    # - strptime 대신 고정 위치 슬라이스로 파싱하고, 같은 초는 캐시한 값에 밀리초만 더함
+    # - 연도가 없으므로 현재 연도로 계산하되, 현재보다 하루 이상 미래면 작년 로그로 판단 (연말 -> 연초)
+    def _parse_timestamp(self, line):
+        if len(line) < TIMESTAMP_LENGTH or line[14] != ".":
+            return None
+        prefix = line[:SECOND_PREFIX_LENGTH]
+        base = self._second_cache.get(prefix)
+        if base is None:
+            if not TIMESTAMP_PATTERN.match(line):
+                return None
+            now = datetime.now()
+            try:
+                base = datetime(now.year, int(line[0:2]), int(line[3:5]),
+                                int(line[6:8]), int(line[9:11]), int(line[12:14]))
+                if base - now > timedelta(days=1):
+                    base = base.replace(year=now.year - 1)
+            except ValueError:
+                return None
+            if len(self._second_cache) >= MAX_CACHED_SECONDS:
+                self._second_cache.clear()
+            self._second_cache[prefix] = base
+        millis = line[15:18]
+        if not millis.isdigit():
+            return None
+        return base + timedelta(milliseconds=int(millis))
+
+    # chunk 하나를 줄 단위로 파싱하여 버퍼에 추가 (반환: 줄바꿈이 없는 마지막 조각)
+    def _ingest_chunk(self, data: bytes) -> bytes:
+        end = data.rfind(b"\n")
+        if end < 0:
+            return data
+        text = data[:end].decode("utf-8", "replace")
+        pattern = self._keyword_pattern
+        keywords = tuple(self._latest)
+        now = None
+        entries = []
+        for raw in text.split("\n"):
+            line = raw.strip()
+            if not line:
+                continue
+            timestamp = self._parse_timestamp(line)
+            if timestamp is None:
+                # 시간 형식이 없거나 파싱 실패 시 수신 시각 사용
+                now = now or datetime.now()
+                timestamp = now
+            matched = ()
+            if pattern is not None:
+                lowered = line.lower()
+                # 키워드가 없는 대부분의 줄은 정규식 한 번으로 건너뜀
+                if pattern.search(lowered):
+                    matched = [keyword for keyword in keywords if keyword in lowered]
+            entries.append((timestamp, line, matched))
+
+        if entries:
+            with self._condition:
+                app_line = False
+                for timestamp, line, matched in entries:
+                    self.log_buffer.append((timestamp, line))
+                    self.line_count += 1
+                    for keyword in matched:
+                        self._latest[keyword] = (self.line_count, timestamp, line)
+                    if "Start proc " in line:
+                        self._update_app_pids(line)
+                    if self._line_pid(line) in self.app_pids:
+                        self.app_line_number = self.line_count
+                        app_line = True
+                self.last_line_at = time.monotonic()
+                if app_line:
+                    self.app_last_line_at = self.last_line_at
+                if self.last_line_at - self._last_clean >= CLEAN_INTERVAL:
+                    self._clean_old_logs()
+                self._condition.notify_all()
+        return data[end + 1:]
+
+    # 앱이 (다시) 실행되면 새 pid로 갱신 (같은 패키지의 ":service" 등 보조 프로세스는 추가)
+    def _update_app_pids(self, line):
+        match = self._start_proc_pattern.search(line)
+        if match is None:
+            return
+        pid = int(match.group(1))
+        if match.group(2):
+            self.app_pids = self.app_pids | {pid}
+        else:
+            self.app_pids = {pid}
+
+    # 버퍼에 남아 있어야 하는 로그인지 여부 (start_time 이후, 최근 buffer_max_minutes분 이내)
+    def _is_fresh(self, timestamp, threshold):
+        return not (self.start_time and timestamp < self.start_time) and timestamp >= threshold
+
     # log_buffer에서 오래된 로그 제거
     def _clean_old_logs(self):
         now = datetime.now()
         threshold = now - timedelta(minutes=self.buffer_max_minutes)
         while self.log_buffer:
             timestamp, _ = self.log_buffer[0]
-            if(self.start_time and timestamp < self.start_time) or timestamp < threshold:
+            if not self._is_fresh(timestamp, threshold):
                 self.log_buffer.popleft()
+                self.evicted_count += 1
             else:
                 break
+        self._last_clean = time.monotonic()
+
+    # 키워드를 최근 일치 인덱스에 등록 (현재 버퍼에서 한 번만 검색)
+    def register_keyword(self, keyword: str):
+        key = keyword.lower()
+        with self._condition:
+            if key in self._latest:
+                return
+            self._latest[key] = None
+            self._build_keyword_pattern()
+            start = self.line_count - len(self.log_buffer)
+            for offset, (timestamp, line) in enumerate(self.log_buffer):
+                if key in line.lower():
+                    self._latest[key] = (start + offset + 1, timestamp, line)
 
     # 로그 모니터 종료 및 스레드 정리
     def stop_monitoring(self):
         if self.process:
             self._running = False
             self.process.terminate()
+            self.reader_thread.join(timeout=5)
             self.thread.join(timeout=5)
+            if self.dropped_lines:
+                print(f"[WARN] LogMonitor: {self.dropped_lines} lines were dropped while the parser was behind.")
             print("LogMonitor: Monitoring stopped and cleaned up.")
 
     # 현재 메모리 버퍼에 있는 로그 리스트 반환
     def get_logs(self) -> list[str]:
-        self._clean_old_logs()
-        return [line for _, line in self.log_buffer]
+        with self._condition:
+            self._clean_old_logs()
+            return [line for _, line in self.log_buffer]
 
     # 버퍼에서 특정 키워드 포함하는 가장 최근 로그 한 줄 검색
+    # - 등록된 키워드는 인덱스에서 바로 반환 (버퍼에서 제거되었거나 오래된 줄이면 None)
+    # - 등록되지 않은 키워드는 버퍼를 최근 순으로 검색
     def search(self, keyword: str) -> str | None:
-        self._clean_old_logs()
-        for _, line in reversed(self.log_buffer):
-            if keyword.lower() in line.lower():
+        key = keyword.lower()
+        threshold = datetime.now() - timedelta(minutes=self.buffer_max_minutes)
+        with self._condition:
+            if key in self._latest:
+                entry = self._latest[key]
+                if entry is None:
+                    return None
+                number, timestamp, line = entry
+                if number <= self.evicted_count or not self._is_fresh(timestamp, threshold):
+                    return None
                 return line
+
+            self._clean_old_logs()
+            for _, line in reversed(self.log_buffer):
+                if key in line.lower():
+                    return line
         return None
     
+    # 로그 모니터가 동작 중인지 여부
+    @property
+    def running(self):
+        return self._running
+
+    # 현재까지 들어온 로그 위치 (wait_for / wait_until_settled의 기준점)
+    def mark(self) -> int:
+        with self._condition:
+            return self.line_count
+
+    # since 이후 들어온 로그 중 키워드를 포함하는 첫 줄 (없으면 None)
+    # - 모든 키워드가 인덱스에 있고 since 이후 일치한 적이 없으면 버퍼를 훑지 않음
+    def _find_since(self, since, keywords):
+        entries = [self._latest.get(keyword.lower(), False) for keyword in keywords]
+        if all(entry is not False for entry in entries) \
+                and all(entry is None or entry[0] <= since for entry in entries):
+            return None
+        new_count = min(self.line_count - since, len(self.log_buffer))
+        new_lines = list(islice(reversed(self.log_buffer), new_count))
+        for _, line in reversed(new_lines):
+            lowered = line.lower()
+            if any(keyword.lower() in lowered for keyword in keywords):
+                return line
+        return None
+
+    # since 이후 키워드를 포함하는 로그가 들어올 때까지 대기 (timeout 초과 시 None)
+    def wait_for(self, keywords, since=None, timeout=3.0) -> str | None:
+        if isinstance(keywords, str):
+            keywords = (keywords,)
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            since = self.line_count if since is None else since
+            while True:
+                line = self._find_since(since, keywords)
+                if line is not None:
+                    return line
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    return None
+                self._condition.wait(remaining)
+
+    # 마지막 로그의 (로그 번호, 수신 시각), app_only면 앱 프로세스 로그 기준
+    def _latest_line(self, app_only):
+        if app_only:
+            return self.app_line_number, self.app_last_line_at
+        return self.line_count, self.last_line_at
+
+    # 동작 후 화면이 안정될 때까지 대기
+    # - since 이후 첫 로그를 first_log_timeout까지 기다리고(없으면 변화 없음으로 판단),
+    #   expect_transition이면 전환 로그(StartFragment)를 기다린 뒤,
+    #   quiet초 동안 새 로그가 없으면 안정된 것으로 판단
+    # - 앱 pid를 알면 앱 프로세스의 로그만 보고, 모르면(pidof 실패 등) 모든 로그로 판단
+    # - 모니터가 동작 중이 아니면 fallback초만큼 sleep
+    # - 반환: 대기한 시간(초)
+    def wait_until_settled(self, since=None, expect_transition=False, quiet=0.3,
+                           first_log_timeout=0.5, timeout=3.0, fallback=0.5) -> float:
+        started = time.monotonic()
+        if not self._running:
+            time.sleep(fallback)
+            return time.monotonic() - started
+        if not self.app_pids and (self._pid_checked_at is None
+                                  or started - self._pid_checked_at >= PID_REFRESH_INTERVAL):
+            self.refresh_app_pids()
+
+        deadline = started + timeout
+        with self._condition:
+            app_only = bool(self.app_pids)
+            since = self.line_count if since is None else since
+            first_deadline = min(deadline, started + first_log_timeout)
+            while self._latest_line(app_only)[0] <= since and time.monotonic() < first_deadline:
+                self._condition.wait(first_deadline - time.monotonic())
+            if self._latest_line(app_only)[0] <= since:
+                return time.monotonic() - started
+
+        if expect_transition:
+            self.wait_for(TRANSITION_KEYWORDS, since, max(0.0, deadline - time.monotonic()))
+
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                quiet_until = self._latest_line(app_only)[1] + quiet
+                if now >= quiet_until or now >= deadline:
+                    return now - started
+                self._condition.wait(min(quiet_until, deadline) - now)
+
     # 특정 키워드 로그 추출한 후 log_info.txt에 저장
     def save_log(self):
         logs = []
@@ -121,4 +441,58 @@ class InMemoryLogMonitor:
                 for log_entry in logs:
                     f.write(log_entry + "\n")
         except IOError as e:
-            print(f"파일 작성 중 오류가 발생했습니다: {e}")
\ No newline at end of file
+            print(f"파일 작성 중 오류가 발생했습니다: {e}")
+
+
+# 기존 방식(줄마다 re.match + strptime + 정리)으로 같은 로그를 수집 (벤치마크 비교용)
+def _legacy_ingest(monitor, data: bytes):
+    year = datetime.now().year
+    for raw in data.decode("utf-8", "replace").split("\n"):
+        cleaned_line = raw.strip()
+        if not cleaned_line:
+            continue
+        timestamp_match = re.match(r"^(\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3})", cleaned_line)
+        try:
+            timestamp = datetime.strptime(f"{year}-{timestamp_match.group(1)}", "%Y-%m-%d %H:%M:%S.%f")
+        except (AttributeError, ValueError):
+            timestamp = datetime.now()
+        with monitor._condition:
+            monitor.log_buffer.append((timestamp, cleaned_line))
+            monitor.line_count += 1
+            monitor._clean_old_logs()
+            monitor._condition.notify_all()
+
+
+# 녹화한 logcat 출력(adb logcat -v time > capture.txt)을 재생하여 초당 처리 줄 수 측정
+# 예: python -m module.log_monitor capture.txt --repeat 5
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="logcat ingestion benchmark (recorded capture replay)")
+    parser.add_argument("capture", help="adb logcat -v time 출력 파일")
+    parser.add_argument("--repeat", type=int, default=1, help="재생 횟수")
+    args = parser.parse_args()
+
+    data = Path(args.capture).read_bytes()
+    if not data.endswith(b"\n"):
+        data += b"\n"
+    total_lines = sum(1 for line in data.split(b"\n") if line.strip()) * args.repeat
+    # 녹화 시점의 로그도 버퍼에 남도록 보관 시간을 충분히 길게 설정
+    keep_minutes = 60 * 24 * 366
+
+    legacy = InMemoryLogMonitor(buffer_max_minutes=keep_minutes)
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        _legacy_ingest(legacy, data)
+    legacy_elapsed = time.perf_counter() - started
+
+    fast = InMemoryLogMonitor(buffer_max_minutes=keep_minutes)
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        pending = b""
+        for offset in range(0, len(data), CHUNK_SIZE):
+            pending = fast._ingest_chunk(pending + data[offset:offset + CHUNK_SIZE])
+    fast_elapsed = time.perf_counter() - started
+
+    print(f"lines          : {total_lines}")
+    print(f"readline+strptime: {legacy_elapsed:.3f}s ({total_lines / legacy_elapsed:,.0f} lines/s)")
+    print(f"chunked        : {fast_elapsed:.3f}s ({total_lines / fast_elapsed:,.0f} lines/s)")
+    print(f"buffered lines : {len(legacy.log_buffer)} / {len(fast.log_buffer)}")
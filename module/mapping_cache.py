@@ -0,0 +1,149 @@
+from pathlib import Path
+from dotenv import load_dotenv
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+"""
+MappingCache 모듈
+- LLMCanonicalMapper의 LLM 결과를 SQLite에 저장하여 같은 step이 반복되는 회귀 테스트에서 재사용
+- 키: (step_text, current_screen, user_input, expected_result, alias 파일 버전, 그래프 버전)의 해시
+  app.py 편집기가 alias 파일이나 노드를 수정하면 버전이 바뀌므로 이전 결과는 더 이상 조회되지 않고,
+  버전이 바뀐 것을 처음 확인할 때 이전 버전의 항목을 삭제
+- TTL이 지난 항목은 조회하지 않고, 최대 개수를 넘으면 가장 오래 사용하지 않은 항목부터 삭제(LRU)
+
+환경 변수:
+- MAPPING_CACHE_PATH: SQLite 파일 경로 (기본 resource/mapping_cache.sqlite3)
+- MAPPING_CACHE_TTL_SECONDS: 항목 유효 시간 (기본 7일)
+- MAPPING_CACHE_MAX_ENTRIES: 최대 항목 수 (기본 5000)
+"""
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+MAPPING_CACHE_PATH = Path(
+    os.getenv("MAPPING_CACHE_PATH")
+    or Path(__file__).resolve().parent.parent / "resource" / "mapping_cache.sqlite3"
+)
+TTL_SECONDS = float(os.getenv("MAPPING_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+MAX_ENTRIES = int(os.getenv("MAPPING_CACHE_MAX_ENTRIES", "5000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mappings (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS mappings_last_used ON mappings (last_used);
+"""
+
+
+class MappingCache:
+    """
+    MappingCache 클래스
+    - path: SQLite 파일 경로
+    - ttl: 항목 유효 시간(초)
+    - max_entries: 최대 항목 수
+    """
+
+    def __init__(self, path=MAPPING_CACHE_PATH, ttl=TTL_SECONDS, max_entries=MAX_ENTRIES):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._version = None
+        # resolve()가 asyncio.to_thread로 여러 스레드에서 호출되므로 연결 하나를 lock으로 보호
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    # 캐시 키 생성
+    @staticmethod
+    def make_key(version, step_text, current_screen, user_input, expected_result):
+        raw = json.dumps(
+            [version, step_text, current_screen, user_input, expected_result],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # 버전이 바뀌었으면 이전 버전 항목 삭제
+    def _check_version(self, version):
+        if version == self._version:
+            return
+        cur = self._conn.execute("DELETE FROM mappings WHERE version != ?", (version,))
+        self.evictions += cur.rowcount
+        self._conn.commit()
+        self._version = version
+
+    # 캐시 조회 (없거나 만료되었으면 None)
+    def get(self, version, step_text, current_screen, user_input, expected_result):
+        key = self.make_key(version, step_text, current_screen, user_input, expected_result)
+        now = time.time()
+        with self._lock:
+            self._check_version(version)
+            row = self._conn.execute(
+                "SELECT result, created_at FROM mappings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM mappings WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self.evictions += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE mappings SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    # 캐시 저장 (최대 개수를 넘으면 LRU 삭제)
+    def put(self, version, step_text, current_screen, user_input, expected_result, result):
+        key = self.make_key(version, step_text, current_screen, user_input, expected_result)
+        now = time.time()
+        with self._lock:
+            self._check_version(version)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO mappings (key, version, result, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, version, json.dumps(result, ensure_ascii=False), now, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM mappings").fetchone()[0]
+            if count > self.max_entries:
+                cur = self._conn.execute(
+                    "DELETE FROM mappings WHERE key IN "
+                    "(SELECT key FROM mappings ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+                self.evictions += cur.rowcount
+            self._conn.commit()
+
+    # 전체 삭제
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM mappings")
+            self._conn.commit()
+
+    # 적중률 통계
+    def stats(self):
+        total = self.hits + self.misses
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM mappings").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": size,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,4 +1,5 @@
-from neo4j import GraphDatabase
+from module.driver_registry import get_driver, get_async_driver
+from neo4j.exceptions import ServiceUnavailable
 import re
 import os
 from dotenv import load_dotenv
@@ -8,8 +9,17 @@ Neo4jHandler 클래스
 - Neo4j 데이터베이스에 접속하여 Cypher 쿼리 실행
 - UI Element와 Screen 간 관계를 조회하고 마지막 클릭 UI Element의 trigger 확인 가능
 
+AsyncNeo4jHandler 클래스
+- Neo4jHandler와 같은 API를 AsyncGraphDatabase 기반 코루틴으로 제공
+- asyncio step 파이프라인에서 이벤트 루프를 막지 않고 Neo4j 조회 가능
+
 주요 메서드:
 - execute_cypher(): 설정된 Cypher 쿼리 실행
+- explain(): 설정된 Cypher 쿼리를 실행하지 않고 EXPLAIN으로 검증
+- run_template(): 이름 있는 파라미터 Cypher 템플릿 실행
+- run_transaction(): 여러 템플릿 쿼리를 하나의 쓰기 트랜잭션으로 실행
+- ensure_schema(): Screen/UIElement/Tap/Hold의 name 유니크 제약(또는 인덱스) 생성 및 현황 출력
+- warm_up(): 모든 템플릿을 EXPLAIN으로 미리 컴파일하여 쿼리 플랜 캐시 채우기
 - check_trigger(): 마지막으로 클릭한 UI Element의 trigger 정보 확인
 - get_current_screen(): 특정 노드에서 가장 가까운 화면 조회
 """
@@ -17,18 +27,197 @@ Neo4jHandler 클래스
 # .env 파일에서 환경 변수 로드
 load_dotenv()
 
+NODE_LABELS = ("Screen", "UIElement", "Tap", "Hold")
+MAIN_SCREENS = ("Home", "Settings", "Run", "Move", "System", "Program")
+RELATIONSHIP_TYPES = ("CONTAINS", "TRIGGERS", "LEADS_TO")
+
+# (source label, 관계 타입, target label) 허용 조합
+RELATIONSHIP_RULES = (
+    ("Screen", "CONTAINS", "UIElement"),
+    ("UIElement", "TRIGGERS", "UIElement"),
+    ("UIElement", "TRIGGERS", "Tap"),
+    ("UIElement", "TRIGGERS", "Hold"),
+    ("Tap", "LEADS_TO", "Screen"),
+    ("Hold", "LEADS_TO", "Screen"),
+)
+
+# 이름 있는 Cypher 템플릿
+# - 값은 모두 $파라미터로 전달하므로 같은 템플릿은 항상 같은 쿼리 텍스트가 되어 플랜 캐시를 재사용
+# - Cypher는 label/관계 타입을 파라미터로 받을 수 없으므로 {label}, {source}, {target}, {rel}만
+#   허용된 값(NODE_LABELS, RELATIONSHIP_TYPES)으로 치환
+# - name으로 노드를 찾는 패턴은 모두 label을 붙여 name 인덱스(ensure_schema)를 사용
+QUERY_TEMPLATES = {
+    "node_exists": """
+    MATCH (n:{label} {{name: $name}})
+    RETURN n LIMIT 1
+    """,
+    "node_label": """
+    MATCH (n:Screen {{name: $name}}) RETURN "Screen" AS label
+    UNION
+    MATCH (n:UIElement {{name: $name}}) RETURN "UIElement" AS label
+    UNION
+    MATCH (n:Tap {{name: $name}}) RETURN "Tap" AS label
+    UNION
+    MATCH (n:Hold {{name: $name}}) RETURN "Hold" AS label
+    """,
+    "node_catalog": """
+    MATCH (n)
+    WHERE n:Tap OR n:Hold OR n:Screen OR n:UIElement
+    RETURN head(labels(n)) AS label, n.name AS name
+    """,
+    "existing_names": """
+    MATCH (n:{label})
+    WHERE n.name IN $names
+    RETURN n.name
+    """,
+    "create_node": """
+    CREATE (n:{label} $props)
+    """,
+    "delete_node": """
+    MATCH (n:{label} {{name: $name}})
+    DETACH DELETE n
+    """,
+    "node_properties": """
+    MATCH (n:{label} {{name: $name}})
+    RETURN properties(n)
+    """,
+    "update_node_properties": """
+    MATCH (n:{label} {{name: $name}})
+    SET n += $props
+    """,
+    "create_relationship": """
+    MATCH (s:{source} {{name: $source_name}}), (t:{target} {{name: $target_name}})
+    CREATE (s)-[:{rel}]->(t)
+    """,
+    "delete_relationship": """
+    MATCH (a:{source} {{name: $source_name}})-[r:{rel}]->(b:{target} {{name: $target_name}})
+    DELETE r
+    RETURN COUNT(r)
+    """,
+    "tap_path": """
+    MATCH (start:{source} {{name: $start}})
+    MATCH (target:{target} {{name: $target}})
+    MATCH path = shortestPath((start)-[:CONTAINS|TRIGGERS|LEADS_TO*]->(target))
+    UNWIND nodes(path) AS n
+    WITH n, path
+    WHERE n: UIElement AND n.x IS NOT NULL AND n.y IS NOT NULL
+    RETURN n.name AS name, n.x AS x, n.y AS y
+    ORDER BY apoc.coll.indexOf(nodes(path), n)
+    """,
+    # tap_path의 label 없는 버전 (시작/대상 label 추정이 틀렸을 때의 대체 쿼리)
+    "tap_path_unlabeled": """
+    MATCH (start {{name: $start}})
+    MATCH (target {{name: $target}})
+    MATCH path = shortestPath((start)-[:CONTAINS|TRIGGERS|LEADS_TO*]->(target))
+    UNWIND nodes(path) AS n
+    WITH n, path
+    WHERE n: UIElement AND n.x IS NOT NULL AND n.y IS NOT NULL
+    RETURN n.name AS name, n.x AS x, n.y AS y
+    ORDER BY apoc.coll.indexOf(nodes(path), n)
+    """,
+    "bulk_merge_nodes": """
+    UNWIND $rows AS row
+    MERGE (n:{label} {{name: row.name}})
+    SET n += row.props
+    """,
+    "bulk_merge_relationships": """
+    UNWIND $rows AS row
+    MATCH (s:{source} {{name: row.source_name}})
+    MATCH (t:{target} {{name: row.target_name}})
+    MERGE (s)-[:{rel}]->(t)
+    """,
+    "export_nodes": """
+    MATCH (n)
+    WHERE n:Screen OR n:UIElement OR n:Tap OR n:Hold
+    RETURN head(labels(n)) AS type, properties(n) AS props
+    ORDER BY type, props.name
+    """,
+    "export_relationships": """
+    MATCH (s)-[r:CONTAINS|TRIGGERS|LEADS_TO]->(t)
+    RETURN head(labels(s)) AS source_type, s.name AS source_name, type(r) AS type,
+           head(labels(t)) AS target_type, t.name AS target_name
+    """,
+    "current_screen": """
+    MATCH (start:{source} {{name: $name}})
+    MATCH (target:Screen)
+    WHERE target.name IN $screens
+    MATCH path = shortestPath((start)-[:CONTAINS|TRIGGERS|LEADS_TO*..10]-(target))
+    RETURN target.name AS screen_name, length(path) AS distance
+    ORDER BY distance ASC
+    LIMIT 1
+    """,
+    # current_screen의 label 없는 버전
+    "current_screen_unlabeled": """
+    MATCH (start {{name: $name}})
+    MATCH (target:Screen)
+    WHERE target.name IN $screens
+    MATCH path = shortestPath((start)-[:CONTAINS|TRIGGERS|LEADS_TO*..10]-(target))
+    RETURN target.name AS screen_name, length(path) AS distance
+    ORDER BY distance ASC
+    LIMIT 1
+    """,
+    "ui_trigger": """
+    MATCH (u:UIElement {{name: $ui_name}})-[:TRIGGERS]->(a:Tap|Hold)-[:LEADS_TO]-(s:Screen)
+    RETURN a.name AS action_name, s.name AS screen_name
+    LIMIT 1
+    """,
+}
+
+# 템플릿별 label 치환 조합 (warm_up에서 사용)
+TEMPLATE_LABELS = {
+    "node_exists": [{"label": label} for label in NODE_LABELS],
+    "node_label": [{}],
+    "node_catalog": [{}],
+    "existing_names": [{"label": label} for label in NODE_LABELS],
+    "create_node": [{"label": label} for label in NODE_LABELS],
+    "delete_node": [{"label": label} for label in NODE_LABELS],
+    "node_properties": [{"label": label} for label in NODE_LABELS],
+    "update_node_properties": [{"label": label} for label in NODE_LABELS],
+    "create_relationship": [{"source": s, "rel": r, "target": t} for s, r, t in RELATIONSHIP_RULES],
+    "delete_relationship": [{"source": s, "rel": r, "target": t} for s, r, t in RELATIONSHIP_RULES],
+    "tap_path": [
+        {"source": source, "target": target}
+        for source in ("Screen", "UIElement") for target in ("Screen", "UIElement")
+    ],
+    "tap_path_unlabeled": [{}],
+    "bulk_merge_nodes": [{"label": label} for label in NODE_LABELS],
+    "bulk_merge_relationships": [{"source": s, "rel": r, "target": t} for s, r, t in RELATIONSHIP_RULES],
+    "export_nodes": [{}],
+    "export_relationships": [{}],
+    "current_screen": [{"source": label} for label in NODE_LABELS],
+    "current_screen_unlabeled": [{}],
+    "ui_trigger": [{}],
+}
+
+# label을 붙인 템플릿이 빈 결과를 반환하면 다시 실행할 label 없는 템플릿
+# (추적 중인 시작 노드 label이 실제와 다르면 label 쿼리는 경로를 찾지 못함)
+UNLABELED_FALLBACKS = {
+    "tap_path": "tap_path_unlabeled",
+    "current_screen": "current_screen_unlabeled",
+}
+
+# name 유니크 제약 / 인덱스 생성 쿼리
+CONSTRAINT_QUERY = "CREATE CONSTRAINT {name}_name_unique IF NOT EXISTS FOR (n:{label}) REQUIRE n.name IS UNIQUE"
+INDEX_QUERY = "CREATE INDEX {name}_name_index IF NOT EXISTS FOR (n:{label}) ON (n.name)"
+SHOW_INDEXES_QUERY = """
+SHOW INDEXES YIELD name, type, labelsOrTypes, properties, owningConstraint, state
+WHERE labelsOrTypes IS NOT NULL
+RETURN name, type, labelsOrTypes, properties, owningConstraint, state
+"""
+
 class Neo4jHandler:
-    
+    _schema_report = None # 프로세스당 한 번만 스키마 확인
+
     def __init__(self, uri, user, password, cypher):
         """
         초기화
-        - Neo4j 드라이버 생성
+        - 프로세스 공유 Neo4j 드라이버 사용 (module/driver_registry.py)
         - raw Cypher 쿼리 처리
         """
-        self.driver = GraphDatabase.driver(
-            os.getenv("NEO4J_URI"), 
-            auth=(os.getenv("NEO4J_USER"),os.getenv("NEO4J_PASSWORD")))
+        self.driver = get_driver()
         self.cypher = self._extract_cypher_query(cypher)
+        self.params = {}
+        self._rendered = {}
 
     # 필요하다면 입력 텍스트에서 cypher 코드 블록 추출
     def _extract_cypher_query(self, raw_text):
@@ -39,38 +228,163 @@ class Neo4jHandler:
         else:
             return raw_text.strip()
         
-    # 새로운 cypher 쿼리 설정
-    def setCypher(self, cypher):
+    # 새로운 cypher 쿼리 (및 파라미터) 설정
+    def setCypher(self, cypher, params=None):
         self.cypher = cypher
+        self.params = params or {}
 
     # 현재 설정된 cypher 쿼리 실행
     def execute_cypher(self):
         try:
             with self.driver.session() as session:
-                result = session.run(self.cypher)
+                result = session.run(self.cypher, self.params)
                 return result.values(), None
         except Exception as e:
             return None, str(e)
+
+    # 현재 설정된 cypher 쿼리 검증 (EXPLAIN, 오류가 없으면 None)
+    def explain(self):
+        try:
+            with self.driver.session() as session:
+                session.run("EXPLAIN " + self.cypher, self.params).consume()
+                return None
+        except Exception as e:
+            return str(e)
+
+    # 템플릿 이름과 label로 Cypher 텍스트 생성
+    # - label/관계 타입은 허용된 값만 사용 가능 (ValueError)
+    def get_template(self, name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        if key in self._rendered:
+            return self._rendered[key]
+
+        if name not in QUERY_TEMPLATES:
+            raise ValueError(f"Unknown query template: {name}")
+        for slot, value in labels.items():
+            allowed = RELATIONSHIP_TYPES if slot == "rel" else NODE_LABELS
+            if value not in allowed:
+                raise ValueError(f"Invalid {slot} '{value}' for template '{name}'")
+
+        cypher = QUERY_TEMPLATES[name].format(**labels).strip()
+        self._rendered[key] = cypher
+        return cypher
+
+    # 이름 있는 템플릿을 파라미터와 함께 실행
+    # - 반환: (result.values(), error) — execute_cypher()와 동일
+    # - UNLABELED_FALLBACKS에 있는 템플릿은 결과가 비면 label 없는 템플릿으로 한 번 더 실행
+    def run_template(self, name, params=None, **labels):
+        try:
+            cypher = self.get_template(name, **labels)
+        except ValueError as e:
+            return None, str(e)
+        try:
+            with self.driver.session() as session:
+                values = session.run(cypher, params or {}).values()
+                if not values and name in UNLABELED_FALLBACKS:
+                    values = session.run(self.get_template(UNLABELED_FALLBACKS[name]), params or {}).values()
+                    if values:
+                        print(f"[WARN] '{name}' found no rows with labels {labels}, used the unlabeled query.")
+                return values, None
+        except Exception as e:
+            return None, str(e)
+
+    # 여러 템플릿 쿼리를 하나의 쓰기 트랜잭션으로 실행 (하나라도 실패하면 전체 롤백)
+    # - statements: [(template_name, params, labels), ...]
+    # - 반환: ({"nodes_created": .., ...}, error)
+    def run_transaction(self, statements):
+        try:
+            rendered = [(self.get_template(name, **labels), params) for name, params, labels in statements]
+        except ValueError as e:
+            return None, str(e)
+
+        def work(tx):
+            totals = {}
+            for cypher, params in rendered:
+                counters = tx.run(cypher, params).consume().counters
+                for key in ("nodes_created", "relationships_created", "properties_set"):
+                    totals[key] = totals.get(key, 0) + getattr(counters, key)
+            return totals
+
+        try:
+            with self.driver.session() as session:
+                return session.execute_write(work), None
+        except Exception as e:
+            return None, str(e)
+
+    # 모든 템플릿 조합을 EXPLAIN으로 컴파일하여 쿼리 플랜 캐시를 미리 채움
+    def warm_up(self):
+        compiled = 0
+        with self.driver.session() as session:
+            for name, label_sets in TEMPLATE_LABELS.items():
+                for labels in label_sets:
+                    cypher = self.get_template(name, **labels)
+                    params = {
+                        param: {} if param == "props" else [] if param in ("screens", "rows", "names") else ""
+                        for param in re.findall(r"\$(\w+)", cypher)
+                    }
+                    try:
+                        session.run("EXPLAIN " + cypher, params).consume()
+                        compiled += 1
+                    except ServiceUnavailable as e:
+                        print(f"[WARN] Neo4j is not available, skipping warm-up: {e}")
+                        return compiled
+                    except Exception as e:
+                        print(f"[WARN] Failed to warm up template '{name}' {labels}: {e}")
+        print(f"Neo4jHandler: warmed up {compiled} query plans.")
+        return compiled
     
+    # name 유니크 제약(중복 데이터로 실패하면 일반 인덱스) 생성 후 현황 출력
+    # - 반환: {label: [인덱스 이름, ...]}
+    def ensure_schema(self, force=False):
+        if Neo4jHandler._schema_report is not None and not force:
+            return Neo4jHandler._schema_report
+
+        try:
+            with self.driver.session() as session:
+                for label in NODE_LABELS:
+                    try:
+                        session.run(CONSTRAINT_QUERY.format(name=label.lower(), label=label)).consume()
+                    except ServiceUnavailable:
+                        raise
+                    except Exception as e:
+                        print(f"[WARN] Cannot create unique constraint on :{label}(name), creating index instead: {e}")
+                        session.run(INDEX_QUERY.format(name=label.lower(), label=label)).consume()
+                indexes = session.run(SHOW_INDEXES_QUERY).data()
+        except ServiceUnavailable as e:
+            print(f"[WARN] Neo4j is not available, skipping schema check: {e}")
+            return {}
+
+        report = {label: [] for label in NODE_LABELS}
+        print("==== Neo4j name indexes ====")
+        for index in indexes:
+            labels = index["labelsOrTypes"] or []
+            if "name" in (index["properties"] or []) and labels and labels[0] in report:
+                report[labels[0]].append(index["name"])
+                kind = "unique constraint" if index["owningConstraint"] else index["type"]
+                print(f":{labels[0]}(name) -> {index['name']} ({kind}, {index['state']})")
+        for label, names in report.items():
+            if not names:
+                print(f"[WARN] :{label}(name) has no index.")
+        Neo4jHandler._schema_report = report
+        return report
+
     # 특정 노드에서 가장 가까운 화면 조회
-    def get_current_screen(self, name):
-        if name in ["Home", "Settings", "Run", "Move", "System", "Program"]:
+    # - label을 모르면 node_label 템플릿으로 먼저 확인
+    def get_current_screen(self, name, label=None):
+        if name in MAIN_SCREENS:
             return name
-            
-        query = """
-        MATCH (start {name: $name}) 
-        MATCH (target:Screen)
-        WHERE target.name IN ["Home", "Settings", "Run", "Move", "System", "Program"]
-        MATCH path = shortestPath((start)-[:CONTAINS|TRIGGERS|LEADS_TO*..10]-(target))
-        RETURN target.name AS screen_name, length(path) AS distance
-        ORDER BY distance ASC
-        LIMIT 1
-        """
-        with self.driver.session() as session:
-            res = session.run(query, name=name)
-            record = res.single()
-            if record:
-                return record["screen_name"]
+
+        if label is None:
+            labels, error = self.run_template("node_label", {"name": name})
+            if not labels:
+                return None
+            label = labels[0][0]
+
+        rows, error = self.run_template(
+            "current_screen", {"name": name, "screens": list(MAIN_SCREENS)}, source=label
+        )
+        if rows:
+            return rows[0][0]
     
     # 마지막 클릭한 UIElement의 trigger 확인
     def check_trigger(self, result):
@@ -79,11 +393,7 @@ class Neo4jHandler:
             return None
         ui_name = result['name']
 
-        trigger_query = """
-        MATCH (u:UIElement {name: $ui_name})-[:TRIGGERS]->(a:Tap|Hold)-[:LEADS_TO]-(s:Screen)
-        RETURN a.name AS action_name, s.name AS screen_name
-        LIMIT 1
-        """
+        trigger_query = self.get_template("ui_trigger")
         parameters = {"ui_name": ui_name}
 
         with self.driver.session() as session:
@@ -97,6 +407,90 @@ class Neo4jHandler:
                 }
             return None
 
-    # Neo4j 드라이버 종료
+    # 공유 드라이버는 프로세스 종료 시 정리되므로 핸들러에서는 닫지 않음
     def close(self):
-        self.driver.close()
\ No newline at end of file
+        pass
+
+
+class AsyncNeo4jHandler(Neo4jHandler):
+    """
+    AsyncNeo4jHandler 클래스
+    - execute_cypher(), run_template(), get_current_screen(), check_trigger()를 코루틴으로 제공
+    - 공유 async 드라이버는 호출 시점의 이벤트 루프 기준으로 가져옴
+    - warm_up() 등 그 외 메서드는 Neo4jHandler와 동일 (sync 드라이버 사용)
+    """
+
+    @property
+    def async_driver(self):
+        return get_async_driver()
+
+    # 현재 설정된 cypher 쿼리 실행
+    async def execute_cypher(self):
+        try:
+            async with self.async_driver.session() as session:
+                result = await session.run(self.cypher, self.params)
+                return await result.values(), None
+        except Exception as e:
+            return None, str(e)
+
+    # 현재 설정된 cypher 쿼리 검증 (EXPLAIN, 오류가 없으면 None)
+    async def explain(self):
+        try:
+            async with self.async_driver.session() as session:
+                result = await session.run("EXPLAIN " + self.cypher, self.params)
+                await result.consume()
+                return None
+        except Exception as e:
+            return str(e)
+
+    # 이름 있는 템플릿을 파라미터와 함께 실행
+    async def run_template(self, name, params=None, **labels):
+        try:
+            cypher = self.get_template(name, **labels)
+        except ValueError as e:
+            return None, str(e)
+        try:
+            async with self.async_driver.session() as session:
+                values = await (await session.run(cypher, params or {})).values()
+                if not values and name in UNLABELED_FALLBACKS:
+                    fallback = self.get_template(UNLABELED_FALLBACKS[name])
+                    values = await (await session.run(fallback, params or {})).values()
+                    if values:
+                        print(f"[WARN] '{name}' found no rows with labels {labels}, used the unlabeled query.")
+                return values, None
+        except Exception as e:
+            return None, str(e)
+
+    # 특정 노드에서 가장 가까운 화면 조회
+    async def get_current_screen(self, name, label=None):
+        if name in MAIN_SCREENS:
+            return name
+
+        if label is None:
+            labels, error = await self.run_template("node_label", {"name": name})
+            if not labels:
+                return None
+            label = labels[0][0]
+
+        rows, error = await self.run_template(
+            "current_screen", {"name": name, "screens": list(MAIN_SCREENS)}, source=label
+        )
+        if rows:
+            return rows[0][0]
+
+    # 마지막 클릭한 UIElement의 trigger 확인
+    async def check_trigger(self, result):
+        if 'name' not in result:
+            print("'name' key not found in the result.")
+            return None
+
+        async with self.async_driver.session() as session:
+            res = await session.run(self.get_template("ui_trigger"), ui_name=result['name'])
+            record = await res.single()
+
+            if record:
+                return {
+                    "action_name": record["action_name"],
+                    "screen_name": record["screen_name"]
+                }
+            return None
@@ -0,0 +1,139 @@
+from pathlib import Path
+import json
+
+from module.graph_engine import NavigationGraph, read_graph_version
+
+"""
+RouteTable 모듈
+- NavigationGraph를 한 번 순회하여 도달 가능한 모든 (시작 노드, 대상 UIElement) 쌍의
+  탭 시퀀스 [(name, x, y), ...]를 미리 계산
+- 결과는 resource/route_table.json에 압축 형태로 저장
+  (UIElement 좌표 테이블 + 경로별 인덱스 목록)
+- StepExecutor는 lookup()으로 O(1) 조회하고, 없을 때만 Cypher/LLM으로 대체
+- Neo4j에서 노드를 정상적으로 읽은 그래프로 컴파일한 테이블만 파일에 저장
+  (Neo4j에 연결할 수 없어 빈 그래프나 스냅샷으로 컴파일한 테이블은 현재 프로세스에서만 사용)
+
+오프라인 컴파일:
+    python -m module.route_table
+"""
+
+ROUTE_TABLE_PATH = Path(__file__).resolve().parent.parent / "resource" / "route_table.json"
+
+
+class RouteTable:
+    """
+    RouteTable 클래스
+    - path: 라우트 테이블 저장 경로
+    - graph: 테이블이 오래된 경우 다시 컴파일할 NavigationGraph (없으면 테이블을 사용하지 않음)
+    """
+
+    def __init__(self, path=ROUTE_TABLE_PATH, graph: NavigationGraph | None = None):
+        self.path = Path(path)
+        self.graph = graph
+        self.graph_version = None
+        self.routes = {}
+        self.persistable = False # Neo4j에서 읽은 그래프로 컴파일했는지 여부
+        self.hits = 0
+        self.misses = 0
+
+    # 그래프의 모든 Screen/UIElement 시작점에서 UIElement까지 경로 컴파일
+    def compile(self, graph: NavigationGraph | None = None):
+        graph = graph or self.graph
+        graph.ensure_fresh()
+        starts = {
+            name for name, label in zip(graph.names, graph.labels)
+            if label in ("Screen", "UIElement")
+        }
+        self.routes = {}
+        for start in starts:
+            for target, sequence in graph.routes_from(start).items():
+                self.routes[(start, target)] = sequence
+        self.graph_version = graph.version
+        self.persistable = graph.source == "neo4j" and bool(graph.names)
+        print(f"RouteTable: compiled {len(self.routes)} routes from {len(starts)} start nodes.")
+
+    # 압축 형식으로 저장: UIElement 좌표 테이블 + 경로별 인덱스 목록
+    # - 빈 그래프 / 스냅샷으로 컴파일한 테이블은 저장하지 않음 (반환: 저장 여부)
+    def save(self, path=None):
+        if not self.persistable:
+            print("[WARN] RouteTable: not saving a table compiled without a Neo4j graph load.")
+            return False
+        path = Path(path or self.path)
+        elements = []
+        element_index = {}
+        routes = {}
+        for (start, target), sequence in self.routes.items():
+            indices = []
+            for name, x, y in sequence:
+                key = (name, x, y)
+                if key not in element_index:
+                    element_index[key] = len(elements)
+                    elements.append([name, x, y])
+                indices.append(element_index[key])
+            routes.setdefault(start, {})[target] = indices
+
+        data = {"graph_version": self.graph_version, "elements": elements, "routes": routes}
+        path.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        return True
+
+    # 저장된 테이블 로드
+    def load(self, path=None):
+        path = Path(path or self.path)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        elements = data["elements"]
+        self.routes = {
+            (start, target): [elements[idx] for idx in indices]
+            for start, targets in data["routes"].items()
+            for target, indices in targets.items()
+        }
+        self.graph_version = data.get("graph_version")
+
+    # 그래프가 수정되어 테이블이 오래되었으면 다시 컴파일 후 저장
+    def ensure_fresh(self):
+        if self.graph_version == read_graph_version():
+            return True
+        if self.graph is None:
+            return False
+        self.compile()
+        try:
+            self.save()
+        except OSError as e:
+            print(f"[WARN] RouteTable: failed to save route table: {e}")
+        return True
+
+    # (시작 노드, 대상 UIElement) 탭 시퀀스 조회 (없으면 None)
+    def lookup(self, start_name, target_name):
+        if not self.ensure_fresh():
+            return None
+        sequence = self.routes.get((start_name, target_name))
+        if sequence is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [list(item) for item in sequence]
+
+
+# 저장된 라우트 테이블 로드 (없거나 읽을 수 없으면 graph로 컴파일)
+def load_route_table(graph: NavigationGraph | None = None, path=ROUTE_TABLE_PATH) -> RouteTable:
+    table = RouteTable(path, graph)
+    if table.path.exists():
+        try:
+            table.load()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARN] RouteTable: failed to load {table.path.name}: {e}")
+    table.ensure_fresh()
+    return table
+
+
+# Neo4j(또는 그래프 스냅샷)에서 라우트 테이블 컴파일
+if __name__ == "__main__":
+    from module.driver_registry import get_driver, close_drivers
+
+    driver = get_driver()
+    try:
+        table = RouteTable(graph=NavigationGraph(driver))
+        table.compile()
+        if table.save():
+            print(f"Route table saved to {table.path}")
+    finally:
+        close_drivers()
@@ -0,0 +1,83 @@
+from module.adb_client import get_adb_client
+import base64
+import struct
+
+import cv2
+import numpy as np
+
+"""
+화면 캡처 모듈
+- exec:screencap(raw) 스트림을 메모리로 바로 받아 NumPy 배열(H x W x 3, RGB)로 변환
+  디바이스 sdcard 저장 / pull / PC 파일 저장이 없고, 디바이스에서 PNG 압축도 하지 않음
+- 파일을 공유하지 않으므로 여러 실행이 동시에 캡처해도 서로의 화면을 덮어쓰지 않음
+- region=(left, top, right, bottom)을 주면 해당 영역만 잘라서 반환 (복사 없는 배열 view)
+- LLM 전송용 PNG / base64 인코딩도 메모리에서 처리
+"""
+
+# raw screencap 헤더: width, height, format (+ Android 9 이상은 colorspace)
+HEADER = struct.Struct("<III")
+
+# android PixelFormat
+PIXEL_FORMAT_RGBA_8888 = 1
+PIXEL_FORMAT_RGBX_8888 = 2
+PIXEL_FORMAT_RGB_888 = 3
+PIXEL_FORMAT_RGB_565 = 4
+
+BYTES_PER_PIXEL = {
+    PIXEL_FORMAT_RGBA_8888: 4,
+    PIXEL_FORMAT_RGBX_8888: 4,
+    PIXEL_FORMAT_RGB_888: 3,
+    PIXEL_FORMAT_RGB_565: 2,
+}
+
+
+# raw screencap 바이트 -> RGB 배열
+def decode_raw(data):
+    if len(data) < HEADER.size:
+        raise RuntimeError("empty screencap output")
+    width, height, pixel_format = HEADER.unpack_from(data)
+    bpp = BYTES_PER_PIXEL.get(pixel_format)
+    if bpp is None:
+        raise RuntimeError(f"unsupported screencap pixel format: {pixel_format}")
+
+    # 헤더 길이는 기기에 따라 12 또는 16바이트 -> 픽셀 데이터 크기로 판단
+    size = width * height * bpp
+    offset = len(data) - size
+    if offset not in (12, 16):
+        raise RuntimeError(f"unexpected screencap size: {len(data)} bytes for {width}x{height}")
+
+    pixels = np.frombuffer(data, dtype=np.uint8, count=size, offset=offset)
+    if pixel_format == PIXEL_FORMAT_RGB_565:
+        return cv2.cvtColor(pixels.reshape(height, width, 2), cv2.COLOR_BGR5652RGB)
+    return pixels.reshape(height, width, bpp)[:, :, :3]
+
+
+# 배열에서 region=(left, top, right, bottom) 영역 자르기 (화면 밖 좌표는 잘라냄)
+def crop(image, region=None):
+    if region is None:
+        return image
+    height, width = image.shape[:2]
+    left, top, right, bottom = (int(v) for v in region)
+    left, right = max(0, left), min(width, right)
+    top, bottom = max(0, top), min(height, bottom)
+    if left >= right or top >= bottom:
+        raise ValueError(f"crop region {region} is outside the {width}x{height} screen")
+    return image[top:bottom, left:right]
+
+
+# 현재 화면을 RGB 배열로 캡처 (region이 있으면 해당 영역만)
+def capture_screen(region=None, serial=None):
+    return crop(decode_raw(get_adb_client(serial).exec_out("screencap")), region)
+
+
+# RGB 배열 -> PNG 바이트
+def encode_png(image):
+    ok, encoded = cv2.imencode(".png", cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+    if not ok:
+        raise RuntimeError("failed to encode screen image")
+    return encoded.tobytes()
+
+
+# RGB 배열 -> LLM 이미지 입력용 data URL
+def to_data_url(image):
+    return "data:image/png;base64," + base64.b64encode(encode_png(image)).decode("utf-8")
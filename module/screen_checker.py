@@ -1,66 +1,88 @@
-from langchain_openai import ChatOpenAI
-import subprocess
+from module.llm_gateway import get_chat_model
+from module.adb_client import get_adb_client
+from module.screen_capture import capture_screen, crop, encode_png
+from module.image_preprocess import prepare_image
+from module.screen_classifier import ScreenClassifier, SCREEN_NAMES
+from module.vlm_cache import VlmAnswerCache
+from module.settle import wait_for_app_ready
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage
 import base64
-import time
 
 """
 ScreenChecker 클래스
 - 안드로이드 디바이스 화면을 캡처하고, 현재 화면이 어떤 화면인지 LLM을 이용해 판단
 - 초기 화면으로 이동, 화면 캡처, 이미지 인코딩, 화면 확인 기능 포함
+- 화면은 메모리(NumPy 배열)로만 캡처하며 screen.png 같은 공유 파일을 만들지 않음
+  (frame_monitor가 동작 중이면 새로 캡처하지 않고 최근 프레임을 사용)
+- 화면 판별은 reference_path의 기준 이미지와 먼저 비교하고(ScreenClassifier),
+  신뢰도가 낮을 때만 LLM에 질의 (같은 화면에 대한 이전 LLM 답변은 VlmAnswerCache로 재사용)
 """
 
 # .env 파일에서 API key 불러오기
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
 
+# frame_monitor의 마지막 프레임을 그대로 사용할 최대 경과 시간(초)
+FRAME_MAX_AGE = 0.5
+
 class ScreenChecker:
-    def __init__(self):
+    def __init__(self, frame_monitor=None):
+        self.frame_monitor = frame_monitor
         base_dir = os.path.dirname(os.path.dirname(__file__))
         self.reference_path = os.path.join(base_dir, "resource", "image")
+        self.classifier = ScreenClassifier(self.reference_path)
+        self.vlm_cache = VlmAnswerCache()
     
-    # 현재 디바이스 화면 캡처 후 PC로 저장
-    def save_current_screen(self, filename: str = "screen.png"):
-        subprocess.run("adb shell screencap -p /sdcard/screen.png", shell=True)
-        subprocess.run(f"adb pull /sdcard/screen.png {filename}", shell=True)
+    # 현재 디바이스 화면을 RGB 배열로 캡처 (region=(left, top, right, bottom) 영역만 선택 가능)
+    def capture_current_screen(self, region=None):
+        if self.frame_monitor is not None:
+            frame = self.frame_monitor.latest_frame(max_age=FRAME_MAX_AGE)
+            if frame is not None:
+                return crop(frame, region)
+        return capture_screen(region)
+
+    # 현재 화면을 PNG 파일로 저장 (디버깅용, 화면 판별에는 사용하지 않음)
+    def save_current_screen(self, filename, region=None):
+        Path(filename).write_bytes(encode_png(self.capture_current_screen(region)))
         return Path(filename)
     
-    # 이미지 파일을 base64 문자열로 변환
-    def encode_image_to_base64(self,path:Path) -> str:
-        with open(path,"rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
+    # 이미지(RGB 배열)를 PNG base64 문자열로 변환
+    def encode_image_to_base64(self, image) -> str:
+        return base64.b64encode(encode_png(image)).decode('utf-8')
         
     # 앱 종료 후 다시 실행해 초기(Home) 화면으로 이동
     def move_to_home(self):
-        cmd = "adb shell am force-stop com.neuromeka.conty3"
-        subprocess.run(cmd, shell=True)
-        time.sleep(1)
+        adb = get_adb_client()
+        adb.shell("am force-stop com.neuromeka.conty3")
         print("Initiate Program")
-        cmd = "adb shell monkey -p com.neuromeka.conty3 -c android.intent.category.LAUNCHER 1"
-        subprocess.run(cmd, shell=True)
-        print("==== Step 0: Move to Initial Screen ====")
+        adb.shell("monkey -p com.neuromeka.conty3 -c android.intent.category.LAUNCHER 1")
+        waited = wait_for_app_ready(frame_monitor=self.frame_monitor)
+        print(f"==== Step 0: Move to Initial Screen ({waited:.1f}s) ====")
         print("==== Completed ====\n\n")
-        time.sleep(8)
 
-    # 현재 화면 캡처 후 LLM을 통해 화면 이름을 판별
+    # 현재 화면 캡처 후 기준 이미지 비교 -> (신뢰도가 낮으면) LLM을 통해 화면 이름을 판별
     def check_current_screen(self) -> str:
-        screen_file = self.save_current_screen()
-
-        llm = ChatOpenAI(
-            model="gpt-5",
-            use_responses_api=True,
-            output_version="responses/v1",
-            extra_body={
-                "text": {"verbosity":"low"},
-                "reasoning": {"effort":"minimal"},
-            },
-            api_key=api_key
-        )
-        base64_image = self.encode_image_to_base64("screen.png")
-        image_url = f"data:image/png;base64,{base64_image}"
+        screen = self.capture_current_screen()
+
+        name, confidence = self.classifier.classify(screen)
+        if name is not None and confidence >= self.classifier.threshold:
+            self.classifier.stats["local"] += 1
+            print(f"[INFO] Screen classified locally: {name} (confidence {confidence:.2f})")
+            return name
+        self.classifier.stats["fallback"] += 1
+        if name is not None:
+            print(f"[INFO] Low screen confidence ({name}, {confidence:.2f}), asking LLM...")
+
+        cached = self.vlm_cache.get(screen, "screen_name", scope="check_current_screen")
+        if cached is not None:
+            print(f"[INFO] Screen answer reused from VLM cache: {cached}")
+            return cached
+
+        llm = get_chat_model("gpt-5", effort="minimal") # 호출마다 새로 만들지 않고 공유
+        image_url = prepare_image(screen, label="check_current_screen")
 
         question = f"""당신은 현재 화면을 구분하는 전문가입니다.
         현재 화면을 보고, 다음 화면들 중 어떤 화면인지 판단해주세요:
@@ -78,12 +100,17 @@ class ScreenChecker:
 
         res = llm.invoke([msg])
 
+        answer = "No valid text content found in the response."
         if isinstance(res.content, list):
             for item in res.content:
                 if isinstance(item, dict) and item.get('type') == 'text':
-                    return item.get('text', '').strip()
+                    answer = item.get('text', '').strip()
+                    break
 
         elif isinstance(res.content, str):
-            return res.content.strip()
+            answer = res.content.strip()
 
-        return "No valid text content found in the response."
\ No newline at end of file
+        # 화면 이름으로 답한 경우만 캐시
+        if answer in SCREEN_NAMES:
+            self.vlm_cache.put(screen, "screen_name", answer, scope="check_current_screen")
+        return answer
\ No newline at end of file
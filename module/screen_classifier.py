@@ -0,0 +1,206 @@
+from dotenv import load_dotenv
+from pathlib import Path
+import argparse
+import os
+
+import cv2
+import numpy as np
+
+"""
+ScreenClassifier 모듈
+- resource/image의 기준 화면 이미지와 현재 화면을 비교하여 LLM 없이 화면 이름을 판별
+  (파일 이름이 화면 이름으로 시작: Home.png, Program_1.png, Run.jpg ...)
+  기준 이미지가 없으면 항상 LLM으로 판별하므로, 디바이스에서 화면별로 한 번 캡처해 두어야 함
+- 특징 두 가지를 함께 사용
+  - dHash(difference hash): 전체 화면을 9x8 회색조로 줄여 이웃 픽셀 밝기 차이로 만든 64비트 해시
+    (DCT 기반 pHash가 아니며, 해상도와 무관)
+  - 상단 탭 영역의 파란색 마스크: 활성화된 탭은 파란 글자로 표시되므로 위치를 비교 (IoU)
+- classify()는 (화면 이름, 신뢰도)를 반환하며, 1위와 2위 화면의 점수 차이가 작으면 신뢰도를 낮춤
+  신뢰도가 threshold 미만이면 ScreenChecker가 기존처럼 LLM에 질의
+- 점수는 기준 이미지끼리의 상대 비교이므로, 앱 밖 화면(런처, 검은 화면, 스플래시 등)이
+  가장 가까운 화면으로 판별되지 않도록 1위 기준 이미지와의 dHash 유사도가 최소값 미만이면 신뢰도 0
+  - 활성 탭이 없는 화면은 탭 마스크로 구분할 수 없으므로(Home 외에는 모두 "탭 없음") 더 높은 최소값 적용
+  - 밝기 변화가 거의 없는 화면(단색 프레임)은 dHash가 의미 없으므로 판별하지 않음
+
+환경 변수:
+- SCREEN_CLASSIFIER_THRESHOLD: LLM 없이 결과를 사용할 최소 신뢰도 (기본 0.8)
+- SCREEN_TAB_BAND: 상단 탭 영역 높이 비율 (기본 0.12)
+- SCREEN_MIN_HASH_SIMILARITY: 1위 기준 이미지와의 최소 dHash 유사도 (기본 0.85)
+- SCREEN_MIN_HASH_SIMILARITY_NO_TAB: 활성 탭이 없는 화면의 최소 dHash 유사도 (기본 0.9)
+
+기준 이미지 만들기 (디바이스에서 해당 화면을 띄운 뒤 실행):
+    python -m module.screen_classifier capture Home
+    python -m module.screen_classifier check       # 현재 화면 판별 결과 확인
+    python -m module.screen_classifier evaluate    # 기준 이미지끼리 교차 판별 (화면별 2장 이상일 때)
+"""
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+SCREEN_NAMES = ("Program", "Run", "Settings", "System", "Move", "Home")
+REFERENCE_PATH = Path(__file__).resolve().parent.parent / "resource" / "image"
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".webp")
+
+THRESHOLD = float(os.getenv("SCREEN_CLASSIFIER_THRESHOLD", "0.8"))
+TAB_BAND = float(os.getenv("SCREEN_TAB_BAND", "0.12"))
+MIN_HASH_SIMILARITY = float(os.getenv("SCREEN_MIN_HASH_SIMILARITY", "0.85"))
+MIN_HASH_SIMILARITY_NO_TAB = float(os.getenv("SCREEN_MIN_HASH_SIMILARITY_NO_TAB", "0.9"))
+
+HASH_SIZE = 8
+MASK_SIZE = (96, 8) # 탭 영역 마스크 (가로, 세로)
+MIN_BLUE_PIXELS = 3 # 이보다 적으면 활성 탭이 없는 화면 (Home 등)
+MARGIN = 0.1 # 1위와 2위 점수 차이가 이보다 작으면 신뢰도 감소
+MIN_CONTRAST = 4.0 # 회색조 표준편차가 이보다 작으면 단색 프레임
+
+# OpenCV HSV(H: 0~180) 기준 파란색 범위
+BLUE_LOWER = np.array([95, 80, 80], dtype=np.uint8)
+BLUE_UPPER = np.array([130, 255, 255], dtype=np.uint8)
+
+
+# 회색조 dHash (64비트 bool 배열)
+def dhash(image):
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(gray, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    return (small[:, 1:] > small[:, :-1]).flatten()
+
+
+# 상단 탭 영역의 파란색 마스크 (MASK_SIZE로 축소한 bool 배열)
+def tab_mask(image, band=TAB_BAND):
+    height = max(1, int(image.shape[0] * band))
+    hsv = cv2.cvtColor(np.ascontiguousarray(image[:height]), cv2.COLOR_RGB2HSV)
+    mask = cv2.inRange(hsv, BLUE_LOWER, BLUE_UPPER)
+    return cv2.resize(mask, MASK_SIZE, interpolation=cv2.INTER_AREA) > 32
+
+
+# 활성 탭(파란 글자)이 있는지 여부
+def has_active_tab(mask):
+    return np.count_nonzero(mask) >= MIN_BLUE_PIXELS
+
+
+# 한글 경로에서도 읽을 수 있도록 imdecode 사용 (RGB 배열 반환)
+def read_image(path):
+    data = np.fromfile(str(path), dtype=np.uint8)
+    image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+    if image is None:
+        return None
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+# 기준 이미지 저장 (Home.png가 있으면 Home_2.png, Home_3.png ... 로 저장, 반환: 저장 경로)
+def save_reference(image, name, reference_path=REFERENCE_PATH):
+    if name not in SCREEN_NAMES:
+        raise ValueError(f"Unknown screen name: {name} (expected one of {', '.join(SCREEN_NAMES)})")
+    directory = Path(reference_path)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}.png"
+    number = 1
+    while path.exists():
+        number += 1
+        path = directory / f"{name}_{number}.png"
+    ok, encoded = cv2.imencode(".png", cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+    if not ok:
+        raise RuntimeError("failed to encode reference image")
+    encoded.tofile(str(path))
+    return path
+
+
+class ScreenClassifier:
+    """
+    ScreenClassifier 클래스
+    - reference_path: 기준 화면 이미지 디렉터리
+    - threshold: LLM 없이 결과를 사용할 최소 신뢰도
+    """
+
+    def __init__(self, reference_path=REFERENCE_PATH, threshold=THRESHOLD):
+        self.reference_path = Path(reference_path)
+        self.threshold = threshold
+        self.references = [] # [(화면 이름, dHash, 탭 마스크, 파일 이름), ...]
+        self.stats = {"local": 0, "fallback": 0}
+        self.load()
+
+    # 기준 이미지 로드 (파일 이름이 화면 이름으로 시작하는 이미지만)
+    def load(self):
+        self.references = []
+        if not self.reference_path.is_dir():
+            print(f"[WARN] ScreenClassifier: reference directory not found: {self.reference_path}")
+            return 0
+        for path in sorted(self.reference_path.iterdir()):
+            if path.suffix.lower() not in IMAGE_SUFFIXES:
+                continue
+            name = next((n for n in SCREEN_NAMES if path.stem.lower().startswith(n.lower())), None)
+            if name is None:
+                continue
+            image = read_image(path)
+            if image is None:
+                print(f"[WARN] ScreenClassifier: failed to read {path.name}")
+                continue
+            self.references.append((name, dhash(image), tab_mask(image), path.name))
+        print(f"[INFO] ScreenClassifier: {len(self.references)} reference images loaded.")
+        return len(self.references)
+
+    # 기준 이미지 하나와의 유사도 (반환: (종합 점수 0~1, dHash 유사도 0~1))
+    @staticmethod
+    def _score(features, reference):
+        screen_hash, screen_mask = features
+        _, ref_hash, ref_mask, _ = reference
+        hash_score = 1.0 - np.count_nonzero(screen_hash != ref_hash) / screen_hash.size
+
+        screen_active = has_active_tab(screen_mask)
+        ref_active = has_active_tab(ref_mask)
+        if screen_active and ref_active:
+            union = np.count_nonzero(screen_mask | ref_mask)
+            mask_score = np.count_nonzero(screen_mask & ref_mask) / union
+        else:
+            # 둘 다 활성 탭이 없으면(Home 등) 일치, 한쪽만 없으면 불일치
+            mask_score = 1.0 if screen_active == ref_active else 0.0
+        return 0.6 * mask_score + 0.4 * hash_score, hash_score
+
+    # 화면 이름과 신뢰도 반환 (기준 이미지가 없거나 단색 프레임이면 (None, 0.0))
+    # - exclude: 비교에서 제외할 기준 이미지 파일 이름 (evaluate용)
+    def classify(self, image, exclude=None):
+        references = [reference for reference in self.references if reference[3] != exclude]
+        if not references or cv2.cvtColor(image, cv2.COLOR_RGB2GRAY).std() < MIN_CONTRAST:
+            return None, 0.0
+        features = (dhash(image), tab_mask(image))
+        best = {} # 화면 이름 -> (종합 점수, dHash 유사도)
+        for reference in references:
+            best[reference[0]] = max(best.get(reference[0], (0.0, 0.0)), self._score(features, reference))
+
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+        name, (score, hash_score) = ranked[0]
+        # 앱 밖 화면이 상대 점수만으로 가장 가까운 화면이 되지 않도록 절대 유사도 확인
+        minimum = MIN_HASH_SIMILARITY if has_active_tab(features[1]) else MIN_HASH_SIMILARITY_NO_TAB
+        if hash_score < minimum:
+            return name, 0.0
+        second = ranked[1][1][0] if len(ranked) > 1 else 0.0
+        confidence = score * min(1.0, (score - second) / MARGIN)
+        return name, float(confidence)
+
+
+# 기준 이미지 캡처 / 현재 화면 판별 / 기준 이미지 교차 판별
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ScreenClassifier reference images")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    capture_parser = subparsers.add_parser("capture", help="현재 디바이스 화면을 기준 이미지로 저장")
+    capture_parser.add_argument("name", choices=SCREEN_NAMES)
+    subparsers.add_parser("check", help="현재 디바이스 화면 판별")
+    subparsers.add_parser("evaluate", help="각 기준 이미지를 나머지 기준 이미지로 판별")
+    args = parser.parse_args()
+
+    if args.command == "capture":
+        from module.screen_capture import capture_screen
+        print(f"Saved {save_reference(capture_screen(), args.name)}")
+    elif args.command == "check":
+        from module.screen_capture import capture_screen
+        classifier = ScreenClassifier()
+        name, confidence = classifier.classify(capture_screen())
+        status = "local" if name is not None and confidence >= classifier.threshold else "LLM fallback"
+        print(f"{name} (confidence {confidence:.2f}, {status})")
+    else:
+        classifier = ScreenClassifier()
+        correct = 0
+        for expected, _, _, filename in classifier.references:
+            name, confidence = classifier.classify(read_image(classifier.reference_path / filename), exclude=filename)
+            correct += name == expected and confidence >= classifier.threshold
+            print(f"{filename}: {name} (confidence {confidence:.2f})")
+        print(f"{correct}/{len(classifier.references)} classified locally as expected.")
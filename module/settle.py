@@ -0,0 +1,61 @@
+from module.adb_client import get_adb_client
+import hashlib
+import time
+
+"""
+화면 안정 대기 모듈
+- 로그 모니터가 없을 때(앱 재실행 직후 등) 고정 sleep 대신 디바이스 상태를 확인하며 대기
+- wait_for_activity(): 지정한 패키지의 Activity가 resumed 상태가 될 때까지 대기
+- wait_for_stable_screen(): 연속으로 캡처한 화면이 같아질 때까지 대기
+  (FrameMonitor가 동작 중이면 직접 캡처하지 않고 모니터의 프레임 delta로 판단)
+- wait_for_app_ready(): 앱 재실행 후 위 두 조건을 차례로 대기
+"""
+
+APP_PACKAGE = "com.neuromeka.conty3"
+
+
+# 패키지의 Activity가 resumed 상태가 될 때까지 대기 (성공 여부 반환)
+def wait_for_activity(package=APP_PACKAGE, timeout=15.0, interval=0.2):
+    adb = get_adb_client()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        output = adb.shell("dumpsys activity activities | grep -E 'mResumedActivity|topResumedActivity'")
+        if package in output:
+            return True
+        time.sleep(interval)
+    print(f"[WARN] {package} did not reach the resumed state within {timeout}s.")
+    return False
+
+
+# 연속 stable_count장의 화면이 같아질 때까지 대기 (성공 여부 반환)
+# - raw screencap(헤더 + RGBA)을 해시로 비교하므로 PNG 인코딩 비용이 없음
+def wait_for_stable_screen(timeout=10.0, interval=0.2, stable_count=2, frame_monitor=None):
+    if frame_monitor is not None and frame_monitor.running:
+        # 호출 이전 프레임(앱 재실행 전 화면 등)은 판단에 사용하지 않음
+        if frame_monitor.wait_for_stable(frame_monitor.mark(), stable_frames=stable_count, timeout=timeout):
+            return True
+        print(f"[WARN] Screen did not settle within {timeout}s.")
+        return False
+
+    adb = get_adb_client()
+    deadline = time.monotonic() + timeout
+    previous = None
+    same = 0
+    while time.monotonic() < deadline:
+        digest = hashlib.md5(adb.exec_out("screencap")).digest()
+        same = same + 1 if digest == previous else 0
+        if same >= stable_count - 1 and previous is not None:
+            return True
+        previous = digest
+        time.sleep(interval)
+    print(f"[WARN] Screen did not settle within {timeout}s.")
+    return False
+
+
+# 앱 재실행 후 화면이 뜨고 안정될 때까지 대기 (대기한 시간 반환)
+def wait_for_app_ready(package=APP_PACKAGE, timeout=15.0, frame_monitor=None):
+    started = time.monotonic()
+    wait_for_activity(package, timeout)
+    wait_for_stable_screen(max(1.0, timeout - (time.monotonic() - started)), stable_count=3,
+                           frame_monitor=frame_monitor)
+    return time.monotonic() - started
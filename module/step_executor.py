@@ -2,9 +2,15 @@ from module.log_monitor import *
 from module.canonical_mapper import *
 from module.cypher_generator import *
 from module.neo4j_handler import *
+from module.graph_engine import *
+from module.route_table import load_route_table
+from module.cypher_repair import CypherRepairer
 from module.tap_executor import *
+from module.gesture_executor import GestureExecutor, GESTURE_TYPES
+from module.settle import wait_for_app_ready
 from action_mcp_client import run_action_agent
 from verify_mcp_client import run_verify_agent
+import asyncio
 
 load_dotenv()
 
@@ -24,23 +30,32 @@ def extract_json_from_response(raw_text: str) -> dict:
         raise ValueError("Response did not contain a JSON code block.")
 
 class StepExecutor:
-    def __init__(self, monitor: InMemoryLogMonitor, user_input = None,start_point=None):
+    def __init__(self, monitor: InMemoryLogMonitor, user_input = None,start_point=None, frame_monitor=None):
         # 로그 모니터, canonical mapper, Neo4j handler, TapExecutor 초기화
         self.monitor = monitor
-        self.mapper = LLMCanonicalMapper(
-            alias_path="resource/ui_alias.json",
-            graph_path="resource/graph_structure.txt"
-        )
+        self.frame_monitor = frame_monitor # 화면 프레임 모니터 (없으면 필요할 때 직접 캡처)
         self.start_point = None or start_point # 현재 시작 위치(UI 또는 화면)
         self.user_input = None or user_input # 사용자 입력
         self.isScreen = False # start_point가 화면인지 여부
-        self.neo4j = Neo4jHandler( # Neo4j 연결 초기화
+        self.neo4j = AsyncNeo4jHandler( # Neo4j 연결 초기화 (비동기)
             uri=os.getenv("NEO4J_URI"),
             user=os.getenv("NEO4J_USER"),
             password=os.getenv("NEO4J_PASSWORD"),
             cypher=""
         )
-        self.tap_executor = TapExecutor() # ADB 탭/홀드 실행기
+        self.neo4j.ensure_schema() # name 인덱스/제약 확인 (프로세스당 1회)
+        if os.getenv("NEO4J_WARM_UP") == "1":
+            self.neo4j.warm_up() # 템플릿 쿼리 플랜 미리 컴파일
+        self.graph = get_navigation_graph(self.neo4j.driver) # 메모리 내비게이션 그래프
+        self.routes = load_route_table(self.graph) # 사전 컴파일된 라우트 테이블
+        self.mapper = LLMCanonicalMapper(
+            alias_path="resource/ui_alias.json",
+            graph_path="resource/graph_structure.txt",
+            graph=self.graph # 현재 화면 주변 alias만 프롬프트에 사용
+        )
+        self.repairer = CypherRepairer() # LLM 전 로컬 Cypher 수정 규칙 / 수정 캐시
+        self.tap_executor = TapExecutor(monitor=monitor) # ADB 탭/홀드 실행기
+        self.gesture_executor = GestureExecutor() # pinch/swipe/drag/multi_tap 제스처 실행기
         self.step_passed = True # step 성공 여부 초기화
     
     # 로그 모니터 시작 시간 설정
@@ -68,74 +83,67 @@ class StepExecutor:
             self.generator.update_last_clicked_screen(start_point)
 
     # 테스트 시작 화면으로 이동
-    def return_to_testScreen(self, testScreen):
+    async def return_to_testScreen(self, testScreen):
         finished_place = self.start_point.get("name")
 
-        # 현재 위치의 Label 확인
-        checkUIElementQuery = f"""
-        MATCH (n {{name: "{finished_place}"}})
-        RETURN head(labels(n)) AS label
-        """
-
-        self.neo4j.cypher = checkUIElementQuery
-        query_result1, error = self.neo4j.execute_cypher()
-        query_result1 = query_result1[0][0]
+        # 현재 위치의 Label 확인 (메모리 그래프 우선)
+        query_result1 = self.graph.label_of(finished_place)
+        if query_result1 is None:
+            query_result1, error = await self.neo4j.run_template("node_label", {"name": finished_place})
+            query_result1 = query_result1[0][0] if query_result1 else None
 
         # UIElement인 경우, testScreen과 포함 관계 확인
         if query_result1 == "UIElement":
-            checkContainQuery = f"""
-            MATCH (s:Screen {{name: "{testScreen}"}}), (e:UIElement {{name: "{finished_place}"}})
-            MATCH path = (s)-[:CONTAINS|TRIGGERS*..]->(e)
-            RETURN COUNT(path) > 0 AS isContained
-            """
-            self.neo4j.cypher = checkContainQuery
-            query_result2, error = self.neo4j.execute_cypher()
-            
-            if query_result2 == True:
-                self.tap_executor.tap_middle()
+            isContained = self.graph.is_reachable(
+                testScreen, finished_place,
+                start_label="Screen", target_label="UIElement",
+                rel_types=("CONTAINS", "TRIGGERS")
+            )
+            if isContained:
+                await asyncio.to_thread(self.tap_executor.tap_middle)
                 return
-        
-        # UIElement -> Screen 최단경로 계산
-        stepFin_Cypher = f"""
-            MATCH (start:{query_result1} {{name: "{finished_place}"}})
-            MATCH (target:Screen {{name: "{testScreen}"}})
-            MATCH path = shortestPath((start)-[:CONTAINS|TRIGGERS|LEADS_TO*]->(target))
-            UNWIND nodes(path) AS n
-            WITH n, path
-            WHERE n: UIElement AND n.x IS NOT NULL AND n.y IS NOT NULL
-            RETURN n.name AS name, n.x AS x, n.y AS y
-            ORDER BY apoc.coll.indexOf(nodes(path), n)
-            """
-        self.neo4j.cypher = stepFin_Cypher
-        query_result3, error = self.neo4j.execute_cypher()
+
+        # UIElement -> Screen 최단경로 계산 (메모리 그래프에 없으면 Cypher 실행)
+        query_result3 = self.graph.find_tap_sequence(
+            finished_place, testScreen, start_label=query_result1, target_label="Screen"
+        )
+        if query_result3 is None:
+            query_result3 = await self._query_tap_sequence(query_result1, finished_place, testScreen)
 
         # TapExecutor를 통해 화면 이동
-        tap_result = self.tap_executor.tap(query_result3)
+        tap_result = await asyncio.to_thread(self.tap_executor.tap, query_result3)
         if tap_result == False:
-                self.tap_executor.tap_middle()
+                await asyncio.to_thread(self.tap_executor.tap_middle)
                 return
 
         # start_point 갱신
         self.start_point = tap_result
-        screen_name = self._update_start_point_from_ui(tap_result)
-        self.tap_executor.tap_middle()
+        screen_name = await self._update_start_point_from_ui(tap_result)
+        await asyncio.to_thread(self.tap_executor.tap_middle)
+
+    # Cypher로 start -> Screen 경로 상의 UIElement 좌표 조회
+    async def _query_tap_sequence(self, start_label, start_name, screen_name):
+        query_result, error = await self.neo4j.run_template(
+            "tap_path",
+            {"start": start_name, "target": screen_name},
+            source=start_label, target="Screen"
+        )
+        return query_result
         
     # 현재 화면과 테스트 시작 화면이 다른 경우, 테스트 시작 화면으로 이동
-    def generate_step0(self, fromScreen, toScreen):
+    async def generate_step0(self, fromScreen, toScreen):
         toCheck = ""
 
         if toScreen == "Home":
             # 앱 종료 후 재실행
             print("Shutting down the app")
-            cmd = "adb shell am force-stop com.neuromeka.conty3"
-            subprocess.run(cmd, shell=True)
-            time.sleep(1)
+            adb = get_adb_client()
+            adb.shell("am force-stop com.neuromeka.conty3")
             print("Initiate Program")
-            cmd = "adb shell monkey -p com.neuromeka.conty3 -c android.intent.category.LAUNCHER 1"
-            subprocess.run(cmd, shell=True)
-            print("==== Step 0: Move to Initial Screen ====")
+            adb.shell("monkey -p com.neuromeka.conty3 -c android.intent.category.LAUNCHER 1")
+            waited = await asyncio.to_thread(wait_for_app_ready, frame_monitor=self.frame_monitor)
+            print(f"==== Step 0: Move to Initial Screen ({waited:.1f}s) ====")
             print("==== Completed ====\n\n")
-            time.sleep(8)
             self.start_point = {
                     "name": "Home",
                     "x": None,
@@ -148,33 +156,20 @@ class StepExecutor:
         else:
             toCheck = toScreen.lower()
 
-        # Neo4j shortestPath 쿼리 생성
-        step0_Cypher = f"""
-            MATCH (start:Screen {{name: "{fromScreen}"}})
-            MATCH (target:Screen {{name: "{toScreen}"}})
-            MATCH path = shortestPath((start)-[:CONTAINS|TRIGGERS|LEADS_TO*]->(target))
-            UNWIND nodes(path) AS n
-            WITH n, path
-            WHERE n: UIElement AND n.x IS NOT NULL AND n.y IS NOT NULL
-            RETURN n.name AS name, n.x AS x, n.y AS y
-            ORDER BY apoc.coll.indexOf(nodes(path), n)
-            """
-        if not hasattr(self, "neo4j") or self.neo4j is None:
-            self.neo4j = Neo4jHandler(
-                uri="bolt://localhost:7687",
-                user="neo4j",
-                password="neo4jneo4j",
-                cypher=step0_Cypher
-            )
-        else:
-            self.neo4j.cypher = step0_Cypher
+        # 메모리 그래프에서 경로 조회, 없으면 Neo4j shortestPath 쿼리 실행
+        query_result = self.graph.find_tap_sequence(
+            fromScreen, toScreen, start_label="Screen", target_label="Screen"
+        )
+        if query_result is None:
+            query_result = await self._query_tap_sequence("Screen", fromScreen, toScreen)
 
-        # Cypher 실행
-        query_result, error = self.neo4j.execute_cypher()
         if query_result:
-            self.tap_executor = TapExecutor()
-            tap_result = self.tap_executor.tap(query_result)
-            log = self.monitor.search("StartFragment :")
+            self.tap_executor = TapExecutor(monitor=self.monitor)
+            since = self.monitor.mark()
+            tap_result = await asyncio.to_thread(self.tap_executor.tap, query_result)
+            # 화면 전환 로그가 이미 들어왔거나 들어올 때까지 대기
+            log = self.monitor.wait_for("StartFragment :", since=since, timeout=3.0) \
+                or self.monitor.search("StartFragment :")
             if log and toCheck in log:
                 print(f"==== Step 0: Move to {toScreen} Screen ====")
                 print("==== Completed ====")
@@ -206,23 +201,22 @@ class StepExecutor:
         self.total_result = {}
         return finalResult
 
-    # Neo4j 연결 종료
-    def __del__(self):
-        if hasattr(self, "neo4j") and self.neo4j:
-            try:
-                self.neo4j.close()
-            except Exception as e:
-                print(f"[WARN] Failed to close neo4j in destructor: {e}")
-
     # Observation 수행
-    async def _observate_result(self, step, expected_result):
+    # - action_frame: 동작 직전의 frame_monitor 프레임 위치 (이후 프레임으로 화면 안정 여부 판단)
+    async def _observate_result(self, step, expected_result, action_frame=None):
         print("\n==== Observation ====")
         print(f"Expected Result: {expected_result}")
+        # 마지막 동작 이후 로그가 잠잠해질 때까지 대기한 뒤 로그 저장
+        await asyncio.to_thread(self.monitor.wait_until_settled, quiet=0.3, timeout=1.0)
+        # 화면 애니메이션이 끝난 뒤 검증하도록 프레임이 안정될 때까지 대기
+        # (동작 이후 이미 받은 프레임으로 먼저 판단하고, 부족하면 캡처 간격만큼만 대기)
+        if self.frame_monitor is not None and self.frame_monitor.running and action_frame is not None:
+            await asyncio.to_thread(self.frame_monitor.wait_for_stable, action_frame, stable_frames=1)
         self.monitor.save_log()
-        time.sleep(1)
 
         # Verify MCP 에이전트 실행
-        res, reason = await run_verify_agent(step, expected_result)
+        focus = (self.start_point.get("x"), self.start_point.get("y")) if self.start_point else None
+        res, reason = await run_verify_agent(step, expected_result, focus)
         if res=="Error":
             print("[ERROR] Observation Error Occurred")
             return
@@ -236,33 +230,110 @@ class StepExecutor:
         self.monitor.setTime()
 
     # Cypher 실행 후 실패 시 LLM으로 재생성
-    def _run_cypher_with_retry(self, canonical_name):
+    async def _run_cypher_with_retry(self, canonical_name):
         max_retries = 5
         previous_failed_queries = []
+        failures = [] # (실패 쿼리, 파라미터, 오류) - 수정에 성공하면 repair 캐시에 기록
+        start_name, start_label = self.generator.get_start_node()
+        context = {"start": (start_name, start_label), "target": (canonical_name, "UIElement")}
          
         for attempt in range(max_retries):
-            records, error = self.neo4j.execute_cypher()
-            if error:
-                print("Cypher Query Failed with error\n")
-                previous_failed_queries.append(f"Query:\n{self.neo4j.cypher}\nError:\n{error}\n")
-                print(f"[INFO] Attempt {attempt}: Requesting LLM to fix the query...")
-                fixed_query = self.generator.generate(
-                    canonical_name,
-                    previous_failed_queries=previous_failed_queries
-                )
-                print("[INFO] Fixed Cypher Query:\n{fixed_query}")
-                self.neo4j.cypher = self.neo4j._extract_cypher_query(fixed_query)
-            else:
+            records, error = await self._validate_and_execute()
+            if not error and (records or failures):
                 print("Cypher Query Succeeded.")
                 print("Query Results: ", records)
+                if records:
+                    self.repairer.remember(failures, self.neo4j.cypher, "llm")
                 return records
+
+            # 로컬 수정 (repair 캐시 -> 규칙), 결과가 비어 있는 경우도 label/방향 규칙 시도
+            failures.append((self.neo4j.cypher, self.neo4j.params, error))
+            repaired = await self._repair_locally(error, context, failures)
+            if repaired is not None:
+                return repaired
+            if not error:
+                print("Cypher Query Succeeded.")
+                print("Query Results: ", records)
+                return records
+
+            print("Cypher Query Failed with error\n")
+            previous_failed_queries.append(
+                f"Query:\n{self.neo4j.cypher}\nParameters:\n{self.neo4j.params}\nError:\n{error}\n"
+            )
+            print(f"[INFO] Attempt {attempt}: Requesting LLM to fix the query...")
+            fixed_query = await asyncio.to_thread(
+                self.generator.generate,
+                canonical_name,
+                previous_failed_queries=previous_failed_queries
+            )
+            print("[INFO] Fixed Cypher Query:\n{fixed_query}")
+            self.neo4j.setCypher(self.neo4j._extract_cypher_query(fixed_query))
         
         print("[FAIL] Maximum retries reached without success.")
         return False
 
+    # EXPLAIN으로 먼저 검증 후 실행
+    async def _validate_and_execute(self):
+        error = await self.neo4j.explain()
+        if error:
+            return None, error
+        return await self.neo4j.execute_cypher()
+
+    # repair 캐시와 규칙으로 현재 쿼리 수정 (성공 시 결과, 실패 시 None)
+    # - 수정한 쿼리가 다른 오류로 실패하면 그 오류에 대한 규칙을 이어서 적용 (최대 3단계)
+    async def _repair_locally(self, error, context, failures):
+        query, params = self.neo4j.cypher, self.neo4j.params
+        cached = self.repairer.lookup(query, params, error)
+        if cached is not None:
+            # 저장된 파라미터가 아니라 현재 step의 파라미터를 바인딩
+            candidates = [("cache", cached, params)]
+        else:
+            candidates = self.repairer.candidates(query, params, error, context)
+
+        for depth in range(3):
+            next_candidates = []
+            for rule, fixed_query, fixed_params in candidates:
+                self.neo4j.setCypher(fixed_query, fixed_params)
+                records, fixed_error = await self._validate_and_execute()
+                if not fixed_error and records:
+                    print(f"[INFO] Cypher repaired locally ({rule}).")
+                    if rule != "cache":
+                        self.repairer.remember(failures, fixed_query, rule)
+                    return records
+                if fixed_error and fixed_error != error and not next_candidates:
+                    next_candidates = self.repairer.candidates(fixed_query, fixed_params, fixed_error, context)
+            if not next_candidates:
+                break
+            candidates = next_candidates
+
+        self.neo4j.setCypher(query, params)
+        return None
+
+    # 경로의 마지막 UIElement 위치에서 제스처 실행
+    # - 반환: (마지막 UIElement 또는 False, 제스처 실행 여부)
+    # - 제스처를 지원하지 않으면 기존과 같이 경로 전체를 탭
+    async def _perform_gesture(self, query_result, action_type, action_data, step):
+        sequence = self.tap_executor._normalize(query_result)
+        if not sequence:
+            return False, False
+        target = sequence[-1]
+        if len(sequence) > 1 and await asyncio.to_thread(self.tap_executor.tap, sequence[:-1]) is False:
+            return False, False
+
+        since = self.monitor.mark()
+        performed = await asyncio.to_thread(
+            self.gesture_executor.perform, action_type, action_data, target.get("x"), target.get("y"), step
+        )
+        if not performed:
+            print(f"[INFO] Gesture '{action_type}' is not supported on this device.")
+            return await asyncio.to_thread(self.tap_executor.tap, [target]), False
+        print(f"[INFO] Performed {action_type} at ({target.get('x')}, {target.get('y')}).")
+        await asyncio.to_thread(self.monitor.wait_until_settled, since)
+        return target, True
+
     # UI 클릭 후 start_point 업데이트
-    def _update_start_point_from_ui(self, ui_name):
-        check = self.neo4j.check_trigger(ui_name)
+    async def _update_start_point_from_ui(self, ui_name):
+        check = await self.neo4j.check_trigger(ui_name)
         if check == None:
             self.generator.update_last_clicked_ui(self.start_point)
             return
@@ -289,10 +360,13 @@ class StepExecutor:
 
         canonical_place = self.start_point.get("name")
         if self.isScreen == False:
-            canonical_place= self.neo4j.get_current_screen(canonical_place)
+            canonical_place = self.graph.nearest_screen(canonical_place) \
+                or await self.neo4j.get_current_screen(canonical_place, self.graph.label_of(canonical_place))
 
         # canonical name, action_type, action_data, expected_result 확인
-        result = self.mapper.resolve(step, self.user_input,canonical_place, expected_result)
+        result = await asyncio.to_thread(
+            self.mapper.resolve, step, self.user_input, canonical_place, expected_result
+        )
         resolved_instr= result
         print(resolved_instr)
         
@@ -310,43 +384,54 @@ class StepExecutor:
                 initial_last_clicked_ui=self.start_point
             )
 
-        # Cypher 생성 및 실행
-        cypher_query = self.generator.generate(canonical_name)
-                    
-        if not hasattr(self, "neo4j") or self.neo4j is None:
-            self.neo4j = Neo4jHandler(
-                uri="bolt://localhost:7687",
-                user="neo4j",
-                password="neo4jneo4j",
-                cypher=cypher_query
+        # 라우트 테이블 -> 메모리 그래프 순으로 경로 조회
+        start_name, start_label = self.generator.get_start_node()
+        query_result = self.routes.lookup(start_name, canonical_name)
+        if query_result is None:
+            query_result = self.graph.find_tap_sequence(start_name, canonical_name)
+
+        # 경로 템플릿 실행 (label 쿼리가 비면 label 없는 쿼리로 대체)
+        if query_result is None:
+            query_result, error = await self.neo4j.run_template(
+                "tap_path", {"start": start_name, "target": canonical_name},
+                source=start_label, target="UIElement"
             )
-        else:
-            self.neo4j.cypher = self.neo4j._extract_cypher_query(cypher_query)
-        
-        query_result = self._run_cypher_with_retry(canonical_name=canonical_name)
+
+        # 그래도 경로가 없으면 Cypher 수정 / 생성 후 재시도
+        if not query_result:
+            self.neo4j.setCypher(
+                self.neo4j.get_template("tap_path", source=start_label, target="UIElement"),
+                {"start": start_name, "target": canonical_name}
+            )
+
+            query_result = await self._run_cypher_with_retry(canonical_name=canonical_name)
         
         if query_result == False:
-            self.neo4j.close()
             return
         
         # TapExecutor 실행
         avoid = None or self.start_point
-        self.tap_executor = TapExecutor(avoid=avoid)
-
-        if action_type == "hold":
-            tap_result = self.tap_executor.hold(query_result)
+        self.tap_executor = TapExecutor(avoid=avoid, monitor=self.monitor)
+
+        gesture_done = False
+        action_frame = self.frame_monitor.mark() if self.frame_monitor is not None else None
+        if action_type in GESTURE_TYPES:
+            # 대상까지는 탭으로 이동하고, 대상 위치에서 제스처 한 번 실행
+            tap_result, gesture_done = await self._perform_gesture(query_result, action_type, action_data, step)
+        elif action_type == "hold":
+            tap_result = await asyncio.to_thread(self.tap_executor.hold, query_result)
         else:
-            tap_result = self.tap_executor.tap(query_result)
+            tap_result = await asyncio.to_thread(self.tap_executor.tap, query_result)
         
         if tap_result is False:
             return
         
         # start_point 및 화면 갱신
         self.start_point = tap_result
-        screen_name = self._update_start_point_from_ui(tap_result)
+        screen_name = await self._update_start_point_from_ui(tap_result)
 
-        # 추가 action 필요 시 MCP 호출
-        if action_type not in ["tap", "hold"]:
+        # 추가 action 필요 시 MCP 호출 (제스처 엔진으로 처리하지 못한 경우)
+        if action_type not in ["tap", "hold"] and not gesture_done:
             print("[INFO] Additional action required, calling action_mcp client...")
             ui_name = await run_action_agent(screen_name, step)
             self.start_point = {
@@ -354,7 +439,7 @@ class StepExecutor:
                 "x": None,
                 "y": None
             }
-            screen_name = self._update_start_point_from_ui(self.start_point)
+            screen_name = await self._update_start_point_from_ui(self.start_point)
 
         # Observation 수행
-        await self._observate_result(step, expected_result)     
\ No newline at end of file
+        await self._observate_result(step, expected_result, action_frame)     
\ No newline at end of file
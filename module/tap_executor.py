@@ -1,16 +1,28 @@
-import subprocess
+from module.adb_client import get_adb_client
 import time
 
 """
 TapExecutor 클래스
 - 생성된 UI sequence를 기반으로 ADB 명령어를 실행하여 안드로이드 디바이스를 제어
+- 명령은 AdbClient의 지속 shell 스트림으로 전송 (탭마다 adb 프로세스를 실행하지 않음)
 - tap()과 hold() 함수를 통해 호출
 - avoid 값은 dictionary 형태로, sequence의 시작점에서 클릭을 피할 UI Element를 지정
+- monitor(InMemoryLogMonitor)가 주어지면 탭 후 고정 0.5초 대신 앱 로그가 잠잠해질 때까지 대기
 """
 
 class TapExecutor:
-    def __init__(self, avoid=None):
+    def __init__(self, avoid=None, monitor=None, settle_timeout=2.0):
         self.avoid = avoid # 클릭할 필요가 없는 UI Element 정보
+        self.adb = get_adb_client()
+        self.monitor = monitor
+        self.settle_timeout = settle_timeout
+
+    # 탭 후 화면 안정 대기 (모니터가 없으면 기존과 같이 0.5초)
+    def _settle(self, since):
+        if self.monitor is None:
+            time.sleep(0.5)
+            return
+        self.monitor.wait_until_settled(since, timeout=self.settle_timeout)
 
     # tap_sequence를 표준 형식 (list of dict)으로 변환
     def _normalize(self, tap_sequence):
@@ -47,8 +59,7 @@ class TapExecutor:
     
     # 화면 중앙 상단 영역을 탭
     def tap_middle(self):
-        cmd = "adb shell input tap 810 50"
-        subprocess.run(cmd, shell=True)
+        self.adb.tap(810, 50)
 
     # 주어진 tap_sequence를 순서대로 탭한 후, 마지막으로 탭한 UI Element를 반환
     def tap(self, tap_sequence, avoid=None):
@@ -79,9 +90,9 @@ class TapExecutor:
                 continue
 
             print(f"Tapping {name} at ({x}, {y})...")
-            cmd = f"adb shell input tap {x} {y}"
-            subprocess.run(cmd, shell=True)
-            time.sleep(0.5)
+            since = self.monitor.mark() if self.monitor else None
+            self.adb.tap(x, y)
+            self._settle(since)
             last_tapped_item = item #마지막으로 탭한 UI
         
         return last_tapped_item
@@ -114,15 +125,15 @@ class TapExecutor:
                 print(f"Skipping {name} due to missing coordinates.")
                 continue
 
+            since = self.monitor.mark() if self.monitor else None
             if idx == len(tap_sequence)-1:
                 print(f"Holding {name} at ({x}, {y}) for 10 seconds...")
-                cmd = f"adb shell input swipe {x} {y} {x} {y} 10000"
+                self.adb.hold(x, y, 10000)
             else:
                 print(f"Tapping {name} at ({x}, {y})...")
-                cmd = f"adb shell input tap {x} {y}"
+                self.adb.tap(x, y)
 
-            subprocess.run(cmd, shell=True)
-            time.sleep(0.5)
+            self._settle(since)
             last_tapped_item = item
 
         return last_tapped_item
\ No newline at end of file
@@ -0,0 +1,267 @@
+from module.adb_client import get_adb_client
+from module.settle import APP_PACKAGE
+from pathlib import Path
+from dotenv import load_dotenv
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+
+import cv2
+import numpy as np
+
+"""
+VlmAnswerCache 모듈
+- 같은 화면에 같은 질문을 다시 하는 경우(반복되는 Home 확인, 변하지 않은 팝업 재검증 등) 이전 VLM 답변을 재사용
+- 키: (앱 빌드 버전, 호출 위치(scope), 정규화한 질문) + 화면의 perceptual hash(pHash, 64비트)
+  - pHash 해밍 거리가 max_distance 이하인 항목을 후보로 찾고,
+  - 가로 360픽셀 회색조 썸네일을 4x4 블록(원본 1080 기준 약 12x12픽셀)으로 나눈
+    블록별 평균 밝기 차이의 최댓값이 max_pixel_diff 이하일 때만 같은 화면으로 판단
+    (숫자 한 글자, 짧은 라벨, 라디오 버튼처럼 작은 변화는 pHash가 같아도 블록 차이로 구분)
+  - 썸네일은 PNG로 압축하여 저장 (항목당 수십 KB)
+- verify_mcp는 검증마다 새 프로세스로 실행되므로 MappingCache와 같이 SQLite 파일에 저장
+- 앱 빌드(dumpsys package의 versionName / versionCode / lastUpdateTime)가 바뀌면 이전 빌드 항목을 삭제하고,
+  조회도 현재 빌드 항목만 대상으로 하므로 다른 빌드의 답변을 반환하지 않음
+- 최대 개수를 넘으면 가장 오래 사용하지 않은 항목부터 삭제(LRU), 적중률은 프로세스 간 누적
+
+환경 변수:
+- VLM_CACHE_PATH: SQLite 파일 경로 (기본 resource/vlm_cache.sqlite3)
+- VLM_CACHE_MAX_ENTRIES: 최대 항목 수 (기본 512, 0이면 캐시 사용 안 함)
+- VLM_CACHE_MAX_DISTANCE: pHash 최대 해밍 거리 (기본 4)
+- VLM_CACHE_MAX_PIXEL_DIFF: 썸네일 블록 최대 평균 밝기 차이 0~255 (기본 8)
+"""
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+VLM_CACHE_PATH = Path(
+    os.getenv("VLM_CACHE_PATH")
+    or Path(__file__).resolve().parent.parent / "resource" / "vlm_cache.sqlite3"
+)
+MAX_ENTRIES = int(os.getenv("VLM_CACHE_MAX_ENTRIES", "512"))
+MAX_DISTANCE = int(os.getenv("VLM_CACHE_MAX_DISTANCE", "4"))
+MAX_PIXEL_DIFF = int(os.getenv("VLM_CACHE_MAX_PIXEL_DIFF", "8"))
+
+THUMBNAIL_WIDTH = 360 # 썸네일 가로 픽셀 (세로는 화면 비율 유지)
+BLOCK_SIZE = 4 # 썸네일 비교 블록 크기
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    build TEXT NOT NULL,
+    question TEXT NOT NULL,
+    phash INTEGER NOT NULL,
+    thumbnail BLOB NOT NULL,
+    answer TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_lookup ON answers (build, question);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+_build_version = None
+
+
+# 앱 빌드 식별 문자열 (프로세스에서 한 번만 조회, 확인할 수 없으면 None)
+def get_app_build(package=APP_PACKAGE):
+    global _build_version
+    if _build_version is None:
+        try:
+            output = get_adb_client().shell(
+                f"dumpsys package {package} | grep -E 'versionName|versionCode|lastUpdateTime'"
+            )
+        except Exception as e:
+            # verify_mcp는 stdout을 MCP stdio 통신에 사용하므로 stderr로 출력
+            print(f"[WARN] Failed to read the app build version: {e}", file=sys.stderr)
+            return None
+        # lastUpdateTime은 "날짜 시간" 형식이라 같은 버전을 다시 설치한 경우도 구분
+        parts = [
+            f"{name}={value}" if name else f"lastUpdateTime={updated}"
+            for name, value, updated in re.findall(
+                r"(versionName|versionCode)=(\S+)|lastUpdateTime=(\S+ \S+)", output
+            )
+        ]
+        _build_version = "|".join(parts) or None
+    return _build_version
+
+
+# 질문 정규화 (유니코드 / 대소문자 / 공백 / 끝 문장부호)
+def normalize_question(question):
+    text = unicodedata.normalize("NFKC", question or "").lower()
+    return re.sub(r"\s+", " ", text).strip().rstrip("?.!")
+
+
+# 64비트 pHash (32x32 회색조 DCT의 저주파 8x8 계수를 중앙값과 비교)
+def phash(image):
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    bits = low > np.median(low[1:])
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    # SQLite INTEGER는 부호 있는 64비트
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def thumbnail(image):
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    height = max(1, round(gray.shape[0] * THUMBNAIL_WIDTH / gray.shape[1]))
+    return cv2.resize(gray, (THUMBNAIL_WIDTH, height), interpolation=cv2.INTER_AREA)
+
+
+# 썸네일 두 장의 블록별 평균 밝기 차이 중 최댓값 (크기가 다르면 None)
+def block_difference(a, b, block=BLOCK_SIZE):
+    if a is None or b is None or a.shape != b.shape:
+        return None
+    diff = cv2.absdiff(a, b).astype(np.float32)
+    height, width = diff.shape
+    blocks = cv2.resize(diff, (max(1, width // block), max(1, height // block)), interpolation=cv2.INTER_AREA)
+    return float(blocks.max())
+
+
+def encode_thumbnail(image):
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+def decode_thumbnail(data):
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+
+
+def hamming(a, b):
+    return bin((a ^ b) & ((1 << 64) - 1)).count("1")
+
+
+class VlmAnswerCache:
+    """
+    VlmAnswerCache 클래스
+    - path: SQLite 파일 경로
+    - max_entries: 최대 항목 수
+    - max_distance: pHash 최대 해밍 거리
+    - max_pixel_diff: 썸네일 블록 최대 평균 밝기 차이
+    """
+
+    def __init__(self, path=VLM_CACHE_PATH, max_entries=MAX_ENTRIES,
+                 max_distance=MAX_DISTANCE, max_pixel_diff=MAX_PIXEL_DIFF):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.max_pixel_diff = max_pixel_diff
+        self._build = None
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def _count(self, name, amount=1):
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    # 빌드가 바뀌었으면 이전 빌드 항목 삭제
+    def _check_build(self, build):
+        if build == self._build:
+            return
+        cur = self._conn.execute("DELETE FROM answers WHERE build != ?", (build,))
+        if cur.rowcount:
+            self._count("evictions", cur.rowcount)
+        self._conn.commit()
+        self._build = build
+
+    # 같은 화면 / 같은 질문의 이전 답변 조회 (없으면 None)
+    # - scope: 호출 위치와 프롬프트 구분 (예: "adb_screen_vlm", "check_current_screen")
+    def get(self, image, question, scope="", build=None):
+        build = build or get_app_build()
+        # 빌드를 확인할 수 없으면 다른 빌드의 답변일 수 있으므로 사용하지 않음
+        if not self.enabled or build is None:
+            return None
+        key = f"{scope}|{normalize_question(question)}"
+        screen_hash = phash(image)
+        screen_thumbnail = thumbnail(image)
+
+        with self._lock:
+            self._check_build(build)
+            rows = self._conn.execute(
+                "SELECT id, phash, thumbnail, answer FROM answers WHERE build = ? AND question = ?",
+                (build, key),
+            ).fetchall()
+            best = None
+            for row_id, row_hash, row_thumbnail, answer in rows:
+                distance = hamming(screen_hash, row_hash)
+                if distance > self.max_distance:
+                    continue
+                # 해상도가 다르거나 읽을 수 없는 썸네일(이전 형식)은 다른 화면으로 취급
+                difference = block_difference(screen_thumbnail, decode_thumbnail(row_thumbnail))
+                if difference is None or difference > self.max_pixel_diff:
+                    continue
+                if best is None or distance < best[0]:
+                    best = (distance, row_id, answer)
+
+            if best is None:
+                self._count("misses")
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE answers SET last_used = ? WHERE id = ?", (time.time(), best[1]))
+            self._count("hits")
+            self._conn.commit()
+        return best[2]
+
+    # 답변 저장 (최대 개수를 넘으면 LRU 삭제)
+    def put(self, image, question, answer, scope="", build=None):
+        build = build or get_app_build()
+        if not self.enabled or build is None:
+            return
+        key = f"{scope}|{normalize_question(question)}"
+        with self._lock:
+            self._check_build(build)
+            self._conn.execute(
+                "INSERT INTO answers (build, question, phash, thumbnail, answer, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (build, key, phash(image), encode_thumbnail(thumbnail(image)), answer, time.time()),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            if count > self.max_entries:
+                cur = self._conn.execute(
+                    "DELETE FROM answers WHERE id IN "
+                    "(SELECT id FROM answers ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+                self._count("evictions", cur.rowcount)
+            self._conn.commit()
+
+    # 전체 삭제
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM answers")
+            self._conn.execute("DELETE FROM counters")
+            self._conn.commit()
+
+    # 적중률 통계 (프로세스 간 누적)
+    def stats(self):
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+            size = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "size": size,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
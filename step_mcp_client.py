@@ -5,7 +5,8 @@ from mcp.client.stdio import stdio_client
 from langchain_mcp_adapters.tools import load_mcp_tools
 from langchain_mcp_adapters.prompts import load_mcp_prompt
 from langgraph.prebuilt import create_react_agent
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_openai import OpenAIEmbeddings
+from module.llm_gateway import get_chat_model
 import json
 import re
 from langchain_community.vectorstores import FAISS
@@ -14,6 +15,7 @@ import os
 import asyncio
 from module.screen_checker import ScreenChecker
 from module.log_monitor import InMemoryLogMonitor
+from module.frame_monitor import FrameMonitor
 from module.step_executor import StepExecutor
 import csv
 from collections import OrderedDict
@@ -32,7 +34,7 @@ faiss_vectorstore=None
 load_dotenv()
 
 os.getenv("OPENAI_API_KEY")
-model = ChatOpenAI(model="gpt-4o")
+model = get_chat_model("gpt-4o") # LLM gateway의 공유 연결 풀 사용
 
 # =========================================================
 # CSV 파일에서 테스트 케이스 읽어오기 함수
@@ -266,10 +268,16 @@ async def run():
             #    test_screen, user_input = testList[i]
             ########################################################
             
+            # 화면 프레임 모니터 시작 (FRAME_MONITOR_INTERVAL=0이면 사용 안 함)
+            # - verify_mcp는 별도 프로세스이므로 모니터를 공유하지 않고 직접 캡처
+            frame_monitor = FrameMonitor()
+            frame_monitor.start_monitoring()
+
             # 현재 화면 확인
-            start_point = ScreenChecker().check_current_screen()
+            screen_checker = ScreenChecker(frame_monitor=frame_monitor)
+            start_point = screen_checker.check_current_screen()
             if start_point == "fail":
-                ScreenChecker().move_to_home()
+                screen_checker.move_to_home()
                 start_point="Home"
             
             user_input += f"현재 화면은 {start_point}입니다."
@@ -297,12 +305,12 @@ async def run():
 
                 # StepExecutor 생성
                 test_screen = change_screen_name(input_list[0])
-                stepExecutor = StepExecutor(monitor=log_monitor, user_input=user_input)
+                stepExecutor = StepExecutor(monitor=log_monitor, user_input=user_input, frame_monitor=frame_monitor)
                 stepExecutor.setStartScreen(start_point)
 
                 # 현재 화면과 테스트 화면이 다르면 Step0 생성
                 if start_point != test_screen:
-                    stepExecutor.generate_step0(start_point, test_screen)
+                    await stepExecutor.generate_step0(start_point, test_screen)
                     stepExecutor.setStartScreen(test_screen)
 
                 # Steps 실행
@@ -310,17 +318,18 @@ async def run():
                 
                 # 실행 결과 출력
                 final_Result = stepExecutor.get_finalResult()
-                stepExecutor.return_to_testScreen(test_screen)
+                await stepExecutor.return_to_testScreen(test_screen)
 
                 print("==== STEP EXECUTION RESULT ====")
                 if len(final_Result):
-                    print(f"Last Executed Step Info: {final_Result["step"]}")
-                    print(f"Result: {final_Result["result"]}")
+                    print(f"Last Executed Step Info: {final_Result['step']}")
+                    print(f"Result: {final_Result['result']}")
                 else:
                     print("[ERROR] Error occurred during executing step")
 
             # 로그 모니터 종료
             log_monitor.stop_monitoring()
+            frame_monitor.stop_monitoring()
 
     await save_faiss()
 
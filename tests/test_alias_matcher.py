@@ -0,0 +1,63 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from module.alias_matcher import AliasMatcher
+
+ALIAS_PATH = Path(__file__).resolve().parent.parent / "resource" / "ui_alias.json"
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    with open(ALIAS_PATH, "r", encoding="utf-8") as f:
+        return AliasMatcher(json.load(f))
+
+
+# alias 외에 다른 내용어가 남으면 화면 이름은 문맥일 뿐이므로 LLM에 맡김
+@pytest.mark.parametrize("step", [
+    "설정화면에서 IP 입력창 탭",
+    "Program 탭하여 새 프로그램 생성",
+    "시스템화면 탭 후 확인",
+    "USB 연걸 버튼 클릭 후 확인",
+])
+def test_context_words_fall_back_to_llm(matcher, step):
+    assert matcher.match(step) is None
+
+
+@pytest.mark.parametrize("step, canonical, action_type", [
+    ("Home 버튼 탭", "Home", "tap"),
+    ("1. Settings 클릭", "Settings", "tap"),
+    ("Wi-Fi 버튼을 눌러주세요", "Wi-Fi Option", "tap"),
+    ("연결 아이콘을 선택한다", "Connection Icon", "tap"),
+    ("Tap the Home button", "Home", "tap"),
+    ("Program 탭을 길게 누른다", "Program", "hold"),
+])
+def test_alias_with_action_words_only(matcher, step, canonical, action_type):
+    result = matcher.match(step)
+    assert result is not None
+    assert (result["canonical_name"], result["action_type"]) == (canonical, action_type)
+
+
+# step이 alias 그 자체면 노드의 기본 동작(tap)으로 처리
+@pytest.mark.parametrize("step, canonical", [
+    ("Home", "Home"),
+    ("2. Wi-Fi Option", "Wi-Fi Option"),
+    ("프로그램화면", "Program"),
+])
+def test_exact_alias_uses_default_action(matcher, step, canonical):
+    result = matcher.match(step)
+    assert result == {"canonical_name": canonical, "action_type": "tap", "match": "exact"}
+    assert matcher.stats()["exact"] > 0
+
+
+# 오타가 있는 alias도 오타 부분을 제외한 나머지만 검사
+def test_fuzzy_match_removes_matched_span(matcher):
+    result = matcher.match("USB 연걸 버튼 클릭")
+    assert result == {"canonical_name": "USBConnectBtn", "action_type": "tap", "match": "fuzzy"}
+
+
+# 동작 키워드가 없거나 tap / hold 외의 동작이면 LLM에 맡김
+@pytest.mark.parametrize("step", ["Home 버튼", "Home 화면으로 스와이프"])
+def test_unknown_action_falls_back_to_llm(matcher, step):
+    assert matcher.match(step) is None
@@ -0,0 +1,32 @@
+from module.cypher_repair import CypherRepairer
+
+QUERY = "MATCH p = (s {name: $start})-[:TAP*]->(t {name: $target}) RETURN p"
+FIXED = "MATCH p = (s:Screen {name: $start})-[:TAP*]->(t:UIElement {name: $target}) RETURN p"
+
+
+def test_cached_repair_is_keyed_by_params(tmp_path):
+    repairer = CypherRepairer(cache_path=tmp_path / "cache.json")
+    params = {"start": "Home", "target": "IP 입력창"}
+    repairer.remember([(QUERY, params, None)], FIXED, "missing_label")
+
+    assert repairer.lookup(QUERY, params, None) == FIXED
+    # 같은 쿼리 문장이라도 다른 시작/대상이면 다른 실패
+    assert repairer.lookup(QUERY, {"start": "Home", "target": "Speed"}, None) is None
+    assert repairer.lookup(QUERY, {"start": "Run", "target": "IP 입력창"}, None) is None
+
+
+def test_cache_is_persisted_without_params(tmp_path):
+    path = tmp_path / "cache.json"
+    params = {"start": "Home", "target": "IP 입력창"}
+    CypherRepairer(cache_path=path).remember([(QUERY, params, None)], FIXED, "missing_label")
+
+    reloaded = CypherRepairer(cache_path=path)
+    assert reloaded.lookup(QUERY, params, None) == FIXED
+    assert all("params" not in entry for entry in reloaded.cache.values())
+
+
+def test_parameter_only_repairs_are_not_cached(tmp_path):
+    repairer = CypherRepairer(cache_path=tmp_path / "cache.json")
+    error = "Neo.ClientError.Statement.ParameterMissing: Expected parameter(s): target"
+    repairer.remember([(QUERY, {"start": "Home"}, error)], QUERY, "missing_parameter")
+    assert repairer.cache == {}
@@ -0,0 +1,72 @@
+import gzip
+import struct
+import time
+
+import numpy as np
+import pytest
+
+import module.frame_monitor as frame_monitor
+
+
+# screencap 대신 미리 정한 밝기의 화면을 순서대로 반환 (마지막 값은 계속 반복)
+class FakeAdb:
+    def __init__(self, levels, gzip_available=True):
+        self.levels = list(levels)
+        self.gzip_available = gzip_available
+        self.commands = []
+
+    def shell(self, command):
+        return "/system/bin/gzip\n" if self.gzip_available else ""
+
+    def exec_out(self, command):
+        self.commands.append(command)
+        level = self.levels.pop(0) if len(self.levels) > 1 else self.levels[0]
+        image = np.full((240, 108, 4), level, dtype=np.uint8)
+        raw = struct.pack("<III", 108, 240, 1) + image.tobytes()
+        return gzip.compress(raw, 1) if "gzip" in command else raw
+
+
+def make_monitor(monkeypatch, adb, interval=0.5):
+    monkeypatch.setattr(frame_monitor, "get_adb_client", lambda: adb)
+    monitor = frame_monitor.FrameMonitor(interval=interval, width=27)
+    monitor.start_monitoring()
+    return monitor
+
+
+def test_stability_is_judged_from_buffered_frames(monkeypatch):
+    monitor = make_monitor(monkeypatch, FakeAdb([200]))
+    try:
+        since = monitor.mark()
+        assert monitor.wait_for_stable(since, stable_frames=1, timeout=2.0)
+        # since 이후 프레임이 이미 있으면 새 프레임을 기다리지 않음
+        started = time.monotonic()
+        assert monitor.wait_for_stable(since, stable_frames=1)
+        assert time.monotonic() - started < 0.1
+    finally:
+        monitor.stop_monitoring()
+
+
+def test_default_timeout_follows_interval(monkeypatch):
+    # 프레임마다 화면이 바뀌면 캡처 간격 x (stable_frames + 1)만 기다리고 포기
+    levels = [0, 255] * 20
+    monitor = make_monitor(monkeypatch, FakeAdb(levels))
+    try:
+        # 첫 프레임은 비교할 이전 프레임이 없어 delta가 0이므로 그 이후부터 측정
+        assert monitor.wait_for_change(since=0, timeout=2.0) is not None
+        started = time.monotonic()
+        assert not monitor.wait_for_stable(monitor.mark(), stable_frames=1)
+        assert time.monotonic() - started == pytest.approx(1.0, abs=0.25)
+    finally:
+        monitor.stop_monitoring()
+
+
+@pytest.mark.parametrize("gzip_available", [True, False])
+def test_capture_compresses_when_gzip_is_available(monkeypatch, gzip_available):
+    adb = FakeAdb([200], gzip_available=gzip_available)
+    monitor = make_monitor(monkeypatch, adb)
+    try:
+        assert monitor.wait_for_stable(monitor.mark(), stable_frames=1, timeout=2.0)
+    finally:
+        monitor.stop_monitoring()
+    assert all(("gzip" in command) == gzip_available for command in adb.commands)
+    assert monitor.latest_frame().shape == (240, 108, 3)
@@ -0,0 +1,85 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from module.log_monitor import InMemoryLogMonitor
+
+APP_PID = 4321
+SYSTEM_PID = 1000
+
+
+def log_line(pid, tag, message):
+    stamp = datetime.now().strftime("%m-%d %H:%M:%S.%f")[:18]
+    return f"{stamp} I/{tag}( {pid}): {message}\n".encode("utf-8")
+
+
+@pytest.fixture
+def monitor():
+    monitor = InMemoryLogMonitor()
+    # logcat 프로세스 없이 _ingest_chunk로 로그를 넣음
+    monitor._running = True
+    monitor._pid_checked_at = time.monotonic()
+    yield monitor
+    monitor._running = False
+
+
+# 다른 프로세스의 로그를 duration초 동안 interval 간격으로 넣음
+def feed_noise(monitor, duration, interval=0.05):
+    def run():
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            monitor._ingest_chunk(log_line(SYSTEM_PID, "WifiHAL", "RSSI poll"))
+            time.sleep(interval)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_other_process_logs_do_not_block_settling(monitor):
+    monitor.app_pids = {APP_PID}
+    since = monitor.mark()
+    monitor._ingest_chunk(log_line(APP_PID, "MainActivity", "onClick"))
+    noise = feed_noise(monitor, duration=1.5)
+
+    waited = monitor.wait_until_settled(since, quiet=0.3, timeout=2.0)
+    noise.join()
+    assert waited < 1.0
+
+
+def test_all_logs_are_used_without_app_pid(monitor):
+    since = monitor.mark()
+    monitor._ingest_chunk(log_line(APP_PID, "MainActivity", "onClick"))
+    noise = feed_noise(monitor, duration=1.0)
+
+    waited = monitor.wait_until_settled(since, quiet=0.3, timeout=2.0)
+    noise.join()
+    assert waited >= 1.0
+
+
+def test_no_app_log_means_nothing_changed(monitor):
+    monitor.app_pids = {APP_PID}
+    since = monitor.mark()
+    noise = feed_noise(monitor, duration=1.0)
+
+    waited = monitor.wait_until_settled(since, quiet=0.3, first_log_timeout=0.3, timeout=2.0)
+    noise.join()
+    assert waited < 0.6
+
+
+def test_app_restart_updates_pid(monitor):
+    monitor.app_pids = {APP_PID}
+    monitor._ingest_chunk(log_line(
+        SYSTEM_PID, "ActivityManager",
+        "Start proc 5555:com.neuromeka.conty3/u0a123 for activity {com.neuromeka.conty3/.MainActivity}",
+    ))
+    monitor._ingest_chunk(log_line(
+        SYSTEM_PID, "ActivityManager", "Start proc 5556:com.neuromeka.conty3:remote/u0a123 for service",
+    ))
+    monitor._ingest_chunk(log_line(SYSTEM_PID, "ActivityManager", "Start proc 6000:com.android.settings/1000"))
+    assert monitor.app_pids == {5555, 5556}
+
+    since = monitor.mark()
+    monitor._ingest_chunk(log_line(5555, "MainActivity", "onCreate"))
+    assert monitor.app_line_number > since
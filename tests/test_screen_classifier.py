@@ -0,0 +1,116 @@
+import cv2
+import numpy as np
+import pytest
+
+from module.screen_classifier import SCREEN_NAMES, ScreenClassifier, read_image, save_reference
+
+TABS = ("Program", "Run", "Settings", "System", "Move")
+BLUE = (30, 90, 220)
+GRAY = (120, 120, 120)
+
+
+# 1080x2400 합성 화면 (상단 탭 줄에서 활성 탭만 파란 글자, Home은 활성 탭 없음)
+def make_screen(name, width=1080, height=2400, noise=0):
+    image = np.full((2400, 1080, 3), 240, dtype=np.uint8)
+    for index, tab in enumerate(TABS):
+        color = BLUE if tab == name else GRAY
+        cv2.putText(image, tab, (20 + index * 210, 150), cv2.FONT_HERSHEY_SIMPLEX, 1.1, color, 4)
+        if tab == name:
+            cv2.rectangle(image, (20 + index * 210, 175), (200 + index * 210, 190), BLUE, -1)
+    # 화면마다 다른 본문 배치
+    seed = SCREEN_NAMES.index(name)
+    for row in range(seed + 2):
+        top = 400 + row * 300
+        shade = 60 + 30 * ((row + seed) % 5)
+        cv2.rectangle(image, (80 + 40 * seed, top), (1000, top + 200), (shade, shade, shade), -1)
+    if noise:
+        rng = np.random.default_rng(seed)
+        image = np.clip(image.astype(np.int16) + rng.integers(-noise, noise + 1, image.shape), 0, 255)
+        image = image.astype(np.uint8)
+    if (width, height) != (1080, 2400):
+        image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    return image
+
+
+@pytest.fixture
+def references(tmp_path):
+    for name in SCREEN_NAMES:
+        save_reference(make_screen(name), name, tmp_path)
+    return tmp_path
+
+
+@pytest.mark.parametrize("name", SCREEN_NAMES)
+def test_classifies_each_screen_locally(references, name):
+    classifier = ScreenClassifier(references)
+    result, confidence = classifier.classify(make_screen(name, noise=6))
+    assert result == name
+    assert confidence >= classifier.threshold
+
+
+def test_classifies_other_resolution(references):
+    classifier = ScreenClassifier(references)
+    result, confidence = classifier.classify(make_screen("Settings", width=720, height=1600))
+    assert result == "Settings"
+    assert confidence >= classifier.threshold
+
+
+def test_missing_references_fall_back(tmp_path):
+    classifier = ScreenClassifier(tmp_path / "missing")
+    assert classifier.classify(make_screen("Home")) == (None, 0.0)
+
+
+def test_ambiguous_screen_has_low_confidence(references):
+    classifier = ScreenClassifier(references)
+    # Run 화면 위에 Move 화면이 반쯤 겹친 전환 중 프레임은 어느 쪽인지 확신할 수 없음
+    image = cv2.addWeighted(make_screen("Run"), 0.5, make_screen("Move"), 0.5, 0)
+    _, confidence = classifier.classify(image)
+    assert confidence < classifier.threshold
+
+
+# 앱 밖 화면: 런처(그라데이션 배경 + 아이콘 격자), 검은 화면, 흰 스플래시
+def make_launcher():
+    image = np.zeros((2400, 1080, 3), dtype=np.uint8)
+    image[:] = np.linspace(20, 100, 2400, dtype=np.uint8)[:, None, None]
+    rng = np.random.default_rng(0)
+    for column in range(4):
+        for row in range(5):
+            color = tuple(int(v) for v in rng.integers(0, 255, 3))
+            left, top = 60 + column * 250, 300 + row * 350
+            cv2.rectangle(image, (left, top), (left + 160, top + 160), color, -1)
+    return image
+
+
+def make_splash():
+    image = np.full((2400, 1080, 3), 255, dtype=np.uint8)
+    cv2.circle(image, (540, 1200), 150, (200, 30, 30), -1)
+    return image
+
+
+@pytest.mark.parametrize("image", [
+    make_launcher(),
+    np.zeros((2400, 1080, 3), dtype=np.uint8),
+    make_splash(),
+], ids=["launcher", "black", "splash"])
+def test_non_app_screen_falls_back_to_llm(references, image):
+    classifier = ScreenClassifier(references)
+    _, confidence = classifier.classify(image)
+    # ScreenChecker는 신뢰도가 threshold 미만이면 LLM에 질의
+    assert confidence < classifier.threshold
+
+
+def test_save_reference_numbers_duplicates(tmp_path):
+    image = make_screen("Home")
+    first = save_reference(image, "Home", tmp_path)
+    second = save_reference(image, "Home", tmp_path)
+    assert (first.name, second.name) == ("Home.png", "Home_2.png")
+    assert np.array_equal(read_image(second), image)
+    with pytest.raises(ValueError):
+        save_reference(image, "Unknown", tmp_path)
+
+
+def test_exclude_skips_own_reference(references):
+    classifier = ScreenClassifier(references)
+    save_reference(make_screen("Run"), "Run", references)
+    classifier.load()
+    result, _ = classifier.classify(read_image(references / "Run.png"), exclude="Run.png")
+    assert result == "Run"
@@ -0,0 +1,50 @@
+import cv2
+import numpy as np
+import pytest
+
+from module.vlm_cache import VlmAnswerCache
+
+BUILD = "versionName=test"
+
+
+# 1080x2400 설정 화면 형태의 합성 화면 (상단 탭, 목록, 값 라벨)
+def make_screen(value="50%", label="Speed", radio=False):
+    image = np.full((2400, 1080, 3), 245, dtype=np.uint8)
+    cv2.rectangle(image, (0, 0), (1079, 160), (30, 60, 200), -1)
+    for row in range(6):
+        top = 300 + row * 200
+        cv2.rectangle(image, (40, top), (1040, top + 150), (255, 255, 255), -1)
+        cv2.putText(image, f"Item {row}", (80, top + 95), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (40, 40, 40), 2)
+    cv2.putText(image, label, (80, 1700), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (40, 40, 40), 2)
+    cv2.putText(image, value, (800, 1700), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (40, 40, 40), 2)
+    cv2.circle(image, (960, 395), 18, (30, 60, 200), -1 if radio else 2)
+    return image
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = VlmAnswerCache(path=tmp_path / "vlm_cache.sqlite3")
+    yield cache
+    cache.close()
+
+
+def test_same_screen_hits(cache):
+    cache.put(make_screen(), "Is speed 50%?", "yes", build=BUILD)
+    assert cache.get(make_screen(), "is speed 50%", build=BUILD) == "yes"
+
+
+# 숫자 한 글자 / 짧은 라벨 / 라디오 버튼 변화는 같은 화면으로 보지 않음
+@pytest.mark.parametrize("changed", [
+    make_screen(value="60%"),
+    make_screen(label="Speeb"),
+    make_screen(radio=True),
+])
+def test_small_change_misses(cache, changed):
+    cache.put(make_screen(), "Is speed 50%?", "yes", build=BUILD)
+    assert cache.get(changed, "Is speed 50%?", build=BUILD) is None
+
+
+def test_other_build_or_scope_misses(cache):
+    cache.put(make_screen(), "Is speed 50%?", "yes", scope="adb_screen_vlm:None", build=BUILD)
+    assert cache.get(make_screen(), "Is speed 50%?", scope="adb_screen_vlm:(0, 0, 640, 640)", build=BUILD) is None
+    assert cache.get(make_screen(), "Is speed 50%?", scope="adb_screen_vlm:None", build="versionName=other") is None
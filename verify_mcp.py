@@ -3,30 +3,26 @@ from mcp.server.fastmcp import FastMCP
 from mcp.server.fastmcp.prompts import base
 from dotenv import load_dotenv
 import os
-import subprocess
-import base64
-from langchain_openai import ChatOpenAI
+from module.llm_gateway import get_chat_model
 from dotenv import load_dotenv
 import os
+import sys
 from pathlib import Path
 from langchain_core.messages import HumanMessage
 from fastmcp import Context
+from module.screen_capture import capture_screen
+from module.image_preprocess import focus_region, prepare_image
+from module.vlm_cache import VlmAnswerCache
 
 # 환경 변수 로드 
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
 
-# LLM 모델 초기화 (GPT-5)
-model = ChatOpenAI(
-    model="gpt-5",
-    use_responses_api=True,
-    output_version="responses/v1",
-    extra_body={
-        "text": {"verbosity": "low"},
-        "reasoning": {"effort": "minimal"},
-    },
-    api_key=api_key 
-)
+# LLM 모델 (GPT-5, LLM gateway의 공유 연결 풀 사용)
+model = get_chat_model("gpt-5", effort="minimal")
+
+# 같은 화면 / 같은 질문의 이전 VLM 답변 캐시 (앱 빌드별, resource/vlm_cache.sqlite3)
+vlm_cache = VlmAnswerCache()
 
 # =========================================================
 # FastMCP 서버 초기화
@@ -36,33 +32,38 @@ mcp = FastMCP("VerifyMCP", instructions="Observe the current state and determine
 
 # =========================================================
 # ADB 스크린샷 캡처 함수
-# - filename: 로컬 저장 파일명
-# - adb shell screencap -> adb pull
+# - region: (left, top, right, bottom) 영역만 캡처 (None이면 전체 화면)
+# - exec:screencap raw 스트림을 메모리로 받아 RGB 배열로 반환 (파일 저장 없음)
 # =========================================================
-def capture_adb_screen_image(filename: str = "screen.png") -> Path:
+def capture_adb_screen_image(region=None):
     try:
-        subprocess.run("adb shell screencap -p /sdcard/screen.png", shell=True, check=True)
-        subprocess.run(f"adb pull /sdcard/screen.png {filename}", shell=True, check=True)
-        return Path(filename)
+        return capture_screen(region)
     except Exception as e:
-        print(f"[ERROR] {e}")
+        print(f"[ERROR] {e}", file=sys.stderr)
         return None
 
 # =========================================================
-# 이미지 파일을 Base64 문자열로 인코딩
+# 마지막으로 조작한 UIElement 좌표
+# - verify_mcp_client가 VLM_FOCUS="x,y" 환경 변수로 전달 (없으면 None)
 # =========================================================
-def encode_image_to_base64(image_path: Path) -> str:
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode('utf-8')
+def get_focus_point():
+    value = os.getenv("VLM_FOCUS", "")
+    try:
+        x, y = (int(v) for v in value.split(","))
+    except ValueError:
+        return None
+    return x, y
 
 # =========================================================
 # LLM을 이용한 화면 상태 질의
 # - question: 화면 이미지에 대해 LLM에게 물어볼 질문
 # - 화면 분석 규칙 포함 (라디오 버튼, 연결 아이콘 등)
+# - region: (left, top, right, bottom) 관심 영역 (None이면 전체 화면)
+# - 축소 / JPEG 재인코딩한 이미지를 전송 (module/image_preprocess.py)
 # =========================================================
-def query_screen_with_llm(image_path: Path, question: str) -> str:
-    if not image_path or not image_path.exists():
-        raise RuntimeError("Image file does not exist.")
+def query_screen_with_llm(image, question: str, region=None) -> str:
+    if image is None or image.size == 0:
+        raise RuntimeError("Screen image is empty.")
 
     # 화면 분석 규칙 설명
     descriptive_prompt = (
@@ -75,8 +76,7 @@ def query_screen_with_llm(image_path: Path, question: str) -> str:
     # 최종 질문 구성
     final_question = descriptive_prompt + question
 
-    base64_image = encode_image_to_base64(image_path)
-    image_url = f"data:image/png;base64,{base64_image}"
+    image_url = prepare_image(image, region=region, label="adb_screen_vlm")
 
     # LLM용 HumanMessage 구성
     msg = HumanMessage(content=[
@@ -117,23 +117,38 @@ def get_log():
 # FastMCP Tool: adb_screen_vlm
 # - 화면 캡처 후 LLM을 통해 질문 응답
 # - question: "현재 화면에서 xxx가 보이나요?" 등
+# - focus: True면 마지막으로 조작한 UI 주변 영역만 확대하여 질의
+# - 화면이 바뀌지 않았으면 이전 답변을 재사용 (vlm_cache)
 # - 반환: {"success": bool, "answer": str}
 # =========================================================
 @mcp.tool()
-async def adb_screen_vlm(ctx: Context, question: str) -> dict:
+async def adb_screen_vlm(ctx: Context, question: str, focus: bool = False) -> dict:
     """
     FastMCP Tool: ADB 화면 캡처 후 LLM(VLM) 질의
     Args:
         question (str): 화면 이미지에 대해 LLM에게 물어볼 질문
+        focus (bool): True면 마지막으로 조작한 UI 주변 영역만 보고 답변 (작은 글자/아이콘 확인용)
     Returns:
         dict: {"success": bool, "answer": str}
     """
-    screen_file = capture_adb_screen_image()
-    if not screen_file:
+    screen = capture_adb_screen_image()
+    if screen is None:
         return {"success": False, "answer": "Failed to capture screen."}
 
+    region = None
+    point = get_focus_point() if focus else None
+    if point is not None:
+        region = focus_region(screen.shape, *point)
+
+    scope = f"adb_screen_vlm:{region}"
+    cached = vlm_cache.get(screen, question, scope=scope)
+    if cached is not None:
+        return {"success": True, "answer": cached}
+
     try:
-        answer = query_screen_with_llm(screen_file, question)
+        answer = query_screen_with_llm(screen, question, region)
+        if answer and answer != "No valid text content found in the response.":
+            vlm_cache.put(screen, question, answer, scope=scope)
         return {"success": True, "answer": answer}
     except Exception as e:
         return {"success": False, "answer": str(e)}
@@ -213,8 +228,9 @@ def verify_prompt(step: str, expected_result: str) -> list[base.Message]:
 - 로그 정보를 기반으로 'success' | 'fail' | 'uncertain'을 판단합니다.
 - 안드로이드 시스템 내부 동작을 확인하는 데 유용합니다.
 
-2. adb_screen_vlm(question)
+2. adb_screen_vlm(question, focus=False)
 - 현재 화면의 스크린샷을 분석하여 expected_result가 시각적으로 나타나는지 확인합니다.
+- 마지막으로 조작한 UI 주변의 작은 글자/아이콘 상태를 확인해야 할 때만 focus=True로 호출합니다.
 - 실제 사용자 관점의 UI 상태를 확인하는 데 결정적입니다.
 
 [행동 지침]
@@ -3,7 +3,7 @@ from mcp.client.stdio import stdio_client
 from langchain_mcp_adapters.tools import load_mcp_tools
 from langchain_mcp_adapters.prompts import load_mcp_prompt
 from langgraph.prebuilt import create_react_agent
-from langchain_openai import ChatOpenAI
+from module.llm_gateway import get_chat_model
 import json
 import re
 from dotenv import load_dotenv
@@ -14,17 +14,8 @@ import asyncio
 load_dotenv()
 api_key= os.getenv("OPENAI_API_KEY")
 
-# LLM 초기화 (GPT-5)
-llm = ChatOpenAI(
-    model="gpt-5",
-    use_responses_api=True,
-    output_version="responses/v1",
-    extra_body={
-        "text":{"verbosity":"low"},
-        "reasoning":{"effort":"medium"},
-    },
-    api_key=api_key
-)
+# LLM (GPT-5, LLM gateway의 공유 연결 풀 사용)
+llm = get_chat_model("gpt-5", effort="medium")
 
 # MCP 서버 실행 파라미터 정의
 server_params = StdioServerParameters(
@@ -36,9 +27,18 @@ server_params = StdioServerParameters(
 # 비동기 함수: run_verify_agent
 # - step과 expected_result를 받아 MCP 에이전트를 통해 검증 수행
 # - logs, 화면 등 시각적/로그 정보 기반으로 결과 판단
+# - focus: 마지막으로 조작한 UIElement 좌표 (x, y), adb_screen_vlm의 관심 영역으로 사용
 # =========================================================
-async def run_verify_agent(step: str, expected_result: str):
-    async with stdio_client(server_params) as (read, write):
+async def run_verify_agent(step: str, expected_result: str, focus=None):
+    params = server_params
+    if focus is not None and None not in focus:
+        params = StdioServerParameters(
+            command=server_params.command,
+            args=server_params.args,
+            env={**os.environ, "VLM_FOCUS": f"{int(focus[0])},{int(focus[1])}"},
+        )
+
+    async with stdio_client(params) as (read, write):
         async with ClientSession(read, write) as session:
             await session.initialize()
 